@@ -0,0 +1,88 @@
+"""
+Compares checking `--collections` collections one at a time (one htmx POST each, in series) against one batch-check.
+
+Reports, per mode, the time until every collection has its first feedback (the check's response),
+  and until every collection's listing-crawl has finished (polling, as the page does).
+WASAPI is a local fake (see `fake_wasapi.py`); uses a throwaway (file-backed) test-database,
+  since the crawls run on background threads.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_batch_check.py
+    python ./benchmarks/bench_batch_check.py --collections 30 --pages 20 --latency 0.2
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import request_collection_helper
+from warc_manager_app.models import Collection
+
+
+def wait_until_ready(collection_ids: list[str]) -> None:
+    """
+    Polls the batch-progress (as the results-table does) until no crawl is running.
+    """
+    while any(row['state'] == 'crawling' for row in request_collection_helper.get_batch_progress(collection_ids)):
+        time.sleep(0.05)
+
+
+def run_serial(collection_ids: list[str]) -> tuple[float, float]:
+    start = time.perf_counter()
+    for collection_id in collection_ids:
+        request_collection_helper.start_collection_check(collection_id)
+    feedback_elapsed = time.perf_counter() - start
+    wait_until_ready(collection_ids)
+    return (feedback_elapsed, time.perf_counter() - start)
+
+
+def run_batch(collection_ids: list[str]) -> tuple[float, float]:
+    start = time.perf_counter()
+    request_collection_helper.start_batch_check(collection_ids)
+    feedback_elapsed = time.perf_counter() - start
+    wait_until_ready(collection_ids)
+    return (feedback_elapsed, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--collections', type=int, default=30)
+    parser.add_argument('--pages', type=int, default=20, help='WASAPI pages per collection')
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated per-request WASAPI latency, in seconds')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/batch_check.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        try:
+            server = FakeWasapiServer(page_count=args.pages, page_size=10, latency=args.latency)
+            with server, override_settings(WASAPI_URL_ROOT=server.url_root, WASAPI_REQUESTS_PER_SECOND=0):
+                for label, run in (('one at a time', run_serial), ('batch', run_batch)):
+                    Collection.objects.all().delete()
+                    collection_ids: list[str] = [f'{1000 + i}' for i in range(args.collections)]
+                    (feedback_elapsed, ready_elapsed) = run(collection_ids)
+                    print(
+                        f'{label:>13}; ``{args.collections}`` collections; all first feedback in '
+                        f'``{feedback_elapsed:6.2f}s``; all listings ready in ``{ready_elapsed:6.2f}s``'
+                    )
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
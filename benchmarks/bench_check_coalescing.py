@@ -0,0 +1,94 @@
+"""
+Counts WASAPI requests when many web-processes check the same few collections at once.
+
+Forks `--processes` processes (standing in for gunicorn workers), each running `--checks-per-process`
+  concurrent collection-checks spread over `--collections` distinct collection-ids, and polling each check
+  until its crawl finishes. The crawl-lease on the `Collection` record should keep WASAPI requests
+  at one crawl per distinct collection, however many checks there are.
+
+Uses a throwaway (file-backed) test-database, shared by the processes; WASAPI is a local fake (see `fake_wasapi.py`).
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_check_coalescing.py
+    python ./benchmarks/bench_check_coalescing.py --processes 4 --checks-per-process 8 --collections 2
+"""
+
+import argparse
+import multiprocessing
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import request_collection_helper
+
+
+def check_until_done(collection_id: str) -> str:
+    """
+    Runs one check, polling (as the check-page does) until its crawl finishes; returns the final state.
+    """
+    try:
+        check_result: dict = request_collection_helper.start_collection_check(collection_id)
+        while check_result['state'] == 'crawling':
+            time.sleep(0.05)
+            check_result = request_collection_helper.get_crawl_progress(collection_id)
+        return check_result['state']
+    finally:
+        db.connection.close()
+
+
+def run_process(check_count: int, collection_count: int, url_root: str) -> list[str]:
+    """
+    Runs one process's concurrent checks.
+    """
+    with override_settings(WASAPI_URL_ROOT=url_root), ThreadPoolExecutor(max_workers=check_count) as executor:
+        collection_ids = [f'{1000 + i % collection_count}' for i in range(check_count)]
+        return list(executor.map(check_until_done, collection_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--checks-per-process', type=int, default=8)
+    parser.add_argument('--collections', type=int, default=2, help='distinct collection-ids')
+    parser.add_argument('--pages', type=int, default=20, help='WASAPI pages per collection')
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated per-request WASAPI latency, in seconds')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/coalescing.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        db.connections.close_all()  # so forked processes open their own connections
+        try:
+            with FakeWasapiServer(page_count=args.pages, page_size=10, latency=args.latency) as server:
+                start = time.perf_counter()
+                with multiprocessing.get_context('fork').Pool(args.processes) as pool:
+                    job_args = [(args.checks_per_process, args.collections, server.url_root)] * args.processes
+                    states: list[str] = [state for states in pool.starmap(run_process, job_args) for state in states]
+                elapsed = time.perf_counter() - start
+                request_count: int = server.request_count
+            print(
+                f'``{len(states)}`` checks of ``{args.collections}`` collections across ``{args.processes}`` processes; '
+                f'final states, ``{sorted(set(states))}``; WASAPI requests, ``{request_count}`` '
+                f'(one crawl per collection is ``{args.collections * args.pages}``); elapsed, ``{elapsed:.2f}s``'
+            )
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
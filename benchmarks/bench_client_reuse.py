@@ -0,0 +1,93 @@
+"""
+Compares a fresh `httpx.Client` per collection-check against the shared, pooled client from `wasapi_client`.
+
+Runs repeated checks of a small (one-page) collection against a local fake WASAPI server over https
+  (see `fake_wasapi.py`; a throwaway self-signed cert is made with the `openssl` command),
+  so each fresh client pays for a TCP and TLS handshake that the shared client only pays once.
+
+Usage, from the project root (needs the usual `.env`, and `openssl` on the path):
+    python ./benchmarks/bench_client_reuse.py
+    python ./benchmarks/bench_client_reuse.py --checks 200 --latency 0.002
+"""
+
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import httpx
+from django.conf import settings
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import wasapi_client
+from warc_manager_app.lib.request_collection_helper import CollectionDataPrepper
+
+
+def make_self_signed_cert(temp_dir: str) -> str:
+    """
+    Writes a cert-and-key pem-file for 127.0.0.1; returns its path.
+    """
+    (key_path, cert_path) = (f'{temp_dir}/key.pem', f'{temp_dir}/cert.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=127.0.0.1']
+        + ['-addext', 'subjectAltName=IP:127.0.0.1', '-keyout', key_path, '-out', cert_path],
+        check=True,
+        capture_output=True,
+    )
+    pem_path = f'{temp_dir}/cert_and_key.pem'
+    pathlib.Path(pem_path).write_text(pathlib.Path(cert_path).read_text() + pathlib.Path(key_path).read_text())
+    return pem_path
+
+
+def check(shared: bool) -> float:
+    """
+    Runs one small-collection check; returns its elapsed-seconds.
+    """
+    start = time.perf_counter()
+    if shared:
+        prepper = CollectionDataPrepper('4321')
+        prepper.get_rest_of_files(prepper.grab_initial_collection_data())
+    else:  # the old way: a client per check
+        auth = httpx.BasicAuth(username=settings.WASAPI_USR, password=settings.WASAPI_KEY)
+        with httpx.Client(auth=auth) as client:
+            prepper = CollectionDataPrepper('4321', client=client)
+            prepper.get_rest_of_files(prepper.grab_initial_collection_data())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.002, help='simulated per-request server latency, in seconds')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pem_path: str = make_self_signed_cert(temp_dir)
+        os.environ['SSL_CERT_FILE'] = pem_path  # so httpx trusts the throwaway cert
+        for label, shared in (('fresh client', False), ('shared client', True)):
+            with FakeWasapiServer(page_count=1, page_size=10, latency=args.latency, certfile=pem_path) as server:
+                with override_settings(WASAPI_URL_ROOT=server.url_root):
+                    timings: list[float] = [check(shared) for _ in range(args.checks)]
+                connection_count: int = server.connection_count
+            wasapi_client.close_clients()
+            print(
+                f'{label:>13}; per-check median ``{statistics.median(timings) * 1000:6.2f}ms``, '
+                f'mean ``{statistics.mean(timings) * 1000:6.2f}ms``; connections, ``{connection_count}``'
+            )
+
+
+if __name__ == '__main__':
+    main()
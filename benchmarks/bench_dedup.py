@@ -0,0 +1,118 @@
+"""
+Measures the bandwidth and disk saved by linking WARCs already downloaded, when requested collections overlap.
+
+Downloads a `--files`-file collection, then a second one sharing `--overlap` of its files (same filename, size,
+  and sha1), with `DOWNLOAD_DEDUP` off, then on. Reports the bytes fetched from the server, the bytes on disk
+  (hardlinked files counted once), and the second collection's "size to transfer", as the confirmation form shows it.
+
+WARCs come from a local fake (see `fake_wasapi.py`), each a distinct size of zero-bytes, so each has its own sha1;
+  uses a throwaway (file-backed) test-database.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_dedup.py
+    python ./benchmarks/bench_dedup.py --files 20 --overlap 0.5 --file-size 4000000
+"""
+
+import argparse
+import hashlib
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import download_engine
+from warc_manager_app.models import Collection, CollectionFile
+
+
+def create_collection(collection_id: str, sizes: list[int], url_root: str) -> Collection:
+    """
+    Creates a checked (`QUERIED`) collection of files of the given sizes, served by the fake.
+    """
+    collection = Collection.objects.create(collection_id=collection_id, item_count=len(sizes), size_in_bytes=sum(sizes))
+    CollectionFile.objects.bulk_create(
+        CollectionFile(
+            collection=collection,
+            filename=f'ARCHIVEIT-{size}.warc.gz',
+            size=size,
+            sha1=hashlib.sha1(bytes(size)).hexdigest(),
+            locations=[f'{url_root}/download/ARCHIVEIT-{size}.warc.gz?size={size}'],
+        )
+        for size in sizes
+    )
+    return collection
+
+
+def download(collection: Collection) -> None:
+    Collection.objects.filter(pk=collection.pk).update(status=Collection.Status.QUEUED_FOR_START)
+    download_engine.DownloadWorker().run(once=True)
+    assert Collection.objects.get(pk=collection.pk).status == Collection.Status.COMPLETE
+
+
+def get_disk_bytes(root: pathlib.Path) -> int:
+    """
+    Sums the sizes of the files under `root`, counting hardlinked files once.
+    """
+    sizes_by_inode: dict = {path.stat().st_ino: path.stat().st_size for path in root.rglob('*') if path.is_file()}
+    return sum(sizes_by_inode.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20, help='files per collection')
+    parser.add_argument('--overlap', type=float, default=0.5, help="fraction of the second collection's files shared")
+    parser.add_argument('--file-size', type=int, default=4_000_000, help='bytes per WARC, roughly')
+    args = parser.parse_args()
+    shared_count: int = int(args.files * args.overlap)
+    first_sizes: list[int] = [args.file_size + i for i in range(args.files)]
+    second_sizes: list[int] = first_sizes[:shared_count] + [
+        args.file_size + args.files + i for i in range(args.files - shared_count)
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/dedup.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        try:
+            with FakeWasapiServer(page_count=1) as server:
+                for dedup in (False, True):
+                    download_root = pathlib.Path(temp_dir) / f'warcs-{dedup}'
+                    overrides = {
+                        'WARC_DOWNLOAD_ROOT': str(download_root),
+                        'DOWNLOAD_DEDUP': dedup,
+                        'DOWNLOAD_FREE_SPACE_MARGIN_BYTES': 0,
+                        'WASAPI_REQUESTS_PER_SECOND': 0,
+                    }
+                    with override_settings(**overrides):
+                        Collection.objects.all().delete()
+                        first: Collection = create_collection('first', first_sizes, server.url_root)
+                        second: Collection = create_collection('second', second_sizes, server.url_root)
+                        download(first)
+                        transfer_bytes: int = second.bytes_to_transfer()
+                        bytes_before: int = server.download_bytes
+                        start = time.perf_counter()
+                        download(second)
+                        elapsed = time.perf_counter() - start
+                        fetched: int = server.download_bytes - bytes_before
+                    print(
+                        f'dedup ``{dedup!s:>5}``; second (``{shared_count}`` of ``{args.files}`` files shared): '
+                        f'to transfer ``{transfer_bytes / 1e6:6.1f}`` MB, fetched ``{fetched / 1e6:6.1f}`` MB '
+                        f'in ``{elapsed:5.2f}s``; both on disk, ``{get_disk_bytes(download_root) / 1e6:6.1f}`` MB'
+                    )
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
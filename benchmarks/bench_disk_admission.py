@@ -0,0 +1,115 @@
+"""
+Checks that disk-space reservations stay within capacity when many workers reserve and release at once.
+
+Forks `--processes` processes (standing in for download workers), each repeatedly reserving a random-sized
+  chunk of a pretend `--capacity`-byte disk for a moment, then releasing it; tracks the bytes actually held.
+- reserve_disk_space() checks and reserves in one conditional update, so the held bytes should never exceed capacity.
+- `naive` does what it replaced would: reads the ledger, compares, then writes -- so workers can overcommit.
+
+Uses a throwaway (file-backed) test-database, shared by the processes; `get_free_bytes()` is patched to `--capacity`.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_disk_admission.py
+    python ./benchmarks/bench_disk_admission.py --processes 8 --rounds 200 --capacity 1000000
+"""
+
+import argparse
+import multiprocessing
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+from unittest import mock
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.test.utils import override_settings
+
+from warc_manager_app.lib import download_engine
+from warc_manager_app.models import Collection, DiskReservation
+
+context = multiprocessing.get_context('fork')
+(held, peak) = (context.Value('q', 0), context.Value('q', 0))  # bytes held, across processes (inherited at the fork)
+
+
+def naive_reserve(byte_count: int) -> bool:
+    """
+    Reserves by reading the ledger, then writing it back -- the check-then-act race the conditional update avoids.
+    """
+    root: str = download_engine.get_download_root()
+    (reservation, _) = DiskReservation.objects.get_or_create(root=root)
+    if reservation.reserved_bytes + byte_count > download_engine.get_free_bytes(root):
+        return False
+    time.sleep(0.001)  # the gap between the read and the write
+    DiskReservation.objects.filter(root=root).update(reserved_bytes=reservation.reserved_bytes + byte_count)
+    return True
+
+
+def run_process(process_number: int, rounds: int, capacity: int, naive: bool) -> int:
+    """
+    Reserves and releases `rounds` times; returns the number of reservations granted.
+    """
+    random.seed(process_number)
+    collection = Collection.objects.create(collection_id=f'bench-{process_number}', status=Collection.Status.IN_PROGRESS)
+    reserve = naive_reserve if naive else download_engine.reserve_disk_space
+    granted = 0
+    with mock.patch.object(download_engine, 'get_free_bytes', return_value=capacity):
+        for _ in range(rounds):
+            byte_count: int = random.randint(capacity // 10, capacity // 3)
+            if not reserve(byte_count):
+                continue
+            granted += 1
+            Collection.objects.filter(pk=collection.pk).update(reserved_bytes=byte_count)
+            with held.get_lock():
+                held.value += byte_count
+                peak.value = max(peak.value, held.value)
+            time.sleep(0.002)  # "downloading"
+            with held.get_lock():
+                held.value -= byte_count
+            download_engine.release_disk_space(collection)
+    db.connection.close()
+    return granted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=100, help='reserve-and-release rounds per process')
+    parser.add_argument('--capacity', type=int, default=1_000_000, help='pretend free bytes')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/admission.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        try:
+            with override_settings(WARC_DOWNLOAD_ROOT=f'{temp_dir}/downloads', DOWNLOAD_FREE_SPACE_MARGIN_BYTES=0):
+                for label, naive in (('conditional update', False), ('naive', True)):
+                    Collection.objects.all().delete()
+                    DiskReservation.objects.all().delete()
+                    db.connections.close_all()  # so forked processes open their own connections
+                    (held.value, peak.value) = (0, 0)
+                    start = time.perf_counter()
+                    with context.Pool(args.processes) as pool:
+                        job_args = [(i, args.rounds, args.capacity, naive) for i in range(args.processes)]
+                        granted: int = sum(pool.starmap(run_process, job_args, chunksize=1))
+                    elapsed = time.perf_counter() - start
+                    ledger: int = DiskReservation.objects.get().reserved_bytes
+                    print(
+                        f'{label:>18}; ``{granted}`` reservations granted; peak held ``{peak.value}`` bytes '
+                        f'of ``{args.capacity}`` (over, ``{peak.value > args.capacity}``); '
+                        f'ledger at end, ``{ledger}``; elapsed, ``{elapsed:.2f}s``'
+                    )
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Measures how long a small urgent collection waits while a big collection is downloading.
+
+Queues a `--big-files`-file collection, starts a download worker, then (once the big collection's transfers are
+  under way) queues a `--small-files`-file collection, as another user, at `URGENT` priority.
+Reports when each collection completed. Before the scheduler, the worker finished one collection before
+  claiming the next, so the small collection waited for the whole big one.
+
+WARCs come from a local fake (see `fake_wasapi.py`), served at `--rate` bytes-per-second per connection;
+  uses a throwaway (file-backed) test-database, since the worker runs on its own thread.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_download_fairness.py
+    python ./benchmarks/bench_download_fairness.py --big-files 40 --small-files 2 --file-size 4000000 --rate 4000000
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import download_engine
+from warc_manager_app.models import Collection, CollectionFile
+
+
+def create_collection(collection_id: str, file_count: int, file_size: int, url_root: str, user: User, **kwargs) -> None:
+    """
+    Creates a queued collection of (checksum-less) files served by the fake.
+    """
+    collection = Collection.objects.create(
+        collection_id=collection_id, status=Collection.Status.QUEUED_FOR_START, requested_by=user, **kwargs
+    )
+    CollectionFile.objects.bulk_create(
+        CollectionFile(
+            collection=collection,
+            filename=f'{collection_id}-{i}.warc.gz',
+            size=file_size,
+            locations=[f'{url_root}/download/{collection_id}-{i}.warc.gz'],
+        )
+        for i in range(file_count)
+    )
+
+
+def wait_for_status(collection_id: str, start: float) -> float:
+    """
+    Polls until the collection is complete; returns the seconds since `start`.
+    """
+    while Collection.objects.get(collection_id=collection_id).status != Collection.Status.COMPLETE:
+        time.sleep(0.05)
+    return time.perf_counter() - start
+
+
+def run_worker(worker: download_engine.DownloadWorker) -> None:
+    try:
+        worker.run()
+    finally:
+        db.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--big-files', type=int, default=40)
+    parser.add_argument('--small-files', type=int, default=2)
+    parser.add_argument('--file-size', type=int, default=4_000_000, help='bytes per WARC')
+    parser.add_argument('--rate', type=int, default=4_000_000, help='bytes-per-second per connection')
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/fairness.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        try:
+            server = FakeWasapiServer(page_count=1, file_size=args.file_size, download_bytes_per_second=args.rate)
+            with server, override_settings(WARC_DOWNLOAD_ROOT=f'{temp_dir}/warcs', DOWNLOAD_POLL_SECONDS=0.5):
+                (big_user, small_user) = (User.objects.create_user('big_user'), User.objects.create_user('small_user'))
+                create_collection('big', args.big_files, args.file_size, server.url_root, big_user)
+                worker = download_engine.DownloadWorker(concurrency=args.concurrency)
+                worker_thread = threading.Thread(target=run_worker, args=(worker,))
+                start = time.perf_counter()
+                worker_thread.start()
+                time.sleep(1)  # the big collection's transfers are under way
+                small_queued_at = time.perf_counter() - start
+                create_collection(
+                    'small',
+                    args.small_files,
+                    args.file_size,
+                    server.url_root,
+                    small_user,
+                    priority=Collection.Priority.URGENT,
+                )
+                small_done_at: float = wait_for_status('small', start)
+                big_done_at: float = wait_for_status('big', start)
+                worker.stop_requested = True
+                worker_thread.join()
+            ## one collection at a time, the small one would have started once the big one was done
+            small_transfer_seconds: float = (
+                args.small_files * args.file_size / args.rate / min(args.small_files, args.concurrency)
+            )
+            print(
+                f'big (``{args.big_files}`` files) done at ``{big_done_at:6.2f}s``; '
+                f'small urgent (``{args.small_files}`` files) queued at ``{small_queued_at:5.2f}s``, '
+                f'done at ``{small_done_at:6.2f}s`` (waited ``{small_done_at - small_queued_at:5.2f}s``; '
+                f'one collection at a time, about ``{big_done_at + small_transfer_seconds:6.2f}s``)'
+            )
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
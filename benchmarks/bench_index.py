@@ -0,0 +1,114 @@
+"""
+Compares building a WARC's CDXJ index while it downloads against indexing it afterwards, by reading it back.
+
+Downloads `--files` copies of a generated gzipped WARC (`--records` html-responses, each its own gzip-member)
+  from a local fake (see `fake_wasapi.py`), via DownloadWorker.download_file(), each way:
+- no index: `DOWNLOAD_CDXJ_INDEX` off; the baseline.
+- inline: `DOWNLOAD_CDXJ_INDEX` on -- the indexer inflates the bytes as they're written, from the same buffer.
+- afterwards: `DOWNLOAD_CDXJ_INDEX` off, then the downloaded file read back and indexed, as a separate pass would.
+CPU-time is the downloading thread's own (user and system), so the fake server's threads aren't counted.
+Here the read-back comes from the page-cache; on terabytes, it would come from disk, so its wall-time is a floor.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_index.py
+    python ./benchmarks/bench_index.py --files 4 --records 20000
+"""
+
+import argparse
+import gzip
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import httpx
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import download_engine, warc_index
+from warc_manager_app.models import CollectionFile
+
+WORDS: list[str] = ['archive', 'capture', 'replay', 'collection', 'record', 'crawl', 'seed', 'harvest', 'page', 'link']
+
+
+def make_warc(record_count: int) -> bytes:
+    """
+    Returns a gzipped WARC of `record_count` response-records, of html that compresses about as real pages do.
+    """
+    random.seed(0)
+    members: list[bytes] = []
+    for i in range(record_count):
+        words: str = ' '.join(random.choices(WORDS, k=random.randint(500, 3000)))
+        body: bytes = f'<html><body><p>{words} {random.getrandbits(64):x}</p></body></html>'.encode()
+        http_response: bytes = b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n' + body
+        warc_headers: str = (
+            f'WARC/1.0\r\nWARC-Type: response\r\nWARC-Target-URI: https://example.com/page/{i}\r\n'
+            f'WARC-Date: 2024-01-01T00:00:00Z\r\nContent-Type: application/http; msgtype=response\r\n'
+            f'Content-Length: {len(http_response)}\r\n\r\n'
+        )
+        members.append(gzip.compress(warc_headers.encode() + http_response + b'\r\n\r\n', compresslevel=6))
+    return b''.join(members)
+
+
+def index_afterwards(dest_path: pathlib.Path) -> None:
+    indexer = warc_index.WarcIndexer(dest_path.name)
+    with open(dest_path, 'rb') as f:
+        while chunk := f.read(8 * 1024 * 1024):
+            indexer.update(chunk)
+    assert indexer.write(warc_index.get_file_index_path(dest_path), dest_path.stat().st_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--records', type=int, default=10_000, help='response-records per WARC')
+    args = parser.parse_args()
+    content: bytes = make_warc(args.records)
+    gigabytes: float = args.files * len(content) / 1024**3
+    print(f'WARC of ``{args.records}`` records, ``{len(content) / 1e6:.1f}`` MB gzipped')
+    server = FakeWasapiServer(page_count=1, download_content=content)
+    with tempfile.TemporaryDirectory() as temp_dir, server, httpx.Client() as client:
+        for label, index_inline, index_after in [
+            ('no index', False, False),
+            ('inline', True, False),
+            ('afterwards', False, True),
+        ]:
+            with override_settings(WASAPI_REQUESTS_PER_SECOND=0, DOWNLOAD_CDXJ_INDEX=index_inline):
+                worker = download_engine.DownloadWorker(client=client)
+                (cpu_seconds, wall_seconds) = (0.0, 0.0)
+                for i in range(args.files):
+                    dest_path = pathlib.Path(temp_dir) / f'{label.replace(" ", "-")}-{i}.warc.gz'
+                    file = CollectionFile(
+                        filename=dest_path.name, size=len(content), locations=[f'{server.url_root}/download/x']
+                    )
+                    (cpu_start, wall_start) = (time.thread_time(), time.perf_counter())
+                    assert worker.download_file(file, dest_path.parent) is None
+                    if index_after:
+                        index_afterwards(dest_path)
+                    cpu_seconds += time.thread_time() - cpu_start
+                    wall_seconds += time.perf_counter() - wall_start
+                    index_path: pathlib.Path = warc_index.get_file_index_path(dest_path)
+                    assert (index_inline or index_after) == index_path.exists()
+                    if index_path.exists():
+                        assert len(index_path.read_text().splitlines()) == args.records
+                        index_path.unlink()
+                    dest_path.unlink()
+            print(
+                f'{label:>10}; ``{gigabytes:.2f}`` GB; cpu ``{cpu_seconds / gigabytes:5.2f}s`` per GB; '
+                f'wall ``{wall_seconds / gigabytes:5.2f}s`` per GB'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Measures download throughput as worker processes are added.
+
+For each worker-count in `--workers`, queues a fresh `--files`-file collection, then forks that many
+  download worker processes (each with `--concurrency` transfer-slots), which share the collection's files
+  by leasing them on their rows. Reports the elapsed time, throughput, and how many file-requests the server saw
+  (each file should be fetched once, however many workers).
+The per-connection `--rate` stands in for what one transfer gets; the link isn't saturated here,
+  so throughput should grow about linearly with the workers.
+
+WARCs come from a local fake (see `fake_wasapi.py`); uses a throwaway (file-backed) test-database,
+  shared by the processes.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_multi_worker.py
+    python ./benchmarks/bench_multi_worker.py --workers 1 2 4 --files 48 --file-size 2000000 --rate 4000000
+"""
+
+import argparse
+import multiprocessing
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import download_engine
+from warc_manager_app.models import Collection, CollectionFile
+
+
+def create_collection(collection_id: str, file_count: int, file_size: int, url_root: str) -> None:
+    """
+    Creates a queued collection of (checksum-less) files served by the fake.
+    """
+    collection = Collection.objects.create(collection_id=collection_id, status=Collection.Status.QUEUED_FOR_START)
+    CollectionFile.objects.bulk_create(
+        CollectionFile(
+            collection=collection,
+            filename=f'{collection_id}-{i}.warc.gz',
+            size=file_size,
+            locations=[f'{url_root}/download/{collection_id}-{i}.warc.gz'],
+        )
+        for i in range(file_count)
+    )
+
+
+def run_worker(concurrency: int) -> None:
+    """
+    Runs one worker until there's nothing left it can lease.
+    """
+    try:
+        download_engine.DownloadWorker(concurrency=concurrency).run(once=True)
+    finally:
+        db.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='worker-counts to try')
+    parser.add_argument('--files', type=int, default=48)
+    parser.add_argument('--file-size', type=int, default=2_000_000, help='bytes per WARC')
+    parser.add_argument('--rate', type=int, default=4_000_000, help='bytes-per-second per connection')
+    parser.add_argument('--concurrency', type=int, default=4, help='transfer-slots per worker')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/multi_worker.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        try:
+            server = FakeWasapiServer(page_count=1, file_size=args.file_size, download_bytes_per_second=args.rate)
+            overrides = {
+                'WARC_DOWNLOAD_ROOT': f'{temp_dir}/warcs',
+                'DOWNLOAD_POLL_SECONDS': 0.5,
+                'DOWNLOAD_FREE_SPACE_MARGIN_BYTES': 0,
+                'WASAPI_REQUESTS_PER_SECOND': 0,
+            }
+            with server, override_settings(**overrides):
+                for worker_count in args.workers:
+                    collection_id = f'workers-{worker_count}'
+                    create_collection(collection_id, args.files, args.file_size, server.url_root)
+                    db.connections.close_all()  # so forked processes open their own connections
+                    requests_before: int = server.request_count
+                    start = time.perf_counter()
+                    processes = [
+                        multiprocessing.get_context('fork').Process(target=run_worker, args=(args.concurrency,))
+                        for _ in range(worker_count)
+                    ]
+                    for process in processes:
+                        process.start()
+                    for process in processes:
+                        process.join()
+                    elapsed = time.perf_counter() - start
+                    status: str = Collection.objects.get(collection_id=collection_id).status
+                    megabytes_per_second: float = args.files * args.file_size / elapsed / 1_000_000
+                    request_count: int = server.request_count - requests_before
+                    print(
+                        f'``{worker_count}`` workers; ``{args.files}`` files in ``{elapsed:6.2f}s`` '
+                        f'(``{megabytes_per_second:6.1f}`` MB/s); file-requests, ``{request_count}``; '
+                        f'status, ``{status}``'
+                    )
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
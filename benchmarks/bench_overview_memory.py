@@ -0,0 +1,59 @@
+"""
+Measures peak memory of building a collection overview, with and without keeping the file-records.
+
+Runs against a local fake WASAPI server (see `fake_wasapi.py`); peak is measured with `tracemalloc`.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_overview_memory.py
+    python ./benchmarks/bench_overview_memory.py --pages 1000 10000
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import tracemalloc
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib.request_collection_helper import CollectionDataPrepper
+
+
+def peak_mb(url_root: str, keep_files: bool) -> float:
+    """
+    Builds the overview; returns the peak traced memory in MB.
+    """
+    with override_settings(WASAPI_URL_ROOT=url_root, WASAPI_REQUESTS_PER_SECOND=0):  # unthrottled, to measure the fetching
+        prepper = CollectionDataPrepper('4321', keep_files=keep_files)
+        tracemalloc.start()
+        prepper.get_rest_of_files(prepper.grab_initial_collection_data())
+        prepper.build_overview_dict()
+        (_current, peak) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak / (1024**2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+    for page_count in args.pages:
+        with FakeWasapiServer(page_count=page_count, page_size=args.page_size, latency=0.0) as server:
+            streaming = peak_mb(server.url_root, keep_files=False)
+            keeping = peak_mb(server.url_root, keep_files=True)
+        print(f'pages, ``{page_count:>6}``; streaming peak, ``{streaming:8.1f} MB``; keep_files peak, ``{keeping:8.1f} MB``')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares sequential "next"-link crawling against concurrent page-fetching in `CollectionDataPrepper`.
+
+Runs against a local fake WASAPI server (see `fake_wasapi.py`) for 1k and 10k pages.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_page_fetching.py
+    python ./benchmarks/bench_page_fetching.py --pages 1000 10000 --latency 0.005
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib.request_collection_helper import CollectionDataPrepper
+
+
+def crawl(url_root: str, concurrent: bool) -> tuple[float, int]:
+    """
+    Crawls the fake collection; returns (elapsed-seconds, file-count).
+    """
+    with override_settings(WASAPI_URL_ROOT=url_root, WASAPI_REQUESTS_PER_SECOND=0):  # unthrottled, to measure the fetching
+        start = time.perf_counter()
+        prepper = CollectionDataPrepper('4321')
+        initial_data: dict = prepper.grab_initial_collection_data()
+        if concurrent:
+            prepper.get_rest_of_files(initial_data)
+        else:
+            prepper.fold_page(initial_data)
+            for page_data in prepper.follow_next_links(initial_data['next']):
+                prepper.fold_page(page_data)
+        elapsed = time.perf_counter() - start
+        return elapsed, prepper.build_overview_dict()['item_count']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated per-request server latency, in seconds')
+    args = parser.parse_args()
+    print(f'latency per page, ``{args.latency}``s')
+    for page_count in args.pages:
+        with FakeWasapiServer(page_count=page_count, page_size=args.page_size, latency=args.latency) as server:
+            seq_elapsed, seq_count = crawl(server.url_root, concurrent=False)
+            con_elapsed, con_count = crawl(server.url_root, concurrent=True)
+        assert seq_count == con_count == page_count * args.page_size, (seq_count, con_count)
+        print(
+            f'pages, ``{page_count:>6}``; sequential, ``{seq_elapsed:7.2f}s``; '
+            f'concurrent, ``{con_elapsed:7.2f}s``; speedup, ``{seq_elapsed / con_elapsed:5.1f}x``'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Compares reading the download-progress of many running collections from their counters against summing their file-rows.
+
+Creates `--collections` `IN_PROGRESS` collections of `--files` files each, about a third downloaded, then times:
+- counters: request_collection_helper.get_download_progress() -- one query of the collections' counter-columns.
+- file-rows: the same numbers summed over the `CollectionFile` rows, grouped by collection, as a page-load would
+    without the counters.
+Then times DownloadProgress.flush(), the workers' side: one update (and rate-sample) per running collection.
+Uses a throwaway (file-backed) test-database.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_progress.py
+    python ./benchmarks/bench_progress.py --collections 100 --files 5000
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.db.models import Count, Q, Sum
+from django.test.utils import CaptureQueriesContext
+
+from warc_manager_app.lib import download_engine, request_collection_helper
+from warc_manager_app.models import Collection, CollectionFile
+
+FILE_SIZE = 1_000_000_000
+
+
+def create_collections(collection_count: int, file_count: int) -> list[Collection]:
+    """
+    Creates the running collections, each with a third of its files downloaded, and its counters set to match.
+    """
+    done_count: int = file_count // 3
+    collections: list[Collection] = Collection.objects.bulk_create(
+        Collection(
+            collection_id=str(i),
+            status=Collection.Status.IN_PROGRESS,
+            item_count=file_count,
+            size_in_bytes=file_count * FILE_SIZE,
+            files_downloaded=done_count,
+            bytes_downloaded=done_count * FILE_SIZE,
+            progress_mark_time=time.time(),
+        )
+        for i in range(collection_count)
+    )
+    for collection in collections:
+        CollectionFile.objects.bulk_create(
+            (
+                CollectionFile(
+                    collection=collection,
+                    filename=f'{collection.collection_id}-{j}.warc.gz',
+                    size=FILE_SIZE,
+                    download_state=CollectionFile.DownloadState.COMPLETE if j < done_count else 'PENDING',
+                    bytes_transferred=FILE_SIZE if j < done_count else 0,
+                )
+                for j in range(file_count)
+            ),
+            batch_size=2000,
+        )
+    return collections
+
+
+def sum_file_rows() -> list[dict]:
+    """
+    The progress, summed over the file-rows, for comparison.
+    """
+    return list(
+        CollectionFile.objects.filter(collection__status=Collection.Status.IN_PROGRESS)
+        .values('collection_id')
+        .annotate(
+            bytes_downloaded=Sum('bytes_transferred'),
+            files_downloaded=Count('pk', filter=Q(download_state=CollectionFile.DownloadState.COMPLETE)),
+        )
+    )
+
+
+def time_it(function, repeats: int) -> tuple[float, int]:
+    """
+    Returns the mean milliseconds per call, and the queries per call.
+    """
+    with CaptureQueriesContext(db.connection) as queries:
+        start: float = time.perf_counter()
+        for _ in range(repeats):
+            function()
+        elapsed: float = time.perf_counter() - start
+    return (elapsed / repeats * 1000, len(queries) // repeats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--collections', type=int, default=100)
+    parser.add_argument('--files', type=int, default=2000, help='files per collection')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/progress.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        try:
+            collections: list[Collection] = create_collections(args.collections, args.files)
+            print(f'``{args.collections}`` running collections of ``{args.files}`` files each')
+            assert len(request_collection_helper.get_download_progress()) == args.collections
+            for label, function in [
+                ('counters', request_collection_helper.get_download_progress),
+                ('file-rows', sum_file_rows),
+            ]:
+                (milliseconds, query_count) = time_it(function, args.repeats)
+                print(f'{label:>9}; ``{milliseconds:8.2f}`` ms per page-load, ``{query_count}`` queries')
+            progress = download_engine.DownloadProgress()
+
+            def flush():
+                for collection in collections:
+                    progress.add(collection.pk, 8 * 1024 * 1024)
+                progress.flush()
+
+            (milliseconds, query_count) = time_it(flush, args.repeats)
+            print(
+                f'    flush; ``{milliseconds:8.2f}`` ms for ``{args.collections}`` collections, ``{query_count}`` queries '
+                f'(made every `DOWNLOAD_PROGRESS_SECONDS`)'
+            )
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
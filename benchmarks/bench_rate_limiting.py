@@ -0,0 +1,91 @@
+"""
+Runs concurrent collection-crawls against a WASAPI stand-in that throttles (429s) past `--server-rate` requests per second.
+
+Compares:
+- no limiting, no retries (the old behavior): the first 429 fails the crawl, losing its pages.
+- retries only: crawls complete, but keep hitting the server's limit.
+- adaptive limiting, with retries: the shared token-bucket backs off to the server's rate.
+
+Reports, per mode, the crawls completed, the elapsed time, and the 429s received.
+WASAPI is a local fake (see `fake_wasapi.py`).
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_rate_limiting.py
+    python ./benchmarks/bench_rate_limiting.py --crawls 4 --pages 100 --server-rate 100 --client-rate 200
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import wasapi_client
+from warc_manager_app.lib.request_collection_helper import CollectionDataPrepper
+
+
+def crawl(collection_id: str) -> bool:
+    """
+    Crawls one collection's listing; returns whether every page came back.
+    """
+    prepper = CollectionDataPrepper(collection_id)
+    try:
+        prepper.get_rest_of_files(prepper.grab_initial_collection_data())
+    except RuntimeError:
+        return False
+    return True
+
+
+def run_mode(args: argparse.Namespace, mode_settings: dict) -> tuple[int, float, int]:
+    """
+    Runs the concurrent crawls under the given settings; returns (crawls-completed, elapsed-seconds, 429-count).
+    """
+    wasapi_client._rate_limiter = None  # a fresh limiter, at the full rate
+    with FakeWasapiServer(page_count=args.pages, page_size=10, latency=args.latency, rate_limit=args.server_rate) as server:
+        with override_settings(WASAPI_URL_ROOT=server.url_root, **mode_settings):
+            time.sleep(1)  # the server's bucket starts full
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.crawls) as executor:
+                completed: list[bool] = list(executor.map(crawl, [f'{1000 + i}' for i in range(args.crawls)]))
+            elapsed = time.perf_counter() - start
+        return (sum(completed), elapsed, server.throttled_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--crawls', type=int, default=4, help='concurrent collection-crawls')
+    parser.add_argument('--pages', type=int, default=100, help='WASAPI pages per collection')
+    parser.add_argument('--latency', type=float, default=0.005, help='simulated per-request WASAPI latency, in seconds')
+    parser.add_argument('--server-rate', type=float, default=100, help='requests per second the fake allows')
+    parser.add_argument(
+        '--client-rate', type=float, default=200, help='`WASAPI_REQUESTS_PER_SECOND`, set above the server-rate'
+    )
+    args = parser.parse_args()
+    modes = {
+        'no limiting, no retries': {'WASAPI_REQUESTS_PER_SECOND': 0, 'WASAPI_MAX_ATTEMPTS': 1},
+        'retries only': {'WASAPI_REQUESTS_PER_SECOND': 0},
+        'adaptive limiting': {'WASAPI_REQUESTS_PER_SECOND': args.client_rate},
+    }
+    for label, mode_settings in modes.items():
+        (completed, elapsed, throttled_count) = run_mode(args, mode_settings)
+        print(
+            f'{label:>23}; crawls completed, ``{completed}/{args.crawls}``; '
+            f'elapsed, ``{elapsed:6.2f}s``; 429s, ``{throttled_count:5d}``'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures how long pulling one record out of a big downloaded WARC takes, by offset, with the memory-mapped reader.
+
+Writes a `--file-size`-byte gzipped WARC (a generated block of html-responses, repeated), with each record's offset
+  taken from the block's CDXJ index; then reads `--samples` records at random offsets, each with a fresh
+  WarcReader (open, map, inflate the one gzip-member, close), as the `warc_record/` view does.
+Reports the latency percentiles; and, for comparison, one naive read -- loading the whole file, then inflating
+  the record from it.
+The file has just been written, so it's mostly in the page-cache; cold reads would add a disk-seek or two per record.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_record_reader.py
+    python ./benchmarks/bench_record_reader.py --file-size 10737418240 --samples 2000
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from bench_index import make_warc
+
+from warc_manager_app.lib import warc_index, warc_reader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file-size', type=int, default=2 * 1024**3, help='bytes, roughly')
+    parser.add_argument('--samples', type=int, default=1000)
+    args = parser.parse_args()
+    block: bytes = make_warc(2000)
+    indexer = warc_index.WarcIndexer('block')
+    indexer.update(block)
+    block_offsets: list[int] = [int(json.loads(line.split(' ', 2)[2])['offset']) for line in indexer.lines]
+    repeats: int = max(1, args.file_size // len(block))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        warc_path = pathlib.Path(temp_dir) / 'big.warc.gz'
+        with open(warc_path, 'wb') as f:
+            f.writelines(block for _ in range(repeats))
+        print(f'WARC of ``{repeats * len(block_offsets)}`` records, ``{repeats * len(block) / 1024**3:.2f}`` GB')
+        random.seed(0)
+        latencies: list[float] = []
+        for _ in range(args.samples):
+            offset: int = random.randrange(repeats) * len(block) + random.choice(block_offsets)
+            start = time.perf_counter()
+            with warc_reader.WarcReader(warc_path) as reader:
+                record: dict = reader.read_record(offset)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert record['http_status_line'] == 'HTTP/1.1 200 OK'
+        percentiles: list[float] = statistics.quantiles(latencies, n=100)
+        print(
+            f'mmap reader; ``{args.samples}`` records; p50 ``{percentiles[49]:.3f}ms``, p99 ``{percentiles[98]:.3f}ms``, '
+            f'max ``{max(latencies):.3f}ms``'
+        )
+        start = time.perf_counter()
+        content: bytes = warc_path.read_bytes()
+        zlib.decompressobj(wbits=31).decompress(content[offset:])
+        print(f'naive (whole file loaded); one record, ``{(time.perf_counter() - start) * 1000:.1f}ms``')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Measures the validation stage's throughput by process-count, and largest-first scheduling against smallest-first.
+
+Writes a collection of `--files` generated gzipped WARCs of skewed sizes -- most `--file-mb`, one `--big-factor`
+  times that, as real collections have a few big WARCs among many small ones -- then:
+- scaling: validates it with ValidationWorker, end to end (claim, pool, per-file results), at each `--processes`.
+- ordering: submits the files to a pool of the most processes, largest first (as the worker does), then smallest
+    first; with smallest-first, the big file starts last, and runs on alone while the other processes sit idle.
+Reads come from the page-cache after the first pass, so this measures inflate-and-check, not the disk.
+Throughput can only scale up to the cores available; `os.cpu_count()` is printed alongside.
+Uses a throwaway (file-backed) test-database.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_validation.py
+    python ./benchmarks/bench_validation.py --files 32 --file-mb 20 --processes 1 2 4 8
+"""
+
+import argparse
+import gzip
+import multiprocessing
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django import db
+from django.test.utils import override_settings
+
+from warc_manager_app.lib import validation_engine, warc_validator
+from warc_manager_app.models import Collection, CollectionFile
+
+WORDS: list[str] = ['archive', 'capture', 'replay', 'collection', 'record', 'crawl', 'seed', 'harvest', 'page', 'link']
+
+
+def make_members(count: int) -> list[bytes]:
+    """
+    Returns `count` gzipped response-records, of html that compresses about as real pages do.
+    """
+    random.seed(0)
+    members: list[bytes] = []
+    for i in range(count):
+        words: str = ' '.join(random.choices(WORDS, k=random.randint(500, 3000)))
+        body: bytes = f'<html><body><p>{words} {random.getrandbits(64):x}</p></body></html>'.encode()
+        http_response: bytes = b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n' + body
+        warc_headers: str = (
+            f'WARC/1.0\r\nWARC-Type: response\r\nWARC-Record-ID: <urn:bench:{i}>\r\n'
+            f'WARC-Target-URI: https://example.com/page/{i}\r\nWARC-Date: 2024-01-01T00:00:00Z\r\n'
+            f'Content-Type: application/http; msgtype=response\r\nContent-Length: {len(http_response)}\r\n\r\n'
+        )
+        members.append(gzip.compress(warc_headers.encode() + http_response + b'\r\n\r\n', compresslevel=6))
+    return members
+
+
+def write_warc(path: pathlib.Path, members: list[bytes], size: int) -> int:
+    """
+    Writes a WARC of the given members, repeated until it's at least `size` bytes; returns its size.
+    """
+    written: int = 0
+    with open(path, 'wb') as f:
+        while written < size:
+            for member in members:
+                written += f.write(member)
+                if written >= size:
+                    break
+    return written
+
+
+def validate_in_order(paths_and_sizes: list[tuple[str, int]], processes: int) -> float:
+    """
+    Validates the files on a fresh pool, submitted in the given order; returns the seconds until the last is done.
+    """
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        wait([pool.submit(os.getpid) for _ in range(processes)])  # spawned before the clock starts
+        start: float = time.perf_counter()
+        futures = [pool.submit(warc_validator.validate_warc, path, size) for (path, size) in paths_and_sizes]
+        assert all(not future.result()['error'] for future in futures)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=16)
+    parser.add_argument('--file-mb', type=float, default=10, help='size of most of the WARCs')
+    parser.add_argument('--big-factor', type=int, default=8, help='how many times bigger the one big WARC is')
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+    members: list[bytes] = make_members(200)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db.connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/validation.sqlite'
+        old_db_name: str = db.connection.creation.create_test_db(verbosity=0)
+        try:
+            with override_settings(WARC_DOWNLOAD_ROOT=temp_dir):
+                download_dir = pathlib.Path(temp_dir) / 'bench'
+                download_dir.mkdir()
+                collection = Collection.objects.create(
+                    collection_id='bench', item_count=args.files, status=Collection.Status.COMPLETE
+                )
+                sizes: dict[str, int] = {}
+                for i in range(args.files):
+                    target: int = int(args.file_mb * 1e6 * (args.big_factor if i == 0 else 1))
+                    sizes[f'bench-{i}.warc.gz'] = write_warc(download_dir / f'bench-{i}.warc.gz', members, target)
+                CollectionFile.objects.bulk_create(
+                    CollectionFile(collection=collection, filename=filename, size=size) for (filename, size) in sizes.items()
+                )
+                total_mb: float = sum(sizes.values()) / 1e6
+                print(f'``{args.files}`` WARCs, ``{total_mb:.0f}`` MB; cpu_count ``{os.cpu_count()}``')
+                validation_engine.ValidationWorker(processes=1).run(once=True)  # warms the page-cache
+                for processes in args.processes:
+                    Collection.objects.filter(pk=collection.pk).update(validation_state=Collection.ValidationState.PENDING)
+                    collection.files.update(validation_state=CollectionFile.ValidationState.PENDING)
+                    start: float = time.perf_counter()
+                    validation_engine.ValidationWorker(processes=processes).run(once=True)
+                    elapsed: float = time.perf_counter() - start
+                    assert Collection.objects.get(pk=collection.pk).validation_state == Collection.ValidationState.VALID
+                    print(
+                        f'processes ``{processes:>2}``; ``{elapsed:6.2f}s`` (with spawning), '
+                        f'``{total_mb / elapsed:7.1f}`` MB/s'
+                    )
+                largest_first: list[tuple[str, int]] = sorted(
+                    ((str(download_dir / filename), size) for (filename, size) in sizes.items()), key=lambda x: -x[1]
+                )
+                processes = max(args.processes)
+                for label, order in [('largest-first', largest_first), ('smallest-first', largest_first[::-1])]:
+                    print(f'{label:>14}, processes ``{processes}``; ``{validate_in_order(order, processes):6.2f}s``')
+        finally:
+            db.connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the CPU-time per GB of the download engine's write-path against a naive streaming loop.
+
+Downloads `--files` WARCs of `--file-size` bytes each from a local fake (see `fake_wasapi.py`), each way:
+- naive: `for chunk in resp.iter_bytes(): f.write(chunk)`, through a buffered file; and again with one fsync at the end,
+    since the engine's wall-time includes its fsyncs.
+- engine: DownloadWorker.download_file() -- raw chunks coalesced into the reused buffer, written unbuffered
+    into a `posix_fallocate`d `.part` file, fsync'd every `DOWNLOAD_FSYNC_BYTES`, then renamed.
+CPU-time is the downloading thread's own (user and system), so the fake server's threads aren't counted.
+Neither path hashes; the WARCs have no checksums here.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/bench_write_path.py
+    python ./benchmarks/bench_write_path.py --files 4 --file-size 268435456
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import httpx
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from warc_manager_app.lib import download_engine
+from warc_manager_app.models import CollectionFile
+
+
+def download_naively(client: httpx.Client, url: str, dest_path: pathlib.Path, fsync: bool = False) -> None:
+    with client.stream('GET', url) as resp:
+        resp.raise_for_status()
+        with open(dest_path, 'wb') as f:
+            f.writelines(resp.iter_bytes())
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--file-size', type=int, default=256 * 1024 * 1024, help='bytes per WARC')
+    args = parser.parse_args()
+    gigabytes: float = args.files * args.file_size / 1024**3
+    server = FakeWasapiServer(page_count=1, file_size=args.file_size)
+    unthrottled = override_settings(WASAPI_REQUESTS_PER_SECOND=0)
+    with tempfile.TemporaryDirectory() as temp_dir, server, unthrottled, httpx.Client() as client:
+        worker = download_engine.DownloadWorker(client=client)
+        runs = {
+            'naive': lambda url, path: download_naively(client, url, path),
+            'naive, fsync': lambda url, path: download_naively(client, url, path, fsync=True),
+            'engine': lambda url, path: worker.download_file(
+                CollectionFile(filename=path.name, size=args.file_size, locations=[url]), path.parent
+            ),
+        }
+        for label, run in runs.items():
+            (cpu_seconds, wall_seconds) = (0.0, 0.0)
+            for i in range(args.files):
+                dest_path = pathlib.Path(temp_dir) / f'{label}-{i}.warc.gz'
+                (cpu_start, wall_start) = (time.thread_time(), time.perf_counter())
+                assert run(f'{server.url_root}/download/{dest_path.name}', dest_path) is None
+                cpu_seconds += time.thread_time() - cpu_start
+                wall_seconds += time.perf_counter() - wall_start
+                assert dest_path.stat().st_size == args.file_size
+                dest_path.unlink()
+            print(
+                f'{label:>12}; ``{gigabytes:.2f}`` GB; cpu ``{cpu_seconds / gigabytes:5.2f}s`` per GB; '
+                f'wall ``{wall_seconds / gigabytes:5.2f}s`` per GB'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+A local stand-in for the WASAPI webdata endpoint, for benchmarks.
+
+Serves `/webdata?collection=<id>&page=<n>` with `page_size` small file-records per page,
+  sleeping `latency` seconds per request to mimic the round-trip to the real API.
+Serves https when given a `certfile`; counts requests and (keep-alive) connections.
+Given a `rate_limit`, answers requests beyond that many per second with a 429 and a `Retry-After`, counting them.
+Serves `/webdata/download/<filename>` as `file_size` (or a `?size=` query's) zero-bytes, or as `download_content`
+  if given, at `download_bytes_per_second` per connection (if given), counting them in `download_bytes`.
+
+Usage (from another script):
+    with FakeWasapiServer(page_count=1000, page_size=10, latency=0.005) as server:
+        ... point `WASAPI_URL_ROOT` at `server.url_root` ...
+"""
+
+import json
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+
+
+class FakeWasapiServer:
+    def __init__(
+        self,
+        page_count: int,
+        page_size: int = 10,
+        latency: float = 0.005,
+        file_size: int = 1_000_000_000,
+        certfile: str | None = None,
+        rate_limit: float | None = None,
+        download_bytes_per_second: int | None = None,
+        download_content: bytes | None = None,
+    ):
+        self.page_count = page_count
+        self.page_size = page_size
+        self.latency = latency
+        self.file_size = file_size
+        self.request_count = 0
+        self.connection_count = 0
+        self.rate_limit = rate_limit
+        self.download_bytes_per_second = download_bytes_per_second
+        self.download_content = download_content
+        self.throttled_count = 0
+        self.download_bytes = 0
+        self.allowance = rate_limit or 0.0  # a token-bucket, one second deep
+        self.allowance_updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.make_handler())
+        self.httpd.daemon_threads = True
+        scheme = 'http'
+        if certfile:  # serve https, with a cert-and-key pem-file
+            ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ssl_context.load_cert_chain(certfile)
+            self.httpd.socket = ssl_context.wrap_socket(self.httpd.socket, server_side=True)
+            scheme = 'https'
+        self.url_root = f'{scheme}://127.0.0.1:{self.httpd.server_port}/webdata'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def admit(self) -> bool:
+        """
+        Returns False if the request is over the rate-limit.
+        """
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate_limit, self.allowance + (now - self.allowance_updated) * self.rate_limit)
+            self.allowance_updated = now
+            if self.allowance < 1:
+                self.throttled_count += 1
+                return False
+            self.allowance -= 1
+            return True
+
+    def build_page(self, collection_id: str, page_number: int) -> dict:
+        file_count = self.page_count * self.page_size
+        start = (page_number - 1) * self.page_size
+        files = [
+            {
+                'filename': f'ARCHIVEIT-{collection_id}-{i:08d}.warc.gz',
+                'size': self.file_size,
+                'checksums': {'md5': f'{i:032x}'},
+                'crawl-time': '2024-09-01T00:00:00Z',
+                'locations': [f'{self.url_root}/download/ARCHIVEIT-{collection_id}-{i:08d}.warc.gz'],
+            }
+            for i in range(start, min(start + self.page_size, file_count))
+        ]
+        next_url = None
+        if page_number < self.page_count:
+            next_url = f'{self.url_root}?collection={collection_id}&page={page_number + 1}'
+        return {'count': file_count, 'next': next_url, 'previous': None, 'files': files}
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+            def setup(self):
+                server.connection_count += 1
+                super().setup()
+
+            def do_GET(self):
+                server.request_count += 1
+                if '/download/' in self.path:
+                    return self.send_download()
+                if not server.admit():
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                time.sleep(server.latency)
+                query = dict(parse.parse_qsl(parse.urlsplit(self.path).query))
+                page = server.build_page(query.get('collection', '0'), int(query.get('page', '1')))
+                body = json.dumps(page).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                ## headers and body go out in one write; split writes hit ~40ms delayed-ack stalls on keep-alive
+                self._headers_buffer.extend([b'\r\n', body])
+                self.flush_headers()
+
+            def send_download(self):
+                query = dict(parse.parse_qsl(parse.urlsplit(self.path).query))
+                content: bytes | None = server.download_content
+                file_size = len(content) if content is not None else int(query.get('size', server.file_size))
+                with server.lock:
+                    server.download_bytes += file_size
+                self.send_response(200)
+                self.send_header('Content-Length', str(file_size))
+                self.end_headers()
+                chunk = bytes(64 * 1024)
+                for start in range(0, file_size, len(chunk)):
+                    piece = content[start : start + len(chunk)] if content is not None else chunk[: file_size - start]
+                    self.wfile.write(piece)
+                    if server.download_bytes_per_second:
+                        time.sleep(len(piece) / server.download_bytes_per_second)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,173 @@
+"""
+Load-tests the collection-check: do concurrent checks hold up the `info` and `version` pages?
+
+Fires `--checks` concurrent collection-checks, with WASAPI pointed at a slow local fake (see `fake_wasapi.py`),
+  each polling its crawl-progress (as the page does) until the confirmation form comes back;
+  meanwhile requests `info/` and `version/` every 100ms, reporting their latency.
+- wsgi, the checks hit `hlpr_check_coll_id` on `config.wsgi`, served by `--wsgi-workers` worker-threads
+    (like gunicorn sync-workers); each check holds a worker while it fetches its first page.
+- asgi, the checks hit `hlpr_check_coll_id_async` on `config.asgi` (served in-process through `httpx.ASGITransport`);
+    the first page-fetch waits on the event-loop.
+
+Uses a throwaway test-database.
+
+Usage, from the project root (needs the usual `.env`):
+    python ./benchmarks/load_async_checks.py
+    python ./benchmarks/load_async_checks.py --checks 8 --wsgi-workers 4 --pages 40 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import pathlib
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_DIR_PATH))
+sys.path.append(str(PROJECT_DIR_PATH / 'benchmarks'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+import httpx
+from django.conf import settings as project_settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from fake_wasapi import FakeWasapiServer
+
+from config.asgi import application as asgi_application
+from config.wsgi import application as wsgi_application
+
+
+class PooledWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """
+    A WSGI server that handles requests on a fixed pool of worker-threads, like a gunicorn sync-worker pool.
+    """
+
+    def __init__(self, worker_count: int):
+        super().__init__(('127.0.0.1', 0), QuietHandler)
+        self.set_app(wsgi_application)
+        self.pool = ThreadPoolExecutor(max_workers=worker_count)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        self.pool.shutdown(cancel_futures=True)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+async def run_checks(client: httpx.AsyncClient, check_url: str, check_count: int, run_label: str) -> dict:
+    """
+    Runs the concurrent checks, each polling its crawl-progress until the confirmation form comes back,
+      while polling `info/` and `version/`; returns the timings.
+    """
+    await client.get('/request_collection/')  # sets the csrf cookie
+    headers = {'X-CSRFToken': client.cookies['csrftoken']}
+    first_feedback: list[float] = []
+
+    async def check(i: int) -> None:
+        collection_id = f'{run_label}-{i}'
+        start = time.perf_counter()
+        resp = await client.post(check_url, data={'collection_id': collection_id}, headers=headers)
+        first_feedback.append(time.perf_counter() - start)
+        while 'really_start_download' not in resp.text:  # as the progress-fragment does
+            assert resp.status_code == 200 and 'Listing files' in resp.text, resp.status_code
+            await asyncio.sleep(project_settings.CRAWL_PROGRESS_POLL_SECONDS)
+            resp = await client.get('/hlpr_crawl_progress/', params={'collection_id': collection_id})
+
+    page_latencies: list[float] = []
+    checks_done = asyncio.Event()
+
+    async def poll_pages() -> None:
+        while not checks_done.is_set():
+            for page_url in ('/info/', '/version/'):
+                start = time.perf_counter()
+                resp = await client.get(page_url)
+                page_latencies.append(time.perf_counter() - start)
+                assert resp.status_code == 200, resp.status_code
+            await asyncio.sleep(0.1)
+
+    poller = asyncio.create_task(poll_pages())
+    start = time.perf_counter()
+    await asyncio.gather(*(check(i) for i in range(check_count)))
+    checks_elapsed = time.perf_counter() - start
+    checks_done.set()
+    await poller
+    return {'first_feedback': first_feedback, 'checks_elapsed': checks_elapsed, 'page_latencies': page_latencies}
+
+
+async def run_wsgi(session_cookies: dict, check_count: int, worker_count: int) -> dict:
+    with PooledWSGIServer(worker_count) as server:
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)  # a connection per request
+        async with httpx.AsyncClient(base_url=base_url, cookies=session_cookies, limits=limits, timeout=None) as client:
+            return await run_checks(client, '/hlpr_check_coll_id/', check_count, 'wsgi')
+
+
+async def run_asgi(session_cookies: dict, check_count: int) -> dict:
+    transport = httpx.ASGITransport(app=asgi_application)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://localhost', cookies=session_cookies, timeout=None
+    ) as client:
+        return await run_checks(client, '/hlpr_check_coll_id_async/', check_count, 'asgi')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=8, help='concurrent collection-checks')
+    parser.add_argument('--wsgi-workers', type=int, default=4, help='worker-threads for the wsgi run')
+    parser.add_argument('--pages', type=int, default=40, help='WASAPI pages per collection')
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated per-request WASAPI latency, in seconds')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ## a file-db, since the servers' threads each open their own connection
+        connection.settings_dict['TEST']['NAME'] = f'{temp_dir}/load_test.sqlite'
+        old_db_name: str = connection.creation.create_test_db(verbosity=0)
+        try:
+            client = Client()
+            client.force_login(User.objects.create_user(username='load_tester'))
+            session_cookies = {key: morsel.value for key, morsel in client.cookies.items()}
+            wasapi_server = FakeWasapiServer(page_count=args.pages, page_size=10, latency=args.latency)
+            with wasapi_server, override_settings(WASAPI_URL_ROOT=wasapi_server.url_root, ALLOWED_HOSTS=['*']):
+                runs = {
+                    'wsgi': lambda: run_wsgi(session_cookies, args.checks, args.wsgi_workers),
+                    'asgi': lambda: run_asgi(session_cookies, args.checks),
+                }
+                for label, run in runs.items():
+                    timings: dict = asyncio.run(run())
+                    print(
+                        f'{label}; ``{args.checks}`` checks; first feedback, median '
+                        f'``{statistics.median(timings["first_feedback"]) * 1000:7.1f}ms``; '
+                        f'all forms ready in ``{timings["checks_elapsed"]:6.2f}s``; info/version latency, median '
+                        f'``{statistics.median(timings["page_latencies"]) * 1000:7.1f}ms``, '
+                        f'max ``{max(timings["page_latencies"]) * 1000:7.1f}ms``'
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""
+ASGI config.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve with an ASGI server (eg, `uvicorn config.asgi:application`) so the async htmx-helper views
+  run on the event-loop instead of tying up a worker thread.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+import pathlib
+import sys
+from django.core.asgi import get_asgi_application
+
+
+PROJECT_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent
+# print( f'PROJECT_DIR_PATH, ``{PROJECT_DIR_PATH}``' )
+
+sys.path.append(str(PROJECT_DIR_PATH))
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'config.settings'  # so django can access its settings
+
+application = get_asgi_application()
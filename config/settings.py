@@ -208,3 +208,46 @@ SHIB_IDP_LOGOUT_URL: str = os.environ['SHIB_IDP_LOGOUT_URL']
 WASAPI_URL_ROOT = os.environ['WASAPI_URL_ROOT']
 WASAPI_USR = os.environ['WASAPI_USR']
 WASAPI_KEY = os.environ['WASAPI_KEY']
+WASAPI_PAGE_FETCH_WORKERS = int(os.environ.get('WASAPI_PAGE_FETCH_WORKERS', '8'))  # concurrent page-fetches per crawl
+WASAPI_MAX_CONNECTIONS = int(os.environ.get('WASAPI_MAX_CONNECTIONS', '20'))  # shared pool, per process
+WASAPI_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get('WASAPI_KEEPALIVE_EXPIRY_SECONDS', '60'))
+WASAPI_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('WASAPI_CONNECT_TIMEOUT_SECONDS', '10'))
+WASAPI_READ_TIMEOUT_SECONDS = float(os.environ.get('WASAPI_READ_TIMEOUT_SECONDS', '60'))
+WASAPI_HTTP2 = json.loads(os.environ.get('WASAPI_HTTP2_JSON', 'true'))  # used only if the `h2` package is installed
+WASAPI_REQUESTS_PER_SECOND = float(os.environ.get('WASAPI_REQUESTS_PER_SECOND', '20'))  # per process; 0 => unlimited
+WASAPI_BURST = int(os.environ.get('WASAPI_BURST', '10'))
+WASAPI_MIN_REQUESTS_PER_SECOND = float(os.environ.get('WASAPI_MIN_REQUESTS_PER_SECOND', '0.5'))  # floor when throttled
+WASAPI_MAX_ATTEMPTS = int(os.environ.get('WASAPI_MAX_ATTEMPTS', '5'))
+WASAPI_RETRY_BASE_DELAY_SECONDS = float(os.environ.get('WASAPI_RETRY_BASE_DELAY_SECONDS', '0.5'))
+WASAPI_RETRY_MAX_DELAY_SECONDS = float(os.environ.get('WASAPI_RETRY_MAX_DELAY_SECONDS', '30'))
+COLLECTION_OVERVIEW_CACHE_TTL_SECONDS = int(os.environ.get('COLLECTION_OVERVIEW_CACHE_TTL_SECONDS', '3600'))
+WASAPI_INCREMENTAL_OVERLAP_SECONDS = int(os.environ.get('WASAPI_INCREMENTAL_OVERLAP_SECONDS', '86400'))
+WASAPI_CRAWL_STALE_SECONDS = int(os.environ.get('WASAPI_CRAWL_STALE_SECONDS', '300'))  # no page in this long => crawl died
+CRAWL_PROGRESS_POLL_SECONDS = float(os.environ.get('CRAWL_PROGRESS_POLL_SECONDS', '1'))
+COLLECTION_FILE_BATCH_SIZE = int(os.environ.get('COLLECTION_FILE_BATCH_SIZE', '500'))  # rows per bulk-insert
+RECENT_COLLECTIONS_PAGE_SIZE = int(os.environ.get('RECENT_COLLECTIONS_PAGE_SIZE', '20'))
+BATCH_CHECK_MAX_COLLECTIONS = int(os.environ.get('BATCH_CHECK_MAX_COLLECTIONS', '50'))
+BATCH_CHECK_WORKERS = int(os.environ.get('BATCH_CHECK_WORKERS', '8'))  # concurrent first-page fetches per batch-check
+WASAPI_CRAWL_WORKERS = int(os.environ.get('WASAPI_CRAWL_WORKERS', '8'))  # concurrent listing-crawls per process
+ASYNC_HTMX_HELPERS = json.loads(os.environ.get('ASYNC_HTMX_HELPERS_JSON', 'false'))  # true when served by config.asgi
+
+WARC_DOWNLOAD_ROOT = os.environ.get('WARC_DOWNLOAD_ROOT', '../warc_downloads')  # one sub-directory per collection
+DOWNLOAD_CONCURRENCY = int(os.environ.get('DOWNLOAD_CONCURRENCY', '4'))  # concurrent transfers, across all workers
+DOWNLOAD_MAX_BYTES_PER_SECOND = int(os.environ.get('DOWNLOAD_MAX_BYTES_PER_SECOND', '0'))  # all workers'; 0 => no cap
+DOWNLOAD_FREE_SPACE_MARGIN_BYTES = int(os.environ.get('DOWNLOAD_FREE_SPACE_MARGIN_BYTES', str(1024**3)))  # kept free
+DOWNLOAD_DEDUP = json.loads(os.environ.get('DOWNLOAD_DEDUP_JSON', 'true'))  # link already-downloaded copies
+DOWNLOAD_CDXJ_INDEX = json.loads(os.environ.get('DOWNLOAD_CDXJ_INDEX_JSON', 'true'))  # index WARCs as they download
+COLLECTION_INDEX_MAX_LINES = int(os.environ.get('COLLECTION_INDEX_MAX_LINES', '1000'))  # per index-lookup
+WARC_RECORD_PREVIEW_BYTES = int(os.environ.get('WARC_RECORD_PREVIEW_BYTES', '2048'))  # of payload, on `warc_record/`
+DOWNLOAD_BUFFER_SIZE = int(os.environ.get('DOWNLOAD_BUFFER_SIZE', str(8 * 1024 * 1024)))  # reusable buffer, per transfer
+DOWNLOAD_FSYNC_BYTES = int(os.environ.get('DOWNLOAD_FSYNC_BYTES', str(64 * 1024 * 1024)))  # per transfer
+DOWNLOAD_TIMEOUT_SECONDS = float(os.environ.get('DOWNLOAD_TIMEOUT_SECONDS', '60'))  # per-read, not per-file
+DOWNLOAD_POLL_SECONDS = float(os.environ.get('DOWNLOAD_POLL_SECONDS', '10'))
+DOWNLOAD_LEASE_SECONDS = float(os.environ.get('DOWNLOAD_LEASE_SECONDS', '120'))  # renewed every third of this
+DOWNLOAD_MAX_ATTEMPTS = int(os.environ.get('DOWNLOAD_MAX_ATTEMPTS', '5'))  # per file; each retry resumes
+DOWNLOAD_RETRY_DELAY_SECONDS = float(os.environ.get('DOWNLOAD_RETRY_DELAY_SECONDS', '5'))  # doubles per attempt
+DOWNLOAD_PROGRESS_SECONDS = float(os.environ.get('DOWNLOAD_PROGRESS_SECONDS', '5'))  # progress-counter flushes
+DOWNLOAD_RATE_WINDOW_SECONDS = float(os.environ.get('DOWNLOAD_RATE_WINDOW_SECONDS', '30'))  # per download-rate sample
+DOWNLOAD_PROGRESS_MAX_COLLECTIONS = int(os.environ.get('DOWNLOAD_PROGRESS_MAX_COLLECTIONS', '100'))  # per request
+VALIDATION_PROCESSES = int(os.environ.get('VALIDATION_PROCESSES', '0'))  # per validation worker; 0 => one per core
+VALIDATION_STALE_SECONDS = float(os.environ.get('VALIDATION_STALE_SECONDS', '600'))  # heartbeat every third of this
@@ -11,7 +11,14 @@ urlpatterns = [
     path('logout/', views.logout, name='logout_url'),
     path('request_collection/', views.request_collection, name='request_collection_url'),
     path('hlpr_check_coll_id/', views.hlpr_check_coll_id, name='hlpr_check_coll_id_url'),
+    path('hlpr_check_coll_id_async/', views.hlpr_check_coll_id_async, name='hlpr_check_coll_id_async_url'),
+    path('hlpr_crawl_progress/', views.hlpr_crawl_progress, name='hlpr_crawl_progress_url'),
+    path('hlpr_check_coll_ids_batch/', views.hlpr_check_coll_ids_batch, name='hlpr_check_coll_ids_batch_url'),
+    path('hlpr_batch_progress/', views.hlpr_batch_progress, name='hlpr_batch_progress_url'),
     path('hlpr_initiate_download/', views.hlpr_initiate_download, name='hlpr_initiate_download_url'),
+    path('download_progress/', views.download_progress, name='download_progress_url'),
+    path('collection_index/', views.collection_index, name='collection_index_url'),
+    path('warc_record/', views.warc_record, name='warc_record_url'),
     ## other --------------------------------------------------------
     path('', views.root, name='root_url'),  # redirects to `info`
     path('admin/', admin.site.urls),
@@ -0,0 +1,1169 @@
+"""
+Download engine for requested collections.
+
+Flow:
+- The web request only enqueues: request_collection_helper.start_download() sets the collection's status
+    to `QUEUED_FOR_START` and returns.
+- Separate worker processes (`manage.py run_download_worker`, as many as wanted, on one host or several)
+    poll the db for queued collections, claim them, and stream their WARCs from the WASAPI `locations` url to disk;
+    the workers together run at most `DOWNLOAD_CONCURRENCY` transfers at once (each leases a shared `TransferSlot` row
+    first), within `DOWNLOAD_MAX_BYTES_PER_SECOND`, which they split by their shares of the running transfers.
+- Workers share a running collection's files: each leases a file (on its row) before transferring it,
+    and renews its leases as a heartbeat while the transfers run; a crashed worker's leases expire
+    after `DOWNLOAD_LEASE_SECONDS`, and its files are picked up by the others. See DownloadWorker.lease_file().
+- The worker keeps polling while it transfers, and a DownloadScheduler hands out each free transfer-slot:
+    higher-priority collections first, then in turn between requesting users, and between each user's collections;
+    so a small urgent collection isn't stuck behind a huge one.
+- Each WARC is written to a `.part` file, preallocated to its full size, with a checkpoint of the bytes received
+    (and fsync'd) kept beside it; interrupted transfers are retried (and resumed after a worker restart)
+    with http `Range` requests. See PartFile.
+- WARCs are stored by content: a file whose size and WASAPI checksum match one already downloaded, in any collection,
+    is hardlinked (or reflinked) from it instead of fetched; see CollectionFile.stored_copies().
+- Checksums are hashed inline as the bytes are written -- from the same reusable buffer, via memoryview slices,
+    so there are no per-chunk copies and no second read of the file. The hash-state is carried across retries,
+    so resuming doesn't re-read what's already on disk (except once after a worker restart).
+- Each gzipped WARC is indexed as it's written (see warc_index.WarcIndexer), into a `.cdxj` file beside it;
+    when the collection completes, its files' indexes are merged into one sorted `index.cdxj`, for replay and lookups.
+- Each file's outcome (`download_state`, `bytes_transferred`) is recorded on its `CollectionFile` row as it finishes;
+    a checksum mismatch marks the file `FAILED`.
+- Progress is kept on the collection's row, for status pages -- files and bytes downloaded, and a rolling
+    download-rate, for an ETA -- as running counters that each worker adds its tallies to, in batches,
+    rather than summed over the file-rows on every page-load; see DownloadProgress.
+- The collection's status is updated as it goes: `IN_PROGRESS` when claimed, then, once every file has finished
+    (by whichever worker), `COMPLETE`, or `PAUSED` (with `errors` set and the failures listed in `notes`)
+    if any file failed.
+- A collection is only claimed once its remaining bytes are reserved against the download-root's free space
+    (less `DOWNLOAD_FREE_SPACE_MARGIN_BYTES`); one that doesn't fit stays queued until running downloads free enough.
+    The reservations are held on a `DiskReservation` row, so they add up across workers; see reserve_disk_space().
+"""
+
+import datetime
+import errno
+import functools
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable
+
+import httpx
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, When
+from django.utils import timezone
+
+from warc_manager_app.lib import warc_index, wasapi_client
+from warc_manager_app.lib.wasapi_client import RETRYABLE_STATUS_CODES
+from warc_manager_app.models import Collection, CollectionFile, DiskReservation, TransferSlot
+
+log = logging.getLogger(__name__)
+
+FICLONE = 0x40049409  # the linux ioctl for a reflink; named `fcntl.FICLONE` from python 3.12
+
+
+class RetryableTransferError(Exception):
+    """
+    Raised for an interrupted or refused transfer that's worth resuming.
+    Carries the refusing response, if any, so its status and `Retry-After` can shape the backoff.
+    """
+
+    def __init__(self, message: str, response: httpx.Response | None = None):
+        super().__init__(message)
+        self.response: httpx.Response | None = response
+
+
+class LeaseLostError(Exception):
+    """
+    Raised mid-transfer when the file's lease has been taken over by another worker, so this one stops writing.
+    """
+
+
+class ChecksumMismatchError(Exception):
+    """
+    Raised when a downloaded file doesn't match its WASAPI checksum.
+    """
+
+
+def enqueue_download(collection_id: str, requested_by: User, priority: int = Collection.Priority.NORMAL) -> bool:
+    """
+    Marks the collection as queued for the download worker, noting who asked, and at what priority.
+    Only collections that have been checked (`QUERIED`), or were paused, can be queued;
+      and not while a re-check is crawling the file-list, which the worker would otherwise read half-written.
+    Returns True if the collection was queued.
+    Called by request_collection_helper.start_download().
+    """
+    updated_count: int = Collection.objects.filter(
+        collection_id=collection_id,
+        status__in=[Collection.Status.QUERIED, Collection.Status.PAUSED],
+        crawl_state=Collection.CrawlState.IDLE,
+    ).update(status=Collection.Status.QUEUED_FOR_START, requested_by=requested_by, priority=priority)
+    log.debug(f'updated_count, ``{updated_count}``')
+    return updated_count == 1
+
+
+def make_hashers(file: CollectionFile) -> dict:
+    """
+    Returns a fresh hasher for each WASAPI checksum (`md5`, `sha1`) the file has, keyed by name.
+    Called by DownloadWorker.
+    """
+    return {name: hashlib.new(name) for name in ['md5', 'sha1'] if getattr(file, name)}
+
+
+def get_download_dir(collection_id: str) -> pathlib.Path:
+    """
+    Returns the directory that holds the collection's WARCs.
+    Called by DownloadWorker.
+    """
+    return pathlib.Path(settings.WARC_DOWNLOAD_ROOT) / collection_id
+
+
+def is_safe_filename(filename: str) -> bool:
+    """
+    Returns True if the WASAPI-listed `filename` names a file directly in the download-directory:
+      no directory parts (`../`, `/`, or a windows `\\`), and not `.` or `..`.
+    Called by DownloadWorker.download_file(), DownloadWorker.record_file_outcome(),
+      DownloadWorker.start_index_merge(), request_collection_helper.read_collection_record(),
+      and validation_engine.ValidationWorker.validate_collection().
+    """
+    return pathlib.PurePosixPath(filename).name == filename and filename not in ('', '.', '..') and '\\' not in filename
+
+
+def link_stored_copy(source_path: pathlib.Path, dest_path: pathlib.Path) -> str | None:
+    """
+    Puts an already-downloaded copy of a WARC at `dest_path` without copying its bytes:
+      a hardlink, else (eg, where the filesystem refuses more links) a reflink -- a copy-on-write clone, on linux
+      filesystems that have them (btrfs, xfs). Goes via a temporary name, so `dest_path` never holds a partial file.
+    Returns how it was linked (`hardlink` or `reflink`), or None if neither worked.
+    Called by DownloadWorker.download_file().
+    """
+    temp_path: pathlib.Path = dest_path.with_name(f'{dest_path.name}.link')
+    temp_path.unlink(missing_ok=True)
+    try:
+        os.link(source_path, temp_path)
+        temp_path.replace(dest_path)
+        return 'hardlink'
+    except OSError as e:
+        log.debug(f'no hardlink from ``{source_path}``; ``{e!r}``')
+    if sys.platform.startswith('linux'):
+        import fcntl  # posix-only; imported here, so the module still imports elsewhere
+
+        try:
+            with open(source_path, 'rb') as source, open(temp_path, 'wb') as dest:
+                fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+            temp_path.replace(dest_path)
+            return 'reflink'
+        except OSError as e:
+            log.debug(f'no reflink from ``{source_path}``; ``{e!r}``')
+            temp_path.unlink(missing_ok=True)
+    return None
+
+
+def get_download_root() -> str:
+    """
+    Returns the resolved download-root, the key of its `DiskReservation` row; creates the directory if needed.
+    Called by reserve_disk_space() and release_disk_space().
+    """
+    root: pathlib.Path = pathlib.Path(settings.WARC_DOWNLOAD_ROOT).resolve()
+    root.mkdir(parents=True, exist_ok=True)
+    return str(root)
+
+
+def get_free_bytes(root: str) -> int:
+    """
+    Returns the free bytes on the filesystem holding the download-root.
+    Called by reserve_disk_space().
+    """
+    return shutil.disk_usage(root).free
+
+
+def reserve_disk_space(byte_count: int) -> bool:
+    """
+    Reserves `byte_count` bytes under the download-root, if they fit alongside what running downloads have yet to write.
+    - The check and the reservation are one conditional update of the root's `DiskReservation` row,
+        so workers reserving at the same moment can't both squeeze in.
+    - Free space shrinks as downloads write, while their reservations shrink to match (see release_disk_space()),
+        so the two stay comparable.
+    Returns True if the bytes were reserved.
+    Called by DownloadWorker.claim_queued_collections().
+    """
+    root: str = get_download_root()
+    DiskReservation.objects.get_or_create(root=root)
+    available: int = get_free_bytes(root) - settings.DOWNLOAD_FREE_SPACE_MARGIN_BYTES
+    reserved: int = DiskReservation.objects.filter(root=root, reserved_bytes__lte=available - byte_count).update(
+        reserved_bytes=F('reserved_bytes') + byte_count
+    )
+    log.debug(f'reserve ``{byte_count}`` bytes, with ``{available}`` available; reserved, ``{bool(reserved)}``')
+    return bool(reserved)
+
+
+def release_disk_space(collection: Collection, byte_count: int | None = None) -> None:
+    """
+    Releases `byte_count` bytes of the collection's reservation (as a file finishes), or, if None, all that's left of it.
+    Called by DownloadWorker.
+    """
+    if byte_count is None:
+        byte_count = Collection.objects.filter(pk=collection.pk).values_list('reserved_bytes', flat=True).first() or 0
+    if not byte_count:
+        return
+    with transaction.atomic():
+        DiskReservation.objects.filter(root=get_download_root()).update(reserved_bytes=F('reserved_bytes') - byte_count)
+        Collection.objects.filter(pk=collection.pk).update(reserved_bytes=F('reserved_bytes') - byte_count)
+    return
+
+
+def count_downloaded(collection: Collection) -> dict:
+    """
+    Returns the collection's download-progress counters, counted exactly from its file-rows, with the rate-window
+      started afresh; the running counters are reset to these when a download is claimed, and when it finishes.
+    Called by DownloadWorker.
+    """
+    totals: dict = collection.files.aggregate(
+        bytes_transferred=Sum('bytes_transferred'),
+        files_complete=Count('pk', filter=Q(download_state=CollectionFile.DownloadState.COMPLETE)),
+    )
+    bytes_downloaded: int = totals['bytes_transferred'] or 0
+    return {
+        'files_downloaded': totals['files_complete'],
+        'bytes_downloaded': bytes_downloaded,
+        'download_rate': 0.0,
+        'progress_mark_bytes': bytes_downloaded,
+        'progress_mark_time': time.time(),
+        'progress_updated_at': timezone.now(),
+    }
+
+
+class DownloadScheduler:
+    """
+    Decides which file the worker transfers next, across the collections it's working on.
+    - Higher-`priority` collections go first.
+    - Within a priority, turns go to the requesting user served least recently, then to that user's collection
+        served least recently; so one huge collection, or one busy user, can't hold every transfer-slot.
+    - Holds only this worker's view: other workers may lease a waiting file first (see DownloadWorker.lease_file()),
+        and whether a collection is done is decided from its rows (see DownloadWorker.finish_collection_if_done()).
+    Not thread-safe; used only by the worker's scheduling thread.
+    Called by DownloadWorker.
+    """
+
+    def __init__(self):
+        self.collections: dict = {}  # pk -> Collection, in the order added
+        self.pending: dict = {}  # pk -> deque of not-yet-started `CollectionFile`s
+        self.in_flight: dict = {}  # pk -> count of started, unfinished files
+        self.file_pks: set = set()  # the pks of every pending or in-flight file, so a refresh doesn't add them twice
+        self.served_at: dict = {}  # ('user', user-id) or ('collection', pk) -> turn-number of its last file
+        self.turn: int = 0
+
+    def add_files(self, collection: Collection, files: list[CollectionFile]) -> None:
+        """
+        Adds the collection's files that aren't already pending or in flight; starts tracking the collection if new.
+        Called by DownloadWorker.refresh_scheduler().
+        """
+        if collection.pk not in self.collections:
+            self.collections[collection.pk] = collection
+            self.pending[collection.pk] = deque()
+            self.in_flight[collection.pk] = 0
+        new_files: list[CollectionFile] = [file for file in files if file.pk not in self.file_pks]
+        self.pending[collection.pk].extend(new_files)
+        self.file_pks.update(file.pk for file in new_files)
+        return
+
+    def has_waiting(self) -> bool:
+        """
+        Checks whether any collection has files waiting, without handing one out.
+        Called by DownloadWorker.fill_transfer_slots().
+        """
+        return any(self.pending.values())
+
+    def next_file(self) -> tuple[Collection, CollectionFile] | None:
+        """
+        Returns the next (collection, file) to transfer, or None if no collection has files waiting.
+        Called by DownloadWorker.fill_transfer_slots().
+        """
+        waiting: list[Collection] = [c for c in self.collections.values() if self.pending[c.pk]]
+        if not waiting:
+            return None
+        top_priority: int = max(c.priority for c in waiting)
+        waiting = [c for c in waiting if c.priority == top_priority]
+        user_id: int | None = min(
+            (c.requested_by_id for c in waiting), key=lambda user_id: self.served_at.get(('user', user_id), -1)
+        )
+        collection: Collection = min(
+            (c for c in waiting if c.requested_by_id == user_id),
+            key=lambda c: self.served_at.get(('collection', c.pk), -1),
+        )
+        self.turn += 1
+        self.served_at[('user', user_id)] = self.turn
+        self.served_at[('collection', collection.pk)] = self.turn
+        self.in_flight[collection.pk] += 1
+        return (collection, self.pending[collection.pk].popleft())
+
+    def finish_file(self, collection: Collection, file: CollectionFile) -> None:
+        """
+        Lets go of a file handed out by next_file() -- transferred, or leased by another worker first;
+          stops tracking the collection once it has nothing left waiting or in flight.
+        Called by DownloadWorker.
+        """
+        self.in_flight[collection.pk] -= 1
+        self.file_pks.discard(file.pk)
+        if not self.pending[collection.pk] and not self.in_flight[collection.pk]:
+            self.drop_collection(collection)
+        return
+
+    def drop_collection(self, collection: Collection) -> None:
+        """
+        Stops scheduling the collection.
+        Called by finish_file(), and by DownloadWorker.release_leases() on stopping.
+        """
+        self.file_pks.difference_update(file.pk for file in self.pending.pop(collection.pk))
+        self.collections.pop(collection.pk)
+        self.in_flight.pop(collection.pk)
+        return
+
+    ## end class DownloadScheduler
+
+
+class BandwidthLimiter:
+    """
+    A token-bucket of bytes, shared by a worker's transfer-threads, capping their combined rate;
+      the bucket holds one second of bytes, so short bursts go through.
+    A `bytes_per_second` of 0 means no cap.
+    The rate is the worker's share of `DOWNLOAD_MAX_BYTES_PER_SECOND`, reset as its share of the running transfers
+      changes; see DownloadWorker.update_bandwidth_share().
+    Called by DownloadWorker.transfer().
+    """
+
+    def __init__(self, bytes_per_second: int, clock: Callable[[], float] = time.monotonic):
+        self.bytes_per_second: int = bytes_per_second
+        self.clock: Callable[[], float] = clock
+        self.lock = threading.Lock()
+        self.tokens: float = float(bytes_per_second)
+        self.refilled_at: float = clock()
+
+    def reserve(self, byte_count: int) -> float:
+        """
+        Takes `byte_count` tokens, returning how many seconds to wait before they're earned.
+        Called by consume().
+        """
+        if not self.bytes_per_second:
+            return 0.0
+        with self.lock:
+            now: float = self.clock()
+            self.tokens = min(float(self.bytes_per_second), self.tokens + (now - self.refilled_at) * self.bytes_per_second)
+            self.refilled_at = now
+            self.tokens -= byte_count  # below zero is a reservation of bytes not yet earned
+            return max(0.0, -self.tokens) / self.bytes_per_second
+
+    def set_rate(self, bytes_per_second: int) -> None:
+        """
+        Changes the rate, keeping no more than a second's worth of the tokens already earned.
+        Called by DownloadWorker.update_bandwidth_share().
+        """
+        with self.lock:
+            self.bytes_per_second = bytes_per_second
+            self.tokens = min(self.tokens, float(bytes_per_second))
+        return
+
+    def consume(self, byte_count: int) -> None:
+        wait_seconds: float = self.reserve(byte_count)
+        if wait_seconds:
+            time.sleep(wait_seconds)
+
+    ## end class BandwidthLimiter
+
+
+class DownloadProgress:
+    """
+    Tallies a worker's progress per collection, for the running counters on the collection's row.
+    - Transfer-threads add bytes as they write them; the run-loop flushes the tallies every `DOWNLOAD_PROGRESS_SECONDS`,
+        one update per collection, with `F()` expressions, so the flushes of several workers add up.
+    - The rolling rate: the first flush after the rate-window (`DOWNLOAD_RATE_WINDOW_SECONDS`) is over averages
+        the window's bytes-per-second into `download_rate`, and starts the next window. The window's bytes are
+        every worker's, so the rate is the collection's, however many workers share it.
+    - Bytes linked rather than fetched count as progress, but not toward the rate.
+    - Only a collection still `IN_PROGRESS` is updated, so tallies flushed after it finished -- when its counters
+        were set exactly (see count_downloaded()) -- don't add to them.
+    Called by DownloadWorker.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tallies: dict = {}  # collection-pk -> [bytes, files, bytes not fetched]
+        self.window_seconds: float = settings.DOWNLOAD_RATE_WINDOW_SECONDS
+
+    def add(self, collection_pk: uuid.UUID, byte_count: int, file_count: int = 0, fetched: bool = True) -> None:
+        """
+        Adds to the collection's tally; thread-safe.
+        Called by DownloadWorker, and by PartFile.write() on a transfer-thread.
+        """
+        with self.lock:
+            tally: list[int] = self.tallies.setdefault(collection_pk, [0, 0, 0])
+            tally[0] += byte_count
+            tally[1] += file_count
+            if not fetched:
+                tally[2] += byte_count
+        return
+
+    def flush(self) -> None:
+        """
+        Adds the tallies to the collections' counters, and rolls over any rate-window that's over, in one transaction.
+        - Rows are updated in collection-pk order, so workers flushing at once lock them in the same order.
+        - If the transaction fails (say, a lock timeout), the tallies go back into the next flush, rather than being lost.
+        Called by DownloadWorker.run().
+        """
+        with self.lock:
+            (tallies, self.tallies) = (self.tallies, {})
+        if not tallies:
+            return
+        try:
+            with transaction.atomic():  # one commit for the lot
+                for collection_pk, (byte_count, file_count, unfetched_count) in sorted(tallies.items()):
+                    running = Collection.objects.filter(pk=collection_pk, status=Collection.Status.IN_PROGRESS)
+                    updated: int = running.update(
+                        bytes_downloaded=F('bytes_downloaded') + byte_count,
+                        files_downloaded=F('files_downloaded') + file_count,
+                        progress_mark_bytes=F('progress_mark_bytes') + unfetched_count,  # kept out of the window's rate
+                        progress_updated_at=timezone.now(),
+                    )
+                    if updated:
+                        self.roll_rate_window(running)
+        except DatabaseError:
+            log.exception('problem flushing download-progress; keeping the tallies for the next flush')
+            with self.lock:
+                for collection_pk, (byte_count, file_count, unfetched_count) in tallies.items():
+                    tally: list[int] = self.tallies.setdefault(collection_pk, [0, 0, 0])
+                    tally[0] += byte_count
+                    tally[1] += file_count
+                    tally[2] += unfetched_count
+        return
+
+    def roll_rate_window(self, running) -> None:
+        """
+        If the collection's rate-window is over, averages its rate into `download_rate`, and starts the next;
+          the condition is in the update, so, of the workers flushing at once, only one rolls it over.
+        Called by flush().
+        """
+        now: float = time.time()
+        window_rate = (F('bytes_downloaded') - F('progress_mark_bytes')) / (now - F('progress_mark_time'))
+        running.filter(progress_mark_time__lte=now - self.window_seconds).update(
+            download_rate=Case(
+                When(download_rate=0, then=window_rate),  # the first window
+                default=(F('download_rate') + window_rate) / 2,
+                output_field=FloatField(),
+            ),
+            progress_mark_bytes=F('bytes_downloaded'),
+            progress_mark_time=now,
+        )
+        return
+
+    ## end class DownloadProgress
+
+
+class PartFile:
+    """
+    The `.part` file a WARC downloads into, before it's checked and renamed.
+    - Preallocated to the file's WASAPI `size` with `posix_fallocate` (where the os has it): the blocks are claimed
+        up front, so a full disk fails the first write rather than the last, and the file isn't fragmented.
+    - Being preallocated, its length no longer says how much arrived; the count of bytes known to be on disk
+        is kept beside it, in a `.part.synced` file, rewritten after each fsync. A `.part` file without one
+        (left by a worker from before preallocation) is taken at its length.
+    - Written in place, unbuffered, from the reused transfer-buffer; fsync'd every `DOWNLOAD_FSYNC_BYTES`,
+        and when closed, rather than per write.
+    - Each write starts at `offset`, which only moves on once the write has gone through; so a write that fails
+        part-way (eg, a full disk) can simply be made again, over whatever of it landed.
+    - An `indexer`, if given, is fed each write, like the hashers; and `on_write`, if given, is told each write's
+        byte-count, for the collection's progress.
+    - Once `abort` is set (the file's lease was lost), nothing more is written -- not even the checkpoint --
+        as the file now belongs to the worker that took the lease over.
+    Called by DownloadWorker.
+    """
+
+    def __init__(
+        self,
+        part_path: pathlib.Path,
+        size: int,
+        indexer: warc_index.WarcIndexer | None = None,
+        on_write: Callable[[int], None] | None = None,
+        abort: threading.Event | None = None,
+    ):
+        self.path: pathlib.Path = part_path
+        self.indexer: warc_index.WarcIndexer | None = indexer
+        self.on_write: Callable[[int], None] | None = on_write
+        self.abort: threading.Event | None = abort  # set when the file's lease is lost; see DownloadWorker.renew_leases()
+        self.synced_path: pathlib.Path = part_path.with_name(f'{part_path.name}.synced')
+        self.size: int = size
+        self.fsync_bytes: int = settings.DOWNLOAD_FSYNC_BYTES
+        self.offset: int = self.read_checkpoint()  # bytes written, in order, from the start
+        self.unsynced: int = 0
+        self.f = None
+
+    def read_checkpoint(self) -> int:
+        """
+        Returns the bytes known to be on disk: the `.part.synced` count, else the length of an older `.part` file.
+        Called by __init__().
+        """
+        if not self.path.exists():
+            return 0
+        length: int = self.path.stat().st_size
+        try:
+            return min(int(self.synced_path.read_text()), length)
+        except FileNotFoundError:
+            return length
+        except ValueError:  # cut short by a crash
+            return 0
+
+    def __enter__(self):
+        """
+        Opens the file at the checkpoint, preallocating it first if it's short of the full size.
+        """
+        self.f = open(self.path, 'r+b' if self.path.exists() else 'w+b', buffering=0)
+        if os.fstat(self.f.fileno()).st_size < self.size and hasattr(os, 'posix_fallocate'):
+            self.write_checkpoint()  # before the length stops meaning anything
+            try:
+                os.posix_fallocate(self.f.fileno(), 0, self.size)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise
+                log.debug(f'no preallocation for ``{self.path.name}``; ``{e!r}``')  # eg, unsupported by the filesystem
+        self.f.seek(self.offset)
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if not self.is_aborted():
+                self.sync()
+        finally:
+            self.f.close()
+
+    def is_aborted(self) -> bool:
+        return self.abort is not None and self.abort.is_set()
+
+    def write(self, view: memoryview, hashers: dict) -> None:
+        """
+        Writes the bytes at the current offset and feeds them to each hasher, and the indexer, without copying them.
+        If the write fails, the offset and the hashers are left as they were, for the bytes to be written again.
+        Raises ValueError rather than write past the expected size, and LeaseLostError once the lease is lost.
+        Called by DownloadWorker.transfer().
+        """
+        if self.is_aborted():
+            raise LeaseLostError(f'lease on ``{self.path.name}`` lost to another worker')
+        if not view:
+            return
+        if self.offset + len(view) > self.size:
+            raise ValueError(f'expected ``{self.size}`` bytes, got more')
+        self.f.seek(self.offset)  # a failed earlier write may have moved the file-position on
+        written: int = 0
+        while written < len(view):
+            written += self.f.write(view[written:])
+        for hasher in hashers.values():
+            hasher.update(view)
+        if self.indexer:
+            self.indexer.update(view)
+        if self.on_write:
+            self.on_write(len(view))
+        self.offset += len(view)
+        self.unsynced += len(view)
+        if self.unsynced >= self.fsync_bytes:
+            self.sync()
+        return
+
+    def sync(self) -> None:
+        """
+        Flushes the written bytes to disk, then moves the checkpoint up to them.
+        Called by write() and __exit__().
+        """
+        if self.unsynced:
+            os.fsync(self.f.fileno())
+            self.write_checkpoint()
+            self.unsynced = 0
+        return
+
+    def write_checkpoint(self) -> None:
+        self.synced_path.write_text(str(self.offset))
+
+    def restart(self) -> None:
+        """
+        Starts over from byte 0, for a server that ignored the range-request.
+        Called by DownloadWorker.transfer().
+        """
+        if self.on_write:
+            self.on_write(-self.offset)  # they'll be counted again, as they're rewritten
+        self.offset = 0
+        self.f.seek(0)
+        if self.indexer:
+            self.indexer.reset()
+        return
+
+    def finish(self, dest_path: pathlib.Path) -> None:
+        """
+        Renames the complete file to its final name.
+        Called by DownloadWorker.download_file().
+        """
+        self.path.replace(dest_path)
+        self.synced_path.unlink(missing_ok=True)
+        return
+
+    def discard(self) -> None:
+        self.path.unlink(missing_ok=True)
+        self.synced_path.unlink(missing_ok=True)
+
+    ## end class PartFile
+
+
+class DownloadWorker:
+    """
+    Pulls queued collections from the db and downloads their WARCs.
+    Several workers, on one host or several, can share the queue: each leases the files it transfers.
+    Called by the `run_download_worker` management command.
+    """
+
+    QUEUED_STATUSES = (Collection.Status.QUEUED_FOR_START, Collection.Status.QUEUED_FOR_REDO)
+
+    def __init__(self, client: httpx.Client | None = None, concurrency: int | None = None, name: str | None = None):
+        if client is None:
+            auth = httpx.BasicAuth(username=settings.WASAPI_USR, password=settings.WASAPI_KEY)
+            timeout = httpx.Timeout(settings.DOWNLOAD_TIMEOUT_SECONDS, connect=10.0)
+            client = httpx.Client(auth=auth, timeout=timeout, follow_redirects=True)
+        self.client: httpx.Client = client
+        self.concurrency: int = concurrency or settings.DOWNLOAD_CONCURRENCY
+        self.name: str = name or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'  # the lease-holder
+        self.lease_seconds: float = settings.DOWNLOAD_LEASE_SECONDS
+        self.buffer_size: int = settings.DOWNLOAD_BUFFER_SIZE
+        self.thread_data = threading.local()  # holds each transfer-thread's reusable buffer
+        self.max_attempts: int = settings.DOWNLOAD_MAX_ATTEMPTS
+        self.scheduler = DownloadScheduler()
+        self.bandwidth = BandwidthLimiter(settings.DOWNLOAD_MAX_BYTES_PER_SECOND)
+        self.progress = DownloadProgress()
+        self.index_executor: ThreadPoolExecutor | None = None  # merges collection-indexes, off the scheduling thread
+        self.transfer_aborts: dict = {}  # file-pk -> `threading.Event`, set if the running transfer's lease is lost
+        self.transfer_slots: dict = {}  # file-pk -> number of the `TransferSlot` its transfer holds
+        self.slots_created: bool = False
+        self.stop_requested: bool = False
+
+    def run(self, once: bool = False) -> None:
+        """
+        Transfers the files of the running collections, `concurrency` at a time, in the scheduler's order;
+          claims newly-queued collections, and picks up files other workers let go of, every `DOWNLOAD_POLL_SECONDS`,
+          even mid-transfer. Renews the leases of its running transfers every third of `DOWNLOAD_LEASE_SECONDS`,
+          and adds its progress to the collections' counters every `DOWNLOAD_PROGRESS_SECONDS`.
+        With `once`, returns when the queue is empty and no running collection has a file this worker can lease.
+        On stopping, lets the running transfers finish; the unfinished collections stay `IN_PROGRESS`,
+          for the other workers, or the next one started.
+        db-writes stay on this thread; the pool threads only do i/o, as does the thread merging collection-indexes.
+        Called by the `run_download_worker` management command.
+        """
+        log.info(f'download worker ``{self.name}`` starting; concurrency, ``{self.concurrency}``')
+        in_flight: dict[Future, tuple[Collection, CollectionFile]] = {}
+        next_poll: float = 0.0
+        next_renewal: float = time.monotonic() + self.lease_seconds / 3
+        next_flush: float = time.monotonic() + settings.DOWNLOAD_PROGRESS_SECONDS
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor, ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='index-merge'
+        ) as self.index_executor:
+            while not self.stop_requested:
+                if not in_flight or time.monotonic() >= next_poll:
+                    self.claim_queued_collections()
+                    self.refresh_scheduler()
+                    next_poll = time.monotonic() + settings.DOWNLOAD_POLL_SECONDS
+                self.fill_transfer_slots(executor, in_flight)
+                if time.monotonic() >= next_flush:
+                    self.progress.flush()
+                    next_flush = time.monotonic() + settings.DOWNLOAD_PROGRESS_SECONDS
+                if in_flight:
+                    if time.monotonic() >= next_renewal:
+                        self.renew_leases(list(in_flight.values()))
+                        next_renewal = time.monotonic() + self.lease_seconds / 3
+                    timeout: float = max(0.0, min(next_poll, next_renewal, next_flush) - time.monotonic())
+                    (done, _) = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.record_transfer(in_flight.pop(future), future.result())
+                elif once:
+                    break
+                else:
+                    time.sleep(settings.DOWNLOAD_POLL_SECONDS)
+            for future in list(in_flight):  # stopping; the running transfers are let finish
+                self.record_transfer(in_flight.pop(future), future.result())
+        self.index_executor = None  # merges still running were waited for
+        self.progress.flush()
+        self.release_leases()
+        log.info(f'download worker ``{self.name}`` stopping')
+        return
+
+    def claim_queued_collections(self) -> None:
+        """
+        Starts every queued collection that fits on disk, highest-priority first, by reserving its remaining bytes
+          and flipping its status to `IN_PROGRESS`; its files are then up for lease by any worker.
+        - A collection that doesn't fit stays queued, for a later poll; lower-priority collections aren't admitted
+            ahead of it, though smaller ones of its own priority are.
+        - The conditional update means only one worker can win a given collection.
+        - Files that failed last time are set back to `PENDING`, to be tried again.
+        - The progress-counters start from what's already downloaded.
+        Called by run().
+        """
+        queued = Collection.objects.filter(status__in=self.QUEUED_STATUSES).order_by('-priority', 'updated_at')
+        blocked_priority: int | None = None
+        for collection in queued:
+            if blocked_priority is not None and collection.priority < blocked_priority:
+                break
+            needed_bytes: int = collection.bytes_remaining()
+            if not reserve_disk_space(needed_bytes):
+                log.info(f'collection ``{collection.collection_id}`` waiting for disk space; needs ``{needed_bytes}`` bytes')
+                blocked_priority = collection.priority
+                continue
+            claimed: int = Collection.objects.filter(pk=collection.pk, status=collection.status).update(
+                status=Collection.Status.IN_PROGRESS, reserved_bytes=needed_bytes, **count_downloaded(collection)
+            )
+            if not claimed:  # another worker got it first
+                DiskReservation.objects.filter(root=get_download_root()).update(
+                    reserved_bytes=F('reserved_bytes') - needed_bytes
+                )
+                continue
+            collection.status = Collection.Status.IN_PROGRESS
+            collection.files.filter(download_state=CollectionFile.DownloadState.FAILED).update(
+                download_state=CollectionFile.DownloadState.PENDING, failure=''
+            )
+            get_download_dir(collection.collection_id).mkdir(parents=True, exist_ok=True)
+            log.info(
+                f'claimed collection ``{collection.collection_id}`` (priority ``{collection.priority}``); '
+                f'``{needed_bytes}`` bytes (reserved)'
+            )
+            self.finish_collection_if_done(collection)  # in case there's nothing left to transfer
+        return
+
+    def refresh_scheduler(self) -> None:
+        """
+        Hands the scheduler the leasable files of running collections:
+          all of a collection's pending files when it's new to this worker,
+          else just those whose lease expired -- left by a worker that crashed, or lost touch with the db.
+        A running collection with nothing left to lease or transfer gets its outcome recorded, if no one else has.
+        Called by run().
+        """
+        now: datetime.datetime = timezone.now()
+        for collection in Collection.objects.filter(status=Collection.Status.IN_PROGRESS).order_by(
+            '-priority', 'updated_at'
+        ):
+            files = collection.files.filter(download_state=CollectionFile.DownloadState.PENDING)
+            if collection.pk in self.scheduler.collections:
+                files = files.filter(lease_expires_at__lt=now)
+            else:
+                files = files.filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now))
+            leasable: list[CollectionFile] = list(files)
+            if leasable:
+                self.scheduler.add_files(collection, leasable)
+            elif collection.pk not in self.scheduler.collections:
+                self.finish_collection_if_done(collection)
+        return
+
+    def fill_transfer_slots(self, executor: ThreadPoolExecutor, in_flight: dict) -> None:
+        """
+        Leases and starts the scheduler's next files until all this worker's `concurrency` threads are busy,
+          or every shared transfer-slot is taken (by any worker); a file another worker leased first is passed over.
+        Called by run().
+        """
+        (slot, started) = (None, False)
+        while len(in_flight) < self.concurrency and self.scheduler.has_waiting():
+            if slot is None and (slot := self.take_transfer_slot()) is None:
+                log.debug('every transfer-slot is taken, across the workers')
+                break
+            next_transfer: tuple[Collection, CollectionFile] = self.scheduler.next_file()
+            (collection, file) = next_transfer
+            if not self.lease_file(file):
+                self.scheduler.finish_file(collection, file)
+                continue
+            download_dir: pathlib.Path = get_download_dir(collection.collection_id)
+            stored_path: pathlib.Path | None = self.find_stored_copy(file) if settings.DOWNLOAD_DEDUP else None
+            abort: threading.Event = self.transfer_aborts.setdefault(file.pk, threading.Event())
+            (self.transfer_slots[file.pk], slot, started) = (slot, None, True)
+            in_flight[executor.submit(self.download_file, file, download_dir, stored_path, abort)] = next_transfer
+        if slot is not None:  # taken, but every file left was leased by another worker first
+            self.release_transfer_slot(slot)
+        if started:
+            self.update_bandwidth_share()
+        return
+
+    def take_transfer_slot(self) -> int | None:
+        """
+        Leases a free one of the `DOWNLOAD_CONCURRENCY` shared transfer-slots for `lease_seconds`, with a conditional
+          update, as for a file; a worker racing for the same slot finds it taken, and tries the next.
+        Returns the slot's number, or None if every slot is taken.
+        Called by fill_transfer_slots().
+        """
+        if not self.slots_created:
+            TransferSlot.objects.bulk_create(
+                [TransferSlot(number=number) for number in range(settings.DOWNLOAD_CONCURRENCY)], ignore_conflicts=True
+            )
+            self.slots_created = True
+        now: datetime.datetime = timezone.now()
+        free = TransferSlot.objects.filter(number__lt=settings.DOWNLOAD_CONCURRENCY).filter(
+            Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+        )
+        for number in free.values_list('number', flat=True)[:3]:
+            if free.filter(number=number).update(
+                leased_by=self.name, lease_expires_at=now + datetime.timedelta(seconds=self.lease_seconds)
+            ):
+                return number
+        return None
+
+    def release_transfer_slot(self, number: int) -> None:
+        """
+        Frees the transfer-slot, if this worker still holds it.
+        Called by fill_transfer_slots() and record_transfer().
+        """
+        TransferSlot.objects.filter(number=number, leased_by=self.name).update(leased_by='', lease_expires_at=None)
+        return
+
+    def update_bandwidth_share(self) -> None:
+        """
+        Sets this worker's bandwidth-cap to its share of `DOWNLOAD_MAX_BYTES_PER_SECOND` -- in proportion to the live
+          transfer-slots it holds, of all the workers' -- so the workers' caps add up to the setting.
+        A worker that starts transfers takes its larger share at once; the others give theirs up at their next
+          heartbeat, so the combined rate can run over for up to a third of `DOWNLOAD_LEASE_SECONDS`.
+        Called by fill_transfer_slots() and renew_leases().
+        """
+        if not settings.DOWNLOAD_MAX_BYTES_PER_SECOND:
+            return
+        counts: dict = TransferSlot.objects.filter(
+            number__lt=settings.DOWNLOAD_CONCURRENCY, lease_expires_at__gte=timezone.now()
+        ).aggregate(total=Count('pk'), mine=Count('pk', filter=Q(leased_by=self.name)))
+        share: float = counts['mine'] / counts['total'] if counts['total'] else 1.0
+        self.bandwidth.set_rate(max(1, int(settings.DOWNLOAD_MAX_BYTES_PER_SECOND * share)))
+        return
+
+    def find_stored_copy(self, file: CollectionFile) -> pathlib.Path | None:
+        """
+        Returns the path of an already-downloaded file with the same content (same size and checksum),
+          from this or another collection, if one is still on disk at the right size.
+        Called by fill_transfer_slots().
+        """
+        stored = file.stored_copies().exclude(pk=file.pk).values_list('collection__collection_id', 'filename')
+        for collection_id, filename in stored[:5]:
+            path: pathlib.Path = get_download_dir(collection_id) / filename
+            if path.exists() and path.stat().st_size == file.size:
+                return path
+        return None
+
+    def lease_file(self, file: CollectionFile) -> bool:
+        """
+        Leases the file to this worker for `lease_seconds`, if it's still pending and no one else holds a live lease.
+        The check and the lease are one conditional update: on postgres or mysql, a worker racing for the same row
+          waits on its lock, then finds the condition no longer holds (the effect of `SELECT ... FOR UPDATE SKIP LOCKED`,
+          without a transaction held open); sqlite serializes the writes.
+        Returns True if the lease was taken.
+        Called by fill_transfer_slots().
+        """
+        now: datetime.datetime = timezone.now()
+        leased: int = (
+            CollectionFile.objects.filter(pk=file.pk, download_state=CollectionFile.DownloadState.PENDING)
+            .filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now))
+            .update(leased_by=self.name, lease_expires_at=now + datetime.timedelta(seconds=self.lease_seconds))
+        )
+        if not leased:
+            log.debug(f'``{file.filename}`` already leased by another worker')
+        return bool(leased)
+
+    def renew_leases(self, transfers: list[tuple[Collection, CollectionFile]]) -> set:
+        """
+        The heartbeat: pushes back the expiry of the running transfers' leases, and of their transfer-slots,
+          and takes this worker's current share of the bandwidth-cap.
+        A transfer whose lease was taken over by another worker is told to stop (via its abort-event), so the two
+          don't write the same `.part` file; it ends without writing or renaming anything more.
+        Returns the pks of the files whose leases were lost.
+        Called by run().
+        """
+        expires_at: datetime.datetime = timezone.now() + datetime.timedelta(seconds=self.lease_seconds)
+        file_pks: set = {file.pk for (_, file) in transfers}
+        held = CollectionFile.objects.filter(pk__in=file_pks, leased_by=self.name)
+        held.update(lease_expires_at=expires_at)
+        TransferSlot.objects.filter(leased_by=self.name).update(lease_expires_at=expires_at)
+        self.update_bandwidth_share()
+        lost_pks: set = file_pks - set(held.values_list('pk', flat=True))
+        if lost_pks:
+            log.warning(
+                f'``{len(lost_pks)}`` of ``{len(file_pks)}`` leases were lost to other workers; stopping those transfers'
+            )
+            for file_pk in lost_pks:
+                if abort := self.transfer_aborts.get(file_pk):
+                    abort.set()
+        return lost_pks
+
+    def release_leases(self) -> None:
+        """
+        Lets go of any leases this worker still holds, so other workers needn't wait for them to expire.
+        Called by run(), on stopping.
+        """
+        for collection in list(self.scheduler.collections.values()):
+            self.scheduler.drop_collection(collection)
+        CollectionFile.objects.filter(leased_by=self.name).update(leased_by='', lease_expires_at=None)
+        TransferSlot.objects.filter(leased_by=self.name).update(leased_by='', lease_expires_at=None)
+        return
+
+    def record_transfer(self, transfer: tuple[Collection, CollectionFile], failure: str | None) -> None:
+        """
+        Records a finished transfer on its file's row, and, if it was the collection's last, the collection's outcome.
+        Called by run().
+        """
+        (collection, file) = transfer
+        self.scheduler.finish_file(collection, file)
+        self.transfer_aborts.pop(file.pk, None)
+        if (slot := self.transfer_slots.pop(file.pk, None)) is not None:
+            self.release_transfer_slot(slot)
+        if not self.record_file_outcome(file, get_download_dir(collection.collection_id), failure):
+            log.warning(f'lease on ``{file.filename}`` lost to another worker; its outcome is theirs to record')
+            return
+        release_disk_space(collection, file.size - file.bytes_transferred)  # its share, as reserved at the claim
+        if not failure:
+            self.progress.add(collection.pk, 0, file_count=1)
+        self.finish_collection_if_done(collection)
+        return
+
+    def finish_collection_if_done(self, collection: Collection) -> None:
+        """
+        Once every file of the collection is `COMPLETE` or `FAILED`, records the collection's outcome:
+          `COMPLETE` (and merges its index; it's then up for validation), or `PAUSED` with the failures noted;
+          sets its progress-counters exactly; and releases any reservation left.
+        The update is conditional on the collection still being `IN_PROGRESS`, so, of the workers that finish
+          its last files, only one records the outcome.
+        Called by claim_queued_collections(), refresh_scheduler(), and record_transfer().
+        """
+        if collection.files.exclude(
+            download_state__in=[CollectionFile.DownloadState.COMPLETE, CollectionFile.DownloadState.FAILED]
+        ).exists():
+            return
+        failures: list[str] = list(
+            collection.files.filter(download_state=CollectionFile.DownloadState.FAILED).values_list('failure', flat=True)
+        )
+        outcome: dict = {
+            'status': Collection.Status.COMPLETE,
+            'updated_at': timezone.now(),
+            'validation_state': Collection.ValidationState.PENDING,  # for the validation stage; see validation_engine
+            'validation_lease': None,
+            **count_downloaded(collection),
+        }
+        if failures:
+            log.warning(f'``{len(failures)}`` files failed for collection ``{collection.collection_id}``')
+            notes: str = '\n'.join(filter(None, [collection.notes] + failures))
+            outcome.update({'status': Collection.Status.PAUSED, 'errors': True, 'notes': notes})
+        if Collection.objects.filter(pk=collection.pk, status=Collection.Status.IN_PROGRESS).update(**outcome):
+            release_disk_space(collection)
+            log.info(f'collection ``{collection.collection_id}`` status, ``{outcome["status"]}``')
+            if outcome['status'] == Collection.Status.COMPLETE and settings.DOWNLOAD_CDXJ_INDEX:
+                self.start_index_merge(collection)
+        return
+
+    def start_index_merge(self, collection: Collection) -> None:
+        """
+        Merges the complete collection's per-file indexes into its `index.cdxj`: on the merge-thread while running,
+          so a big collection's merge doesn't hold up scheduling or lease-renewals; else here.
+        Listed names that would leave the download-directory are left out; they weren't downloaded.
+        Called by finish_collection_if_done().
+        """
+        filenames: list[str] = [
+            filename for filename in collection.files.values_list('filename', flat=True) if is_safe_filename(filename)
+        ]
+        download_dir: pathlib.Path = get_download_dir(collection.collection_id)
+        if self.index_executor:
+            self.index_executor.submit(self.merge_index, download_dir, filenames)
+        else:
+            self.merge_index(download_dir, filenames)
+        return
+
+    def merge_index(self, download_dir: pathlib.Path, filenames: list[str]) -> None:
+        """
+        Merges the index, logging, rather than raising, any problem.
+        Called by start_index_merge(), possibly on the merge-thread.
+        """
+        try:
+            warc_index.merge_collection_index(download_dir, filenames)
+        except Exception:
+            log.exception(f'problem merging the index of ``{download_dir}``')
+        return
+
+    def record_file_outcome(self, file: CollectionFile, download_dir: pathlib.Path, failure: str | None) -> bool:
+        """
+        Updates the file's row with its download-state and bytes transferred (a failed file keeps its `.part` bytes),
+          marks it to be validated again, and lets go of its lease; only if this worker still holds the lease.
+        Returns True if the outcome was recorded.
+        Called by record_transfer().
+        """
+        if failure:
+            download_state: str = CollectionFile.DownloadState.FAILED
+            bytes_transferred: int = 0
+            if is_safe_filename(file.filename):
+                bytes_transferred = PartFile(download_dir / f'{file.filename}.part', file.size).offset
+        else:
+            download_state = CollectionFile.DownloadState.COMPLETE
+            bytes_transferred = file.size
+        recorded: int = CollectionFile.objects.filter(pk=file.pk, leased_by=self.name).update(
+            download_state=download_state,
+            bytes_transferred=bytes_transferred,
+            failure=failure or '',
+            validation_state=CollectionFile.ValidationState.PENDING,
+            validation_error='',
+            leased_by='',
+            lease_expires_at=None,
+        )
+        return bool(recorded)
+
+    def download_file(
+        self,
+        file: CollectionFile,
+        download_dir: pathlib.Path,
+        stored_path: pathlib.Path | None = None,
+        abort: threading.Event | None = None,
+    ) -> str | None:
+        """
+        Downloads one WARC via its `.part` file, resuming interrupted transfers up to `max_attempts` times;
+          a gzipped WARC is indexed on the way, and its index written beside it once the checksums verify.
+        Skips files already on disk at the expected size, and links, rather than fetches, a `stored_path` copy
+          (and its index).
+        Stops, leaving the `.part` file to the new lease-holder, once `abort` is set.
+        Returns None on success, or a short failure description.
+        Called by run(), on a transfer-thread.
+        """
+        filename: str = file.filename
+        if not is_safe_filename(filename):
+            log.warning(f'not downloading ``{filename!r}``; its name would put it outside ``{download_dir}``')
+            return f'{filename}: unsafe filename'
+        dest_path: pathlib.Path = download_dir / filename
+        if dest_path.exists() and dest_path.stat().st_size == file.size:
+            log.debug(f'already downloaded, ``{filename}``')
+            self.progress.add(file.collection_id, file.size - file.bytes_transferred, fetched=False)
+            return None
+        if stored_path and (how := link_stored_copy(stored_path, dest_path)):
+            log.info(f'``{filename}`` already downloaded, as ``{stored_path}``; {how}ed')
+            self.progress.add(file.collection_id, file.size - file.bytes_transferred, fetched=False)
+            if settings.DOWNLOAD_CDXJ_INDEX:
+                warc_index.copy_file_index(stored_path, dest_path)
+            return None
+        indexer: warc_index.WarcIndexer | None = None
+        if settings.DOWNLOAD_CDXJ_INDEX and filename.endswith('.warc.gz'):
+            indexer = warc_index.WarcIndexer(filename)
+        on_write: Callable[[int], None] = functools.partial(self.progress.add, file.collection_id)
+        part = PartFile(download_dir / f'{filename}.part', file.size, indexer, on_write, abort)
+        try:
+            hashers: dict = self.seed_hashers(file, part)
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    self.transfer(file, part, hashers)
+                    break
+                except (httpx.TransportError, RetryableTransferError) as e:
+                    if attempt == self.max_attempts:
+                        raise
+                    response: httpx.Response | None = e.response if isinstance(e, RetryableTransferError) else None
+                    retry_after: float | None = wasapi_client.parse_retry_after(response) if response else None
+                    delay: float = wasapi_client.compute_backoff(attempt, settings.DOWNLOAD_RETRY_DELAY_SECONDS, retry_after)
+                    log.warning(
+                        f'attempt ``{attempt}`` for ``{filename}`` interrupted, ``{e!r}``; resuming in ``{delay:.2f}``s'
+                    )
+                    time.sleep(delay)
+            if part.is_aborted():
+                raise LeaseLostError(f'lease on ``{filename}`` lost to another worker')
+            self.verify_checksums(file, part, hashers)
+            if indexer:
+                indexer.write(warc_index.get_file_index_path(dest_path), file.size)
+            part.finish(dest_path)
+        except LeaseLostError as e:
+            log.warning(f'stopped downloading ``{filename}``; {e}')
+            return f'{filename}: {e}'
+        except Exception as e:
+            log.exception(f'problem downloading ``{filename}``')
+            return f'{filename}: {e!r}'
+        log.debug(f'downloaded, ``{filename}``')
+        return None
+
+    def transfer(self, file: CollectionFile, part: PartFile, hashers: dict) -> None:
+        """
+        Makes one attempt at fetching the rest of the file, writing into the `.part` file from its offset.
+        Raises RetryableTransferError if the attempt ends short of the expected size.
+        Called by download_file().
+        """
+        offset: int = part.offset
+        if offset == file.size:
+            return
+        headers: dict = {'Range': f'bytes={offset}-'} if offset else {}
+        log.debug(f'requesting ``{file.filename}`` from byte ``{offset}``')
+        wasapi_client.get_rate_limiter().acquire()
+        with self.client.stream('GET', file.locations[0], headers=headers) as resp:
+            if resp.status_code in RETRYABLE_STATUS_CODES:
+                if resp.status_code in wasapi_client.THROTTLE_STATUS_CODES:
+                    wasapi_client.get_rate_limiter().record_throttle(wasapi_client.parse_retry_after(resp))
+                raise RetryableTransferError(f'status ``{resp.status_code}``', response=resp)
+            resp.raise_for_status()
+            wasapi_client.get_rate_limiter().record_success()
+            buffer: memoryview = self.get_buffer()
+            filled: int = 0
+            with part:
+                if offset and resp.status_code != 206:
+                    log.warning(f'server ignored the range-request for ``{file.filename}``; restarting from byte 0')
+                    part.restart()
+                    hashers.update(make_hashers(file))
+                try:
+                    ## raw (undecoded) bytes, as they come off the socket, coalesced into the buffer for large writes
+                    for chunk in resp.iter_raw():
+                        if part.is_aborted():
+                            raise LeaseLostError(f'lease on ``{file.filename}`` lost to another worker')
+                        self.bandwidth.consume(len(chunk))
+                        if filled + len(chunk) > self.buffer_size:
+                            part.write(buffer[:filled], hashers)
+                            filled = 0
+                        if len(chunk) >= self.buffer_size:
+                            part.write(memoryview(chunk), hashers)
+                        else:
+                            buffer[filled : filled + len(chunk)] = chunk
+                            filled += len(chunk)
+                finally:
+                    part.write(buffer[:filled], hashers)  # whatever arrived is kept, even if the connection dropped
+        if part.offset < file.size:
+            raise RetryableTransferError(f'received ``{part.offset}`` of ``{file.size}`` bytes')
+        return
+
+    def seed_hashers(self, file: CollectionFile, part: PartFile) -> dict:
+        """
+        Builds the hashers for the file's WASAPI checksums.
+        If a `.part` file was left by an earlier worker, its bytes (up to the checkpoint) are hashed, and indexed,
+          once here; after that, the hash- and index-state are carried across retries in memory.
+        Called by download_file().
+        """
+        hashers: dict = make_hashers(file)
+        if (hashers or part.indexer) and part.offset:
+            log.info(f're-reading ``{part.offset}`` bytes of ``{part.path.name}`` left by an earlier worker')
+            buffer: memoryview = self.get_buffer()
+            remaining: int = part.offset
+            with open(part.path, 'rb', buffering=0) as f:
+                while remaining and (read_count := f.readinto(buffer[: min(remaining, self.buffer_size)])):
+                    for hasher in hashers.values():
+                        hasher.update(buffer[:read_count])
+                    if part.indexer:
+                        part.indexer.update(buffer[:read_count])
+                    remaining -= read_count
+        return hashers
+
+    def get_buffer(self) -> memoryview:
+        """
+        Returns this thread's reusable buffer, allocating it on first use.
+        Called by transfer() and seed_hashers().
+        """
+        if not hasattr(self.thread_data, 'buffer'):
+            self.thread_data.buffer = memoryview(bytearray(self.buffer_size))
+        return self.thread_data.buffer
+
+    def verify_checksums(self, file: CollectionFile, part: PartFile, hashers: dict) -> None:
+        """
+        Compares the computed hashes with the WASAPI checksums; a mismatch discards the `.part` file.
+        Called by download_file().
+        """
+        for name, hasher in hashers.items():
+            expected: str = getattr(file, name)
+            if hasher.hexdigest() != expected:
+                part.discard()
+                raise ChecksumMismatchError(f'{name} mismatch; expected ``{expected}``, got ``{hasher.hexdigest()}``')
+        return
+
+    ## end class DownloadWorker
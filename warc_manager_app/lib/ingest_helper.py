@@ -0,0 +1,90 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from warc_manager_app.models import Collection, CollectionFile
+
+log = logging.getLogger(__name__)
+
+
+class CollectionFileIngester:
+    """
+    Writes WASAPI file-records to `CollectionFile` rows, in batches, as pages arrive.
+    - Upserts on (collection, filename), so re-ingesting a collection updates its rows in place instead of
+        duplicating them; a row's `download_state` and `bytes_transferred` are left alone.
+    - Each batch is its own short transaction, so no lock is held while the next WASAPI page is being fetched.
+    - Reports throughput as rows-per-second.
+    Called by request_collection_helper.store_pages().
+    """
+
+    UPDATE_FIELDS = ('size', 'md5', 'sha1', 'crawl_time', 'locations')
+
+    def __init__(self, collection: Collection, batch_size: int | None = None):
+        self.collection: Collection = collection
+        self.batch_size: int = batch_size or settings.COLLECTION_FILE_BATCH_SIZE
+        self.pending: list[CollectionFile] = []
+        self.rows_written: int = 0
+        self.seconds_writing: float = 0.0
+        ## mysql upserts on any unique key, and refuses an explicit conflict-target
+        self.unique_fields: list[str] | None = (
+            ['collection', 'filename'] if connection.features.supports_update_conflicts_with_target else None
+        )
+
+    def add_page(self, files: list[dict]) -> None:
+        """
+        Queues a page's file-records, writing out each full batch.
+        Called by request_collection_helper.store_pages().
+        """
+        self.pending.extend(build_collection_file(self.collection, file) for file in files)
+        while len(self.pending) >= self.batch_size:
+            self.write_batch(self.pending[: self.batch_size])
+            self.pending = self.pending[self.batch_size :]
+        return
+
+    def finish(self) -> dict:
+        """
+        Writes any remaining records; returns the ingest stats.
+        Called by request_collection_helper.store_pages().
+        """
+        if self.pending:
+            self.write_batch(self.pending)
+            self.pending = []
+        rows_per_second: float = self.rows_written / self.seconds_writing if self.seconds_writing else 0.0
+        stats = {'rows_written': self.rows_written, 'rows_per_second': round(rows_per_second, 1)}
+        log.info(f'ingested collection ``{self.collection.collection_id}``; stats, ``{stats}``')
+        return stats
+
+    def write_batch(self, batch: list[CollectionFile]) -> None:
+        """
+        Upserts one batch inside its own transaction.
+        Called by add_page() and finish().
+        """
+        start: float = time.perf_counter()
+        with transaction.atomic():
+            CollectionFile.objects.bulk_create(
+                batch, update_conflicts=True, unique_fields=self.unique_fields, update_fields=self.UPDATE_FIELDS
+            )
+        self.seconds_writing += time.perf_counter() - start
+        self.rows_written += len(batch)
+        return
+
+    ## end class CollectionFileIngester
+
+
+def build_collection_file(collection: Collection, file: dict) -> CollectionFile:
+    """
+    Maps a WASAPI file-record to an (unsaved) `CollectionFile`.
+    Called by CollectionFileIngester.add_page().
+    """
+    checksums: dict = file.get('checksums') or {}
+    return CollectionFile(
+        collection=collection,
+        filename=file['filename'],
+        size=file['size'],
+        md5=checksums.get('md5', ''),
+        sha1=checksums.get('sha1', ''),
+        crawl_time=file.get('crawl-time') or file.get('store-time') or '',
+        locations=file.get('locations', []),
+    )
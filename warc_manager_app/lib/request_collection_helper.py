@@ -1,68 +1,112 @@
+import datetime
 import logging
+import math
 import pprint
-from typing import List, Optional
+import re
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Deque, Iterator, List, Optional
+from urllib import parse
 
 import httpx
+from asgiref.sync import sync_to_async
+from django import db
 from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, Max, Q, Sum
 from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+
+from warc_manager_app.lib import download_engine, warc_index, warc_reader, wasapi_client
+from warc_manager_app.lib.ingest_helper import CollectionFileIngester
+from warc_manager_app.models import Collection, CollectionFile, UserProfile
 
 log = logging.getLogger(__name__)
 
+WASAPI_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+PROGRESS_FIELDS = [
+    'item_count',
+    'size_in_bytes',
+    'files_downloaded',
+    'bytes_downloaded',
+    'download_rate',
+    'progress_updated_at',
+]
+CRAWL_SLOTS = threading.BoundedSemaphore(settings.WASAPI_CRAWL_WORKERS)  # listing-crawls running at once, per process
+
+
+class WasapiRequestFailed(Exception):
+    """
+    Raised when WASAPI refuses a check's first page (a non-200, after retries); unlike an empty listing,
+      it says nothing about the collection, so the crawl is marked failed, and nothing is refreshed.
+    """
+
+
+class CrawlLeaseLost(Exception):
+    """
+    Raised when a stalled crawl's lease has been taken over by a newer crawl of the same collection.
+    """
+
 
-def get_recent_collections() -> list:
+def get_recent_collections(before: str | None = None, status: str | None = None) -> dict:
     """
-    Shows the recent collections.
-    Dummy implementation for now.
+    Returns a page of the most-recently-updated collections, newest first, and the cursor for the next (older) page.
+    - Keyset-paginated on (`updated_at`, `id`), so a page costs the same however deep it is and however big the table is;
+        an optional status-filter uses the (`status`, `updated_at`) index.
+    - Only the columns the template shows are fetched; a running download's progress comes from its counter-columns.
+    - A malformed `before`-cursor (say, a hand-edited url) gives the first page.
     Called by views.request_collection().
     """
-    log.debug('Showing recent collections')
-    dummy_data = [
-        {
-            'date': '2024-09-01',
-            'collection_id': 1,
-            'title': 'Test Collection 1',
-            'number_of_items': 25,
-            'total_size': '100 MB',
-            'status': 'complete',
-        },
-        {
-            'date': '2024-09-02',
-            'collection_id': 2,
-            'title': 'Test Collection 2',
-            'number_of_items': 50,
-            'total_size': '200 MB',
-            'status': 'in-progress',
-        },
+    log.debug(f'Showing recent collections; before, ``{before}``; status, ``{status}``')
+    page_size: int = settings.RECENT_COLLECTIONS_PAGE_SIZE
+    collections = Collection.objects.order_by('-updated_at', '-id')
+    if status:
+        collections = collections.filter(status=status)
+    try:
+        cursor: tuple[datetime.datetime, uuid.UUID] | None = parse_recent_collections_cursor(before) if before else None
+    except ValueError:
+        log.warning(f'malformed recent-collections cursor, ``{before}``; showing the first page')
+        cursor = None
+    if cursor:
+        (before_updated_at, before_id) = cursor
+        collections = collections.filter(
+            Q(updated_at__lt=before_updated_at) | Q(updated_at=before_updated_at, id__lt=before_id)
+        )
+    rows: list[dict] = list(
+        collections.values('id', 'collection_id', 'status', 'updated_at', *PROGRESS_FIELDS)[: page_size + 1]
+    )
+    next_cursor: str | None = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = f'{rows[-1]["updated_at"].isoformat()}_{rows[-1]["id"]}'
+    items: list[dict] = [
         {
-            'date': '2024-09-03',
-            'collection_id': 3,
-            'title': 'Test Collection 3',
-            'number_of_items': 75,
-            'total_size': '150 MB',
-            'status': 'complete',
-        },
-        {
-            'date': '2024-09-04',
-            'collection_id': 4,
-            'title': 'Test Collection 4',
-            'number_of_items': 100,
-            'total_size': '2.1 GB',
-            'status': 'in-progress',
-        },
-        {
-            'date': '2024-09-01',
-            'collection_id': 5,
-            'title': 'Test Collection 5',
-            'number_of_items': 125,
-            'total_size': '300 MB',
-            'status': 'complete',
-        },
+            'id': row['id'],
+            'date': row['updated_at'].date().isoformat(),
+            'collection_id': row['collection_id'],
+            'title': f'Collection {row["collection_id"]}',
+            'number_of_items': row['item_count'],
+            'total_size': format_size_gb(row['size_in_bytes']),
+            'status': Collection.Status(row['status']).label,
+            'progress': make_download_progress_dict(row) if row['status'] == Collection.Status.IN_PROGRESS else None,
+        }
+        for row in rows
     ]
-    ## sort dict by date descending
-    dummy_data.sort(key=lambda x: x['date'], reverse=True)
-    return dummy_data
+    return {'items': items, 'next_cursor': next_cursor}
 
-    ## end def get_recent_collections()
+
+def parse_recent_collections_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    """
+    Splits a `next_cursor` from get_recent_collections() back into its `updated_at` and `id`.
+    Called by get_recent_collections().
+    """
+    (updated_at, collection_pk) = cursor.rsplit('_', 1)
+    return (datetime.datetime.fromisoformat(updated_at), uuid.UUID(collection_pk))
 
 
 def render_alert(
@@ -79,14 +123,28 @@ def render_alert(
     return HttpResponse(html_content, status=status)
 
 
-def check_collection_status(collection_id):
+def check_collection_status(collection_id: str) -> dict:
     """
     Checks if the collection is already downloaded or in progress.
-    Dummy implementation for now.
-    Called by views.hlpr_check_coll_id().
+    Queued collections count as in progress.
+    Called by views.hlpr_check_coll_id() and start_batch_check().
     """
     log.debug(f'Checking status for collection ID: {collection_id}')
-    return {'exists': False}  # Return True if exists or in progress
+    status: str | None = Collection.objects.filter(collection_id=collection_id).values_list('status', flat=True).first()
+    log.debug(f'status, ``{status}``')
+    return make_status_dict(status)
+
+
+def make_status_dict(status: str | None) -> dict:
+    """
+    Maps a `Collection.status` (or None, for no record) to the status dict handled by handle_status().
+    Called by check_collection_status() and get_batch_progress().
+    """
+    if status == Collection.Status.COMPLETE:
+        return {'exists': 'completed'}
+    elif status in [Collection.Status.QUEUED_FOR_START, Collection.Status.QUEUED_FOR_REDO, Collection.Status.IN_PROGRESS]:
+        return {'exists': 'in_progress'}
+    return {'exists': False}
 
 
 def handle_status(status: dict) -> HttpResponse | None:
@@ -109,38 +167,527 @@ def handle_status(status: dict) -> HttpResponse | None:
         return render_alert('Unknown error occurred', status=500)
 
 
-def get_collection_data(collection_id) -> dict | None:
+def start_collection_check(collection_id: str, force_refresh: bool = False) -> dict:
     """
-    Gets the initial collection data overview for the given collection.
-    Dummy implementation for now.
+    Starts (or joins) the WASAPI crawl behind a collection-check, returning after at most one page-fetch.
+    - Returns the overview stored on the `Collection` record if it was updated within
+        `COLLECTION_OVERVIEW_CACHE_TTL_SECONDS`, without calling WASAPI.
+    - If the stored overview is stale, asks WASAPI only for files newer than the stored crawl-time watermark.
+    - Otherwise (or if `force_refresh` is True), crawls the full WASAPI listing.
+    - A crawl's first page is fetched here; the rest are fetched by a background thread,
+        which records its progress on the `Collection` record for the check-page to poll.
+    - Only one crawl per collection runs at a time, across all web-processes;
+        concurrent checks of the same collection join it, and share its result.
+    Returns a check-result dict for render_check_result().
     Called by views.hlpr_check_coll_id().
     """
-    log.debug(f'getting data for collection ID: {collection_id}')
-    collection_data_prepper = CollectionDataPrepper(collection_id)
-    initial_collection_data: dict | None = collection_data_prepper.grab_initial_collection_data()
-    if initial_collection_data:
-        collection_data_prepper.get_rest_of_files(initial_collection_data)
-        overview_data = collection_data_prepper.build_overview_dict()
+    log.debug(f'checking collection ID: {collection_id}; force_refresh, ``{force_refresh}``')
+    plan: dict = plan_collection_check(collection_id, force_refresh)
+    if plan['state'] != 'crawl':
+        return plan
+    try:
+        initial_collection_data: dict | None = grab_first_page(plan)
+    except WasapiRequestFailed as e:
+        log.warning(f'first page of collection ``{collection_id}`` refused; ``{e}``')
+        return fail_collection_crawl(plan)
+    except Exception:
+        release_crawl(plan['collection'], plan['lease'], Collection.CrawlState.FAILED)
+        raise
+    return launch_collection_crawl(plan, initial_collection_data)
+
+
+def grab_first_page(plan: dict) -> dict | None:
+    """
+    Fetches the first WASAPI page for a planned crawl; touches no db, so it can run on any thread.
+    Called by start_collection_check() and start_batch_check().
+    """
+    collection_id: str = plan['collection'].collection_id
+    collection_data_prepper = CollectionDataPrepper(collection_id, crawl_time_after=plan['crawl_time_after'])
+    return collection_data_prepper.grab_initial_collection_data()
+
+
+async def start_collection_check_async(collection_id: str, force_refresh: bool = False) -> dict:
+    """
+    Async counterpart of start_collection_check(); the first page is fetched through `httpx.AsyncClient`,
+      so the check doesn't hold a worker thread while waiting on WASAPI.
+    Called by views.hlpr_check_coll_id_async().
+    """
+    log.debug(f'checking collection ID: {collection_id}; force_refresh, ``{force_refresh}``')
+    plan: dict = await sync_to_async(plan_collection_check)(collection_id, force_refresh)
+    if plan['state'] != 'crawl':
+        return plan
+    try:
+        collection_data_prepper = AsyncCollectionDataPrepper(collection_id, crawl_time_after=plan['crawl_time_after'])
+        initial_collection_data: dict | None = await collection_data_prepper.grab_initial_collection_data_async()
+    except WasapiRequestFailed as e:
+        log.warning(f'first page of collection ``{collection_id}`` refused; ``{e}``')
+        return await sync_to_async(fail_collection_crawl)(plan)
+    except Exception:
+        await sync_to_async(release_crawl)(plan['collection'], plan['lease'], Collection.CrawlState.FAILED)
+        raise
+    return await sync_to_async(launch_collection_crawl)(plan, initial_collection_data)
+
+
+## batch checks ----------------------------------------------------
+
+
+def parse_collection_ids(raw_collection_ids: str) -> list[str]:
+    """
+    Splits a pasted list of collection-ids (separated by commas, spaces, or newlines); drops duplicates, keeping order.
+    Called by views.hlpr_check_coll_ids_batch(), views.hlpr_batch_progress(), and views.download_progress().
+    """
+    return list(dict.fromkeys(part for part in re.split(r'[\s,]+', raw_collection_ids) if part))
+
+
+def start_batch_check(collection_ids: list[str], force_refresh: bool = False) -> list[dict]:
+    """
+    Starts (or joins) the checks of several collections at once, returning after their first pages.
+    - Each collection is planned as by start_collection_check(): cached, joining a running crawl, or needing a crawl;
+        collections already downloading or downloaded aren't checked.
+    - The first pages of the collections needing a crawl are fetched concurrently, over at most `BATCH_CHECK_WORKERS`
+        threads, so the batch takes about as long as its slowest first page; the rest of each listing is crawled
+        in the background, as for a single check.
+    - db work stays on the calling thread; the pool threads only talk to WASAPI.
+    - If planning fails part-way, the crawls already claimed are released as failed, so they don't sit claimed until stale.
+    Returns a row-dict per collection (in the given order) for render_batch_results().
+    Called by views.hlpr_check_coll_ids_batch().
+    """
+    log.debug(f'batch-checking ``{len(collection_ids)}`` collections; force_refresh, ``{force_refresh}``')
+    results: dict[str, dict] = {}
+    plans: dict[str, dict] = {}
+    try:
+        for collection_id in collection_ids:
+            status: dict = check_collection_status(collection_id)
+            if status['exists']:
+                results[collection_id] = {'state': status['exists']}
+                continue
+            plan: dict = plan_collection_check(collection_id, force_refresh)
+            if plan['state'] == 'crawl':
+                plans[collection_id] = plan
+            else:
+                results[collection_id] = plan
+    except Exception:
+        log.exception(f'problem planning batch-check; releasing ``{len(plans)}`` claimed crawls')
+        for plan in plans.values():
+            fail_collection_crawl(plan)
+        raise
+    if plans:
+        ## all first pages are in before any crawl is launched, so they don't queue for connections behind its pages
+        with ThreadPoolExecutor(max_workers=min(settings.BATCH_CHECK_WORKERS, len(plans))) as executor:
+            futures: dict[str, Future] = {
+                collection_id: executor.submit(grab_first_page, plan) for collection_id, plan in plans.items()
+            }
+        for collection_id, future in futures.items():
+            plan = plans[collection_id]
+            try:
+                results[collection_id] = launch_collection_crawl(plan, future.result())
+            except WasapiRequestFailed as e:
+                log.warning(f'first page of collection ``{collection_id}`` refused; ``{e}``')
+                results[collection_id] = fail_collection_crawl(plan)
+            except Exception:
+                log.exception(f'problem with first page of collection ``{collection_id}``')
+                release_crawl(plan['collection'], plan['lease'], Collection.CrawlState.FAILED)
+                results[collection_id] = {'state': 'failed'}
+    return [{'collection_id': collection_id, **results[collection_id]} for collection_id in collection_ids]
+
+
+def get_batch_progress(collection_ids: list[str]) -> list[dict]:
+    """
+    Returns a row-dict per collection (in the given order) for render_batch_results(), from one query.
+    Called by views.hlpr_batch_progress().
+    """
+    collections: dict[str, Collection] = {
+        collection.collection_id: collection for collection in Collection.objects.filter(collection_id__in=collection_ids)
+    }
+    rows: list[dict] = []
+    for collection_id in collection_ids:
+        collection: Collection | None = collections.get(collection_id)
+        status: dict = make_status_dict(collection.status if collection else None)
+        if status['exists']:
+            check_result: dict = {'state': status['exists']}
+        else:
+            check_result = make_check_result(collection, with_transfer_size=False)
+        rows.append({'collection_id': collection_id, **check_result})
+    return rows
+
+
+def plan_collection_check(collection_id: str, force_refresh: bool) -> dict:
+    """
+    Decides, from the `Collection` record, whether a check can be answered from the cache,
+      should join a crawl that's already running, or needs a (full or incremental) crawl;
+      a crawl is only planned once this check holds the collection's crawl-lease.
+    - An incremental crawl carries the `crawl_time_after` value; WARCs are only ever added, so the newest stored
+        `crawl_time` (less `WASAPI_INCREMENTAL_OVERLAP_SECONDS`, to catch WARCs stored late) bounds what needs fetching.
+    - A record whose last crawl failed part-way gets a full crawl.
+    - A first check creates the record, to hold the lease; launch_collection_crawl() removes it if WASAPI lists nothing.
+    Called by start_collection_check() and start_collection_check_async().
+    """
+    collection: Collection | None = Collection.objects.filter(collection_id=collection_id).first()
+    if collection and is_crawl_running(collection):
+        log.debug('joining running crawl')
+        return {'state': 'crawling', 'progress': make_progress_dict(collection)}
+    crawl_time_after: str | None = None
+    if collection and not force_refresh and collection.crawl_state == Collection.CrawlState.IDLE:
+        if is_overview_fresh(collection):
+            log.debug('returning cached overview')
+            return {'state': 'ready', 'overview': make_collection_overview_dict(collection)}
+        watermark: datetime.datetime | None = get_crawl_time_watermark(collection)
+        log.debug(f'crawl-time watermark, ``{watermark}``')
+        if watermark:
+            crawl_time_after = make_crawl_time_after(watermark)
+    created: bool = False
+    if collection is None:
+        (collection, created) = Collection.objects.get_or_create(collection_id=collection_id)
+    lease: uuid.UUID | None = claim_crawl(collection)
+    if lease is None:  # another check claimed it first
+        log.debug('lost the crawl-claim; joining that crawl')
+        collection.refresh_from_db()
+        return {'state': 'crawling', 'progress': make_progress_dict(collection)}
+    return {
+        'state': 'crawl',
+        'collection': collection,
+        'created': created,
+        'lease': lease,
+        'crawl_time_after': crawl_time_after,
+    }
+
+
+def claim_crawl(collection: Collection) -> uuid.UUID | None:
+    """
+    Claims the collection's crawl-lease, with one conditional update, so it's atomic across processes.
+    - The claim succeeds if no crawl is running, or the running one has gone stale (its lease is taken over).
+    - Returns the new lease-token, or None if another crawl holds the lease.
+    Called by plan_collection_check().
+    """
+    now: datetime.datetime = timezone.now()
+    stale_before: datetime.datetime = now - datetime.timedelta(seconds=settings.WASAPI_CRAWL_STALE_SECONDS)
+    lease: uuid.UUID = uuid.uuid4()
+    claimed: int = (
+        Collection.objects.filter(pk=collection.pk)
+        .filter(
+            ~Q(crawl_state=Collection.CrawlState.CRAWLING)
+            | Q(crawl_updated_at__isnull=True)
+            | Q(crawl_updated_at__lt=stale_before)
+        )
+        .update(
+            crawl_state=Collection.CrawlState.CRAWLING,
+            crawl_lease=lease,
+            crawl_files_expected=0,
+            crawl_files_listed=0,
+            crawl_bytes_listed=0,
+            crawl_updated_at=now,
+        )
+    )
+    log.debug(f'crawl-claim for ``{collection.collection_id}``; claimed, ``{bool(claimed)}``')
+    return lease if claimed else None
+
+
+def release_crawl(collection: Collection, lease: uuid.UUID, crawl_state: str) -> bool:
+    """
+    Ends the crawl (as IDLE or FAILED), if the lease is still this crawl's; returns whether it was.
+    Called by start_collection_check(), launch_collection_crawl(), and finish_collection_crawl().
+    """
+    released: int = Collection.objects.filter(pk=collection.pk, crawl_lease=lease).update(
+        crawl_state=crawl_state, crawl_lease=None
+    )
+    return bool(released)
+
+
+def record_crawl_progress(collection: Collection, lease: uuid.UUID, files_listed: int, bytes_listed: int) -> None:
+    """
+    Records the crawl's progress, which doubles as the lease's heartbeat.
+    Raises CrawlLeaseLost if the lease was taken over (after this crawl stalled), so the crawl stops.
+    Called by launch_collection_crawl() and store_pages().
+    """
+    updated: int = Collection.objects.filter(pk=collection.pk, crawl_lease=lease).update(
+        crawl_files_listed=files_listed, crawl_bytes_listed=bytes_listed, crawl_updated_at=timezone.now()
+    )
+    if not updated:
+        raise CrawlLeaseLost(f'crawl-lease for collection ``{collection.collection_id}`` was taken over')
+    return
+
+
+def launch_collection_crawl(plan: dict, initial_data: dict | None) -> dict:
+    """
+    Records the first page's counts on the `Collection` record, and hands the rest of the crawl to a background thread.
+    - An incremental crawl that lists nothing new just refreshes the record's `updated_at`.
+    - A record created only to hold the lease is removed if WASAPI lists nothing.
+    Called by start_collection_check() and start_collection_check_async().
+    """
+    collection: Collection = plan['collection']
+    lease: uuid.UUID = plan['lease']
+    if initial_data is None:
+        if plan['crawl_time_after']:  # no files crawled since the watermark
+            release_crawl(collection, lease, Collection.CrawlState.IDLE)
+            collection.save(update_fields=['updated_at'])
+            return {'state': 'ready', 'overview': make_collection_overview_dict(collection)}
+        if plan['created']:
+            Collection.objects.filter(pk=collection.pk, crawl_lease=lease).delete()
+        else:
+            release_crawl(collection, lease, Collection.CrawlState.IDLE)
+        return {'state': 'not_found'}
+    first_files: list[dict] = initial_data.get('files', [])
+    Collection.objects.filter(pk=collection.pk, crawl_lease=lease).update(crawl_files_expected=initial_data.get('count', 0))
+    record_crawl_progress(collection, lease, len(first_files), sum(file['size'] for file in first_files))
+    collection.refresh_from_db()
+    launch_crawl_thread(collection, lease, initial_data, plan['crawl_time_after'])
+    return {'state': 'crawling', 'progress': make_progress_dict(collection)}
+
+
+def fail_collection_crawl(plan: dict) -> dict:
+    """
+    Ends a claimed crawl that can't go on (say, WASAPI refused its first page), as `FAILED`, leaving `updated_at` alone,
+      so the stored overview isn't taken as freshly confirmed; a record created only to hold the lease is removed.
+    Called by start_collection_check(), start_collection_check_async(), and start_batch_check().
+    """
+    collection: Collection = plan['collection']
+    if plan['created']:
+        Collection.objects.filter(pk=collection.pk, crawl_lease=plan['lease']).delete()
     else:
-        overview_data = None
-    log.debug(f'overview_data, ``{overview_data}``')
-    return overview_data
+        release_crawl(collection, plan['lease'], Collection.CrawlState.FAILED)
+    return {'state': 'failed'}
+
+
+def launch_crawl_thread(collection: Collection, lease: uuid.UUID, initial_data: dict, crawl_time_after: str | None) -> None:
+    """
+    Starts the background thread that fetches and stores the rest of the crawl.
+    Called by launch_collection_crawl().
+    """
+    thread = threading.Thread(
+        target=run_crawl_thread,
+        args=(collection, lease, initial_data, crawl_time_after),
+        name=f'crawl-{collection.collection_id}',
+        daemon=True,  # a crawl cut short by shutdown goes stale, and the next check starts over
+    )
+    thread.start()
+    return
+
+
+def run_crawl_thread(collection: Collection, lease: uuid.UUID, initial_data: dict, crawl_time_after: str | None) -> None:
+    """
+    Runs the crawl once one of the `WASAPI_CRAWL_WORKERS` slots is free, then closes the thread's db-connection;
+      so a big batch-check queues its crawls rather than running them all at once.
+    Called by launch_crawl_thread(), in the background thread.
+    """
+    try:
+        wait_for_crawl_slot(collection, lease)
+        try:
+            finish_collection_crawl(collection, lease, initial_data, crawl_time_after)
+        finally:
+            CRAWL_SLOTS.release()
+    except CrawlLeaseLost:
+        log.warning(f'queued crawl of collection ``{collection.collection_id}`` dropped; its lease was taken over')
+    finally:
+        db.connection.close()
+    return
+
+
+def wait_for_crawl_slot(collection: Collection, lease: uuid.UUID) -> None:
+    """
+    Blocks until one of the `WASAPI_CRAWL_WORKERS` slots is free, renewing the lease's heartbeat every third of
+      `WASAPI_CRAWL_STALE_SECONDS` meanwhile; so a queued crawl still shows as running to the progress-polls,
+      and isn't taken for stale by another check.
+    Raises CrawlLeaseLost if the lease was taken over anyway (say, by a forced re-check's own crawl).
+    Called by run_crawl_thread().
+    """
+    while not CRAWL_SLOTS.acquire(timeout=settings.WASAPI_CRAWL_STALE_SECONDS / 3):
+        renewed: int = Collection.objects.filter(pk=collection.pk, crawl_lease=lease).update(crawl_updated_at=timezone.now())
+        if not renewed:
+            raise CrawlLeaseLost(f'crawl-lease for collection ``{collection.collection_id}`` was taken over')
+        log.debug(f'crawl of collection ``{collection.collection_id}`` waiting for a crawl-slot')
+    return
+
+
+def finish_collection_crawl(
+    collection: Collection, lease: uuid.UUID, initial_data: dict, crawl_time_after: str | None
+) -> None:
+    """
+    Fetches and stores the rest of the crawl's pages, then marks the crawl done (or failed).
+    - If the lease was taken over, stops without touching the crawl-state; the new crawl owns it.
+    Called by run_crawl_thread().
+    """
+    try:
+        collection_data_prepper = CollectionDataPrepper(collection.collection_id, crawl_time_after=crawl_time_after)
+        store_pages(collection, lease, collection_data_prepper, initial_data)
+    except CrawlLeaseLost:
+        log.warning(f'crawl of collection ``{collection.collection_id}`` stopped; its lease was taken over')
+        return
+    except Exception:
+        log.exception(f'crawl of collection ``{collection.collection_id}`` failed')
+        release_crawl(collection, lease, Collection.CrawlState.FAILED)
+        return
+    release_crawl(collection, lease, Collection.CrawlState.IDLE)
+    log.debug(f'crawl of collection ``{collection.collection_id}`` finished')
+    return
+
+
+def get_crawl_progress(collection_id: str) -> dict:
+    """
+    Returns a check-result dict for the collection's crawl: still running, finished, or failed.
+    Called by views.hlpr_crawl_progress().
+    """
+    collection: Collection | None = Collection.objects.filter(collection_id=collection_id).first()
+    return make_check_result(collection)
+
+
+def make_check_result(collection: Collection | None, with_transfer_size: bool = True) -> dict:
+    """
+    Builds the check-result dict from the collection's record: not found, still crawling, failed, or ready.
+    The batch table leaves out the size to transfer (`with_transfer_size` False), as it takes a query per collection.
+    Called by get_crawl_progress() and get_batch_progress().
+    """
+    if collection is None:
+        return {'state': 'not_found'}
+    if is_crawl_running(collection):
+        return {'state': 'crawling', 'progress': make_progress_dict(collection)}
+    if collection.crawl_state != Collection.CrawlState.IDLE:  # failed, or went stale
+        return {'state': 'failed'}
+    if not with_transfer_size:
+        return {'state': 'ready', 'overview': make_overview_dict(collection.item_count, collection.size_in_bytes)}
+    return {'state': 'ready', 'overview': make_collection_overview_dict(collection)}
+
+
+def is_crawl_running(collection: Collection) -> bool:
+    """
+    Checks whether the collection's crawl is running, ie, it's marked as crawling and has recorded a page recently.
+    Called by plan_collection_check() and get_crawl_progress().
+    """
+    if collection.crawl_state != Collection.CrawlState.CRAWLING or collection.crawl_updated_at is None:
+        return False
+    age_seconds: float = (timezone.now() - collection.crawl_updated_at).total_seconds()
+    return age_seconds < settings.WASAPI_CRAWL_STALE_SECONDS
+
+
+def make_progress_dict(collection: Collection) -> dict:
+    """
+    Builds the crawl-progress dict used by the progress fragment.
+    Called by plan_collection_check(), launch_collection_crawl(), and get_crawl_progress().
+    """
+    return {
+        'files_listed': collection.crawl_files_listed,
+        'files_expected': collection.crawl_files_expected,
+        'size_listed': format_size_gb(collection.crawl_bytes_listed),
+    }
+
+
+def get_crawl_time_watermark(collection: Collection) -> datetime.datetime | None:
+    """
+    Returns the newest `crawl_time` among the collection's stored files, or None.
+    Called by plan_collection_check().
+    """
+    newest: str | None = collection.files.aggregate(newest=Max('crawl_time'))['newest']
+    if not newest:
+        return None
+    return datetime.datetime.fromisoformat(newest.replace('Z', '+00:00'))
+
+
+def make_crawl_time_after(watermark: datetime.datetime) -> str:
+    """
+    Returns the WASAPI-formatted `crawl-time-after` value for an incremental refresh:
+      the watermark less `WASAPI_INCREMENTAL_OVERLAP_SECONDS`, to catch WARCs stored late.
+    Called by plan_collection_check().
+    """
+    crawl_time_after: datetime.datetime = watermark - datetime.timedelta(seconds=settings.WASAPI_INCREMENTAL_OVERLAP_SECONDS)
+    return crawl_time_after.strftime(WASAPI_TIME_FORMAT)
+
+
+def store_pages(
+    collection: Collection, lease: uuid.UUID, collection_data_prepper: 'CollectionDataPrepper', initial_data: dict
+) -> None:
+    """
+    Hands each WASAPI page's files to the ingester as the page arrives, recording the crawl's progress,
+      then updates the collection's totals with one aggregate query.
+    - If a page still fails after its retries, the pages already fetched are written out before the error propagates;
+        the re-check's full crawl then upserts over them.
+    Called by finish_collection_crawl().
+    """
+    ingester = CollectionFileIngester(collection)
+    try:
+        for page_data in collection_data_prepper.iter_pages(initial_data):
+            collection_data_prepper.fold_page(page_data)
+            ingester.add_page(page_data.get('files', []))
+            record_crawl_progress(
+                collection, lease, collection_data_prepper.file_count, collection_data_prepper.total_size_in_bytes
+            )
+    finally:
+        ingester.finish()
+    update_collection_totals(collection)
+    return
+
+
+def update_collection_totals(collection: Collection) -> None:
+    """
+    Sets the collection's item-count and size from its stored files, with one aggregate query.
+    Called by store_pages().
+    """
+    totals: dict = collection.files.aggregate(item_count=Count('id'), size_in_bytes=Sum('size'))
+    collection.item_count = totals['item_count']
+    collection.size_in_bytes = totals['size_in_bytes'] or 0
+    collection.save(update_fields=['item_count', 'size_in_bytes', 'updated_at'])
+    log.debug(f'stored totals, ``{totals}``')
+    return
+
+
+def is_overview_fresh(collection: Collection) -> bool:
+    """
+    Checks whether the stored overview is within the cache-TTL.
+    Called by plan_collection_check().
+    """
+    age_seconds: float = (timezone.now() - collection.updated_at).total_seconds()
+    log.debug(f'cached overview age, ``{age_seconds}`` seconds')
+    return age_seconds < settings.COLLECTION_OVERVIEW_CACHE_TTL_SECONDS
+
+
+def make_overview_dict(item_count: int, size_in_bytes: int, transfer_bytes: int | None = None) -> dict:
+    """
+    Builds the overview dict used by the download-confirmation form;
+      with `transfer_bytes`, also the size that would actually be fetched.
+    Called by make_collection_overview_dict(), make_check_result(), and CollectionDataPrepper.build_overview_dict().
+    """
+    overview: dict = {'total_size': format_size_gb(size_in_bytes), 'item_count': item_count}
+    if transfer_bytes is not None:
+        overview['transfer_size'] = format_size_gb(transfer_bytes)
+    return overview
+
+
+def make_collection_overview_dict(collection: Collection) -> dict:
+    """
+    Builds the overview dict from the collection's record, counting only the bytes not already on disk
+      (in this collection or, by content, another) as to-transfer.
+    Called by plan_collection_check(), launch_collection_crawl(), and make_check_result().
+    """
+    return make_overview_dict(collection.item_count, collection.size_in_bytes, collection.bytes_to_transfer())
+
+
+def format_size_gb(size_in_bytes: int) -> str:
+    """
+    Formats a byte-count for display, eg `2.10 GB`.
+    Called by make_overview_dict(), make_progress_dict(), make_download_progress_dict(), and get_recent_collections().
+    """
+    total_size_gb: float = size_in_bytes / (1024**3)
+    return f'{total_size_gb:.2f} GB'
 
 
 def render_download_confirmation_form(api_data: dict, collection_id: str, csrf_token: str | None) -> str:
     """
     Preps html for the download confirmation form.
     This is triggered by a previous htmx POST request that gets overview collection data
-    Called by views.hlpr_check_coll_id().
+    The size to transfer leaves out files already downloaded, which the download worker links instead.
+    Called by render_check_result().
     """
     html_content = f"""
     <div>
-        Number of items: {api_data["item_count"]}, Total size of all items: {api_data['total_size']}
+        Number of items: {api_data["item_count"]}, Total size of all items: {api_data['total_size']},
+        Size to transfer: {api_data.get('transfer_size', api_data['total_size'])}
     </div>
     <form id="confirm_download" hx-post="/hlpr_initiate_download/" hx-target="#response" hx-swap="innerHTML">
         <input type="hidden" name="csrfmiddlewaretoken" value="{csrf_token}">
-        <input type="hidden" name="coll_id" value="{collection_id}">
+        <input type="hidden" name="collection_id" value="{collection_id}">
         <input type="hidden" name="action" value="really_start_download">
+        <label for="priority">Priority:</label>
+        <select id="priority" name="priority">
+            {''.join(f'<option value="{value}">{label}</option>' for (value, label) in Collection.Priority.choices)}
+        </select>
         <button
             class="btn">
             Confirm start download
@@ -150,34 +697,280 @@ def render_download_confirmation_form(api_data: dict, collection_id: str, csrf_t
     return html_content
 
 
-def start_download(collection_id: str):
-    log.debug(f'Starting download for collection ID: {collection_id}')
-    ## dummy implementation
-    return
+def render_crawl_progress(progress: dict, collection_id: str) -> str:
+    """
+    Preps html for the crawl-progress fragment, which re-polls until the crawl finishes;
+      then the poll's response (the download confirmation form, or an alert) replaces it.
+    Called by render_check_result().
+    """
+    progress_url: str = f'{reverse("hlpr_crawl_progress_url")}?{parse.urlencode({"collection_id": collection_id})}'
+    if progress['files_expected']:
+        message = (
+            f'Listing files: {progress["files_listed"]} of {progress["files_expected"]}, {progress["size_listed"]} so far...'
+        )
+    else:  # joined a crawl that hasn't recorded its first page yet
+        message = 'Listing files...'
+    html_content = f"""
+    <div
+        id="crawl_progress"
+        hx-get="{progress_url}"
+        hx-trigger="load delay:{settings.CRAWL_PROGRESS_POLL_SECONDS}s"
+        hx-swap="outerHTML">
+        {message}
+    </div>
+    """
+    return html_content
+
+
+def render_check_result(result: dict, collection_id: str, csrf_token: str | None) -> HttpResponse:
+    """
+    Returns the htmx response for a check-result: the download confirmation form, the crawl-progress fragment, or an alert.
+    Called by views.hlpr_check_coll_id(), views.hlpr_check_coll_id_async(), and views.hlpr_crawl_progress().
+    """
+    log.debug(f'check-result, ``{result}``')
+    if result['state'] == 'ready':
+        return HttpResponse(render_download_confirmation_form(result['overview'], collection_id, csrf_token))
+    elif result['state'] == 'crawling':
+        return HttpResponse(render_crawl_progress(result['progress'], collection_id))
+    elif result['state'] == 'failed':
+        return render_alert('Listing the collection from WASAPI failed; please check it again.', include_info_link=False)
+    else:
+        return render_alert(message='No collection data found.', include_info_link=False)
+
+
+def render_batch_results(rows: list[dict]) -> HttpResponse:
+    """
+    Returns the batch-check results as one table of counts and sizes.
+    While any listing-crawl runs, the table re-polls hlpr_batch_progress() and is replaced by the poll's response.
+    Called by views.hlpr_check_coll_ids_batch() and views.hlpr_batch_progress().
+    """
+    BATCH_STATE_LABELS: dict[str, str] = {
+        'ready': 'Ready',
+        'crawling': 'Listing files...',
+        'failed': 'Listing failed part-way; please check it again',
+        'not_found': 'No collection data found',
+        'in_progress': 'Download in progress',
+        'completed': 'Download completed',
+    }
+    table_rows: list[str] = []
+    for row in rows:
+        (item_count, total_size) = ('', '')
+        if row['state'] == 'ready':
+            (item_count, total_size) = (row['overview']['item_count'], row['overview']['total_size'])
+        elif row['state'] == 'crawling':
+            progress: dict = row['progress']
+            item_count = f'{progress["files_listed"]} of {progress["files_expected"] or "?"}'
+            total_size = f'{progress["size_listed"]} so far'
+        table_rows.append(
+            f'<tr><td>{escape(row["collection_id"])}</td><td>{item_count}</td><td>{total_size}</td>'
+            f'<td>{BATCH_STATE_LABELS.get(row["state"], "Unknown error occurred")}</td></tr>'
+        )
+    poll_attributes: str = ''
+    if any(row['state'] == 'crawling' for row in rows):
+        query: str = parse.urlencode({'collection_ids': ','.join(row['collection_id'] for row in rows)})
+        poll_attributes = (
+            f'hx-get="{reverse("hlpr_batch_progress_url")}?{query}" '
+            f'hx-trigger="load delay:{settings.CRAWL_PROGRESS_POLL_SECONDS}s" hx-swap="outerHTML"'
+        )
+    html_content = f"""
+    <div id="batch_results" {poll_attributes}>
+        <table class="styled-table">
+            <thead>
+                <tr><th>Collection ID</th><th>Count</th><th>Size</th><th>Status</th></tr>
+            </thead>
+            <tbody>
+                {''.join(table_rows)}
+            </tbody>
+        </table>
+    </div>
+    """
+    return HttpResponse(html_content)
+
+
+def can_initiate_downloads(user: User) -> bool:
+    """
+    Checks the user's `UserProfile.can_initiate_downloads` flag.
+    Called by views.hlpr_initiate_download().
+    """
+    return UserProfile.objects.filter(user_id=user.pk, can_initiate_downloads=True).exists()
+
+
+def parse_priority(raw_priority: str | None) -> int:
+    """
+    Returns the submitted download-priority, or `NORMAL` if it's missing or unknown.
+    Called by views.hlpr_initiate_download().
+    """
+    try:
+        priority = int(raw_priority or '')
+    except ValueError:
+        return Collection.Priority.NORMAL
+    return priority if priority in Collection.Priority.values else Collection.Priority.NORMAL
+
+
+def start_download(collection_id: str, user: User, priority: int = Collection.Priority.NORMAL) -> bool:
+    """
+    Enqueues the collection for the download worker, and returns right away.
+    The transfers themselves are run by the `run_download_worker` management command,
+      which shares its transfer-slots by priority, then between requesting users; see download_engine.DownloadScheduler.
+    Called by views.hlpr_initiate_download().
+    """
+    log.debug(f'Starting download for collection ID: {collection_id}; user, ``{user}``; priority, ``{priority}``')
+    return download_engine.enqueue_download(collection_id, user, priority)
+
+
+def is_crawl_marked_running(collection_id: str) -> bool:
+    """
+    Checks whether the collection is marked as crawling its file-list, ie, a check is underway, or went stale unreleased.
+    Called by views.hlpr_initiate_download(), to explain a refused download.
+    """
+    return Collection.objects.filter(collection_id=collection_id, crawl_state=Collection.CrawlState.CRAWLING).exists()
+
+
+def search_collection_index(collection_id: str, url: str, match_type: str, limit: int) -> list[str] | None:
+    """
+    Returns the collection's CDXJ index-lines for the url (`exact`), or for urls starting with it (`prefix`);
+      or None if the collection is unknown, or has no index yet (it's merged once the download completes).
+    Called by views.collection_index().
+    """
+    if not Collection.objects.filter(collection_id=collection_id).exists():  # also keeps the path to known collections
+        return None
+    index_path = download_engine.get_download_dir(collection_id) / warc_index.COLLECTION_INDEX_FILENAME
+    if not index_path.exists():
+        return None
+    return warc_index.search_index(index_path, url, match_type, limit)
+
+
+def read_collection_record(collection_id: str, filename: str, offset: int) -> dict | None:
+    """
+    Returns the record at `offset` of one of the collection's downloaded WARCs (headers, and a payload-preview),
+      or None if the file isn't one of the collection's, isn't on disk, or its listed name leaves the collection's directory.
+    Raises warc_reader.WarcRecordError if there's no record at the offset.
+    Called by views.warc_record().
+    """
+    if not download_engine.is_safe_filename(filename):
+        return None  # a listed `../` name isn't downloaded, but would still reach another collection's WARCs
+    if not CollectionFile.objects.filter(collection__collection_id=collection_id, filename=filename).exists():
+        return None  # also keeps the path to known files
+    warc_path = download_engine.get_download_dir(collection_id) / filename
+    if not warc_path.exists():
+        return None
+    with warc_reader.WarcReader(warc_path) as reader:
+        return reader.read_record(offset, settings.WARC_RECORD_PREVIEW_BYTES)
+
+
+def get_download_progress(collection_ids: list[str] | None = None) -> list[dict]:
+    """
+    Returns the download-progress of the given collections, or else of the running (`IN_PROGRESS`) ones,
+      most-recently-updated first, up to `DOWNLOAD_PROGRESS_MAX_COLLECTIONS` of them.
+    - One query, of the collections' progress-counters (kept by the download workers; see
+        download_engine.DownloadProgress); no file-rows are read, however big the collections.
+    Called by views.download_progress().
+    """
+    if collection_ids:
+        collections = Collection.objects.filter(collection_id__in=collection_ids)
+    else:
+        collections = Collection.objects.filter(status=Collection.Status.IN_PROGRESS)
+    rows = collections.order_by('-updated_at').values('collection_id', 'status', *PROGRESS_FIELDS)
+    return [
+        {'collection_id': row['collection_id'], 'status': row['status'], **make_download_progress_dict(row)}
+        for row in rows[: settings.DOWNLOAD_PROGRESS_MAX_COLLECTIONS]
+    ]
+
+
+def make_download_progress_dict(row: dict) -> dict:
+    """
+    Builds the download-progress dict -- "X of Y files, N GB of M GB, ETA" -- from a collection's progress-columns.
+    - The ETA is the bytes left at the rolling download-rate; it's left out (None) while there's no rate yet,
+        or when the rate's gone stale -- no worker has added progress for two rate-windows.
+    Called by get_download_progress() and get_recent_collections().
+    """
+    bytes_left: int = max(0, row['size_in_bytes'] - row['bytes_downloaded'])
+    rate: float = row['download_rate']
+    updated_at: datetime.datetime | None = row['progress_updated_at']
+    if updated_at is None or (timezone.now() - updated_at).total_seconds() > 2 * settings.DOWNLOAD_RATE_WINDOW_SECONDS:
+        rate = 0.0
+    eta_seconds: int | None = math.ceil(bytes_left / rate) if rate > 0 else None
+    return {
+        'files_downloaded': row['files_downloaded'],
+        'item_count': row['item_count'],
+        'bytes_downloaded': row['bytes_downloaded'],
+        'size_in_bytes': row['size_in_bytes'],
+        'downloaded_size': format_size_gb(row['bytes_downloaded']),
+        'total_size': format_size_gb(row['size_in_bytes']),
+        'bytes_per_second': round(rate),
+        'eta_seconds': eta_seconds,
+        'eta': format_duration(eta_seconds) if eta_seconds is not None else '',
+    }
+
+
+def format_duration(seconds: int) -> str:
+    """
+    Formats a duration for display, eg `2h 05m`, `4m 10s`, or `9s`.
+    Called by make_download_progress_dict().
+    """
+    (hours, remainder) = divmod(seconds, 3600)
+    (minutes, seconds) = divmod(remainder, 60)
+    if hours:
+        return f'{hours}h {minutes:02d}m'
+    if minutes:
+        return f'{minutes}m {seconds:02d}s'
+    return f'{seconds}s'
 
 
 class CollectionDataPrepper:
     """
     Class to prepare collection data for a given collection ID.
     - Makes the initial API call for the given collection-id.
-    - Inspects the response and makes multiple subsequent "next" calls if necessary.
+    - Inspects the response and fetches the remaining pages if necessary.
+        - When the page-urls can be predicted from the first response, pages are fetched concurrently.
+        - Otherwise the "next" links are followed one at a time.
+    - Folds each page into running file-count and byte totals as it arrives;
+        full file-records are only kept in `all_files` when `keep_files` is True.
+        (store_pages() stores the records page-by-page in `CollectionFile` rows instead.)
     - Builds an overview dict with the total size and number of items.
-    Called by get_collection_data().
+    Called by start_collection_check() and finish_collection_crawl().
     """
 
-    def __init__(self, collection_id: str):
+    def __init__(
+        self,
+        collection_id: str,
+        client: httpx.Client | None = None,
+        keep_files: bool = False,
+        crawl_time_after: str | None = None,
+    ):
         self.url = f'{settings.WASAPI_URL_ROOT}?collection={collection_id}'
+        if crawl_time_after:  # limits the listing to files crawled after the given (WASAPI-formatted) time
+            self.url = f'{self.url}&crawl-time-after={crawl_time_after}'
         log.debug(f'url = ``{self.url}``')
-        self.auth: httpx.BasicAuth = httpx.BasicAuth(username=settings.WASAPI_USR, password=settings.WASAPI_KEY)
-        self.client: httpx.Client = httpx.Client(auth=self.auth)
-        self.all_files: List[str] = []
+        self.max_workers: int = settings.WASAPI_PAGE_FETCH_WORKERS
+        self.client: httpx.Client = client or self.get_shared_client()
+        self.keep_files: bool = keep_files
+        self.all_files: List[dict] = []  # only populated when `keep_files` is True
+        self.file_count: int = 0
+        self.total_size_in_bytes: int = 0
+
+    def get_shared_client(self) -> httpx.Client:
+        """
+        Returns the process-wide pooled client, so repeat checks reuse warm connections.
+        Called by __init__().
+        """
+        return wasapi_client.get_client()
 
     def grab_initial_collection_data(self) -> dict | None:
         """
         Makes the initial request to the collection data API.
-        Called by get_collection_data().
+        Called by start_collection_check().
+        """
+        resp: httpx.Response = wasapi_client.get_with_retries(self.client, self.url)
+        return self.evaluate_initial_response(resp)
+
+    def evaluate_initial_response(self, resp: httpx.Response) -> dict | None:
+        """
+        Returns the first page's data, or None if the collection is empty (or, on an incremental crawl,
+          has no files newer than the watermark).
+        Raises WasapiRequestFailed on a non-200, so a failed request isn't taken for an empty listing.
+        Called by grab_initial_collection_data() and AsyncCollectionDataPrepper.grab_initial_collection_data_async().
         """
-        resp: httpx.Response = self.client.get(self.url)
         elapsed_time: float = resp.elapsed.total_seconds()
         log.debug(f'elapsed_time, ``{elapsed_time}`` seconds')
         if resp.status_code == 200:
@@ -187,42 +980,149 @@ class CollectionDataPrepper:
                 log.debug(f'data for empty-count response, ``{pprint.pformat(data)}``')
                 data = None
         else:
-            log.debug('non-200 status, so setting overview_data to None')
-            data = None
+            raise WasapiRequestFailed(f'status ``{resp.status_code}`` for ``{resp.url}``')
         return data
 
-    def get_rest_of_files(self, data: dict) -> dict:
+    def get_rest_of_files(self, data: dict) -> None:
         """
-        Makes as many "next" API-calls as necessary.
-        Called by get_collection_data().
+        Folds the first page and all remaining pages into the running totals, without storing them.
+        Called by the benchmarks; the app stores pages via store_pages().
         """
-        log.debug('starting parse_collection_data()')
+        log.debug('starting get_rest_of_files()')
         log.debug(f'data (first 1.5K chars), ``{pprint.pformat(data)[:1500]}``')
-        ## store existing files -----------------------------------------
-        self.all_files.extend(data.get('files', []))
-        log.debug(f'number of files initially, ``{len(self.all_files)}``')
-        ## loop through the remaining pages using "next" links ----------
+        for page_data in self.iter_pages(data):
+            self.fold_page(page_data)
+        log.debug(f'file_count, ``{self.file_count}``; total_size_in_bytes, ``{self.total_size_in_bytes}``')
+        return
+
+    def iter_pages(self, data: dict) -> Iterator[dict]:
+        """
+        Yields the first page, then each remaining page, in page order.
+        - If the page-urls can be predicted, fetches them concurrently.
+        - Otherwise, makes as many "next" API-calls as necessary.
+        Called by get_rest_of_files().
+        """
+        yield data
+        page_urls: list[str] | None = self.predict_page_urls(data)
+        if page_urls is None:
+            log.debug('page-urls not predictable; following "next" links')
+            yield from self.follow_next_links(data.get('next'))
+        else:
+            log.debug(f'fetching ``{len(page_urls)}`` remaining pages concurrently')
+            yield from self.fetch_pages_concurrently(page_urls)
+
+    def fold_page(self, page_data: dict) -> None:
+        """
+        Adds a page's files to the running totals, keeping the file-records only if asked to.
+        Called by get_rest_of_files().
+        """
+        files: list[dict] = page_data.get('files', [])
+        self.file_count += len(files)
+        self.total_size_in_bytes += sum(file['size'] for file in files)
+        if self.keep_files:
+            self.all_files.extend(files)
+        return
+
+    def predict_page_urls(self, data: dict) -> list[str] | None:
+        """
+        Works out the urls of pages 2-through-N from the first response's `count`, page-size, and `next` link.
+        Returns an empty list if there is only one page, or None if the page-urls can't be predicted
+          (eg, the `next` link doesn't carry a `page=2` query-param).
+        Called by iter_pages().
+        """
         next_url: Optional[str] = data.get('next')
+        if not next_url:
+            return []
+        page_size: int = len(data.get('files', []))
+        split_url: parse.SplitResult = parse.urlsplit(next_url)
+        query: dict[str, list[str]] = parse.parse_qs(split_url.query, keep_blank_values=True)
+        if page_size < 1 or query.get('page') != ['2']:
+            return None
+        page_count: int = math.ceil(data.get('count', 0) / page_size)
+        log.debug(f'page_size, ``{page_size}``; page_count, ``{page_count}``')
+        page_urls: list[str] = []
+        for page_number in range(2, page_count + 1):
+            query['page'] = [str(page_number)]
+            page_urls.append(parse.urlunsplit(split_url._replace(query=parse.urlencode(query, doseq=True))))
+        return page_urls
+
+    def fetch_pages_concurrently(self, page_urls: list[str]) -> Iterator[dict]:
+        """
+        Fetches the given pages over a bounded pool of threads sharing the pooled client; yields them in page order.
+        Only a small window of pages is in flight (or waiting to be consumed) at once, so memory stays flat
+          regardless of the number of pages.
+        Called by iter_pages().
+        """
+        window_size: int = self.max_workers * 2
+        pending: Deque[Future] = deque()
+        urls: Iterator[str] = iter(page_urls)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for url in islice(urls, window_size):
+                pending.append(executor.submit(self.fetch_page, url))
+            while pending:
+                page_data: dict = pending.popleft().result()
+                for url in islice(urls, 1):
+                    pending.append(executor.submit(self.fetch_page, url))
+                yield page_data
+
+    def follow_next_links(self, next_url: Optional[str]) -> Iterator[dict]:
+        """
+        Loops through the remaining pages using "next" links, one at a time.
+        Called by iter_pages().
+        """
         while next_url:
-            response = self.client.get(next_url)
-            if response.status_code != 200:
-                raise RuntimeError(f'Failed to fetch data from ``{next_url}``: ``{response.status_code}``')
-            current_data = response.json()
-            self.all_files.extend(current_data.get('files', []))
+            current_data: dict = self.fetch_page(next_url)
+            yield current_data
             next_url = current_data.get('next')
-        return
+
+    def fetch_page(self, url: str) -> dict:
+        """
+        Fetches a single page of file-listings, retrying throttled or failed requests (see wasapi_client),
+          so one bad response doesn't cost the pages already fetched.
+        Called by fetch_pages_concurrently() and follow_next_links().
+        """
+        response: httpx.Response = wasapi_client.get_with_retries(self.client, url)
+        return self.evaluate_page_response(url, response)
+
+    def evaluate_page_response(self, url: str, response: httpx.Response) -> dict:
+        """
+        Returns a page's data, raising if the request still failed after its retries.
+        Called by fetch_page().
+        """
+        if response.status_code != 200:
+            raise RuntimeError(f'Failed to fetch data from ``{url}``: ``{response.status_code}``')
+        return response.json()
 
     def build_overview_dict(self) -> dict:
         """
-        Builds the overview dict.
-        Called by get_collection_data().
+        Builds the overview dict from the running totals.
+        Called by the benchmarks.
         """
-        file_count: int = len(self.all_files)
-        log.debug(f'file_count, ``{file_count}``')
-        log.debug(f'First 5 files: {self.all_files[:5]}')
-        total_size_in_bytes: int = sum([file['size'] for file in self.all_files])
-        total_size_gb: float = total_size_in_bytes / (1024**3)
-        data = {'total_size': f'{total_size_gb:.2f} GB', 'item_count': file_count}
-        return data
+        log.debug(f'file_count, ``{self.file_count}``')
+        return make_overview_dict(self.file_count, self.total_size_in_bytes)
 
     ## end class CollectionDataPrepper
+
+
+## async counterpart, for the ASGI view ----------------------------
+
+
+class AsyncCollectionDataPrepper(CollectionDataPrepper):
+    """
+    Async counterpart of CollectionDataPrepper, for a check's first page; fetched through the shared `httpx.AsyncClient`.
+      (The rest of the crawl runs in a background thread, via CollectionDataPrepper.)
+    Called by start_collection_check_async().
+    """
+
+    def get_shared_client(self) -> httpx.AsyncClient:
+        return wasapi_client.get_async_client()
+
+    async def grab_initial_collection_data_async(self) -> dict | None:
+        """
+        Makes the initial request to the collection data API.
+        Called by start_collection_check_async().
+        """
+        resp: httpx.Response = await wasapi_client.get_with_retries_async(self.client, self.url)
+        return self.evaluate_initial_response(resp)
+
+    ## end class AsyncCollectionDataPrepper
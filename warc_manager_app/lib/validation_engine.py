@@ -0,0 +1,204 @@
+"""
+Validation stage, run after a collection downloads: checks each WARC's gzip-integrity and record-structure.
+
+Flow:
+- When the download worker marks a collection `COMPLETE`, its `validation_state` is (re)set to `PENDING`.
+- Separate validation workers (`manage.py run_validation_worker`) poll the db for such collections and claim one
+    at a time with a conditional update and a lease-token, as the listing-crawl does (see
+    request_collection_helper.claim_crawl()); a claim whose `validation_updated_at` heartbeat has gone stale
+    (`VALIDATION_STALE_SECONDS`) is taken over, and the files already checked are skipped.
+- The collection's files go to a process pool (`VALIDATION_PROCESSES`, default one per core), one task per file,
+    largest first. Idle processes take the next file from the pool's shared queue, so the load balances itself
+    -- the effect of work-stealing -- and the biggest files, started first, don't run on alone at the end.
+- Each file's result is recorded on its row as it comes in (`validation_state`, `validation_error`);
+    then the collection's: `VALID`, or `INVALID`, with `errors` set and the problems summarized in `notes`.
+- db-writes stay on the worker's main thread; the pool processes only read WARCs (see warc_validator).
+"""
+
+import datetime
+import logging
+import multiprocessing
+import os
+import pathlib
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from warc_manager_app.lib import warc_validator
+from warc_manager_app.lib.download_engine import get_download_dir, is_safe_filename
+from warc_manager_app.models import Collection, CollectionFile
+
+log = logging.getLogger(__name__)
+
+NOTES_MAX_FILES = 20  # invalid files listed in the collection's notes; the rest are counted
+
+
+class ValidationWorker:
+    """
+    Pulls downloaded collections from the db and validates their WARCs, in parallel, across processes.
+    Called by the `run_validation_worker` management command.
+    """
+
+    def __init__(self, processes: int | None = None):
+        self.processes: int = processes or settings.VALIDATION_PROCESSES or os.cpu_count() or 1
+        self.stale_seconds: float = settings.VALIDATION_STALE_SECONDS
+        self.stop_requested: bool = False
+
+    def run(self, once: bool = False) -> None:
+        """
+        Validates claimed collections one after another, polling every `DOWNLOAD_POLL_SECONDS` when there are none.
+        With `once`, returns when no collection is waiting.
+        The pool's processes are spawned once, and reused across collections.
+        Called by the `run_validation_worker` management command.
+        """
+        log.info(f'validation worker starting; processes, ``{self.processes}``')
+        ## `spawn`, so the processes don't inherit this one's db-connections or threads
+        pool_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=pool_context) as pool:
+            while not self.stop_requested:
+                claim: tuple[Collection, uuid.UUID] | None = self.claim_collection()
+                if claim:
+                    self.validate_collection(pool, *claim)
+                elif once:
+                    break
+                else:
+                    time.sleep(settings.DOWNLOAD_POLL_SECONDS)
+        log.info('validation worker stopping')
+        return
+
+    def claim_collection(self) -> tuple[Collection, uuid.UUID] | None:
+        """
+        Claims the next downloaded collection waiting for validation -- or whose validation's worker died --
+          highest-priority first; the conditional update means only one worker wins it.
+        Returns the collection and the lease-token, or None if none is waiting.
+        Called by run().
+        """
+        now: datetime.datetime = timezone.now()
+        stale_before: datetime.datetime = now - datetime.timedelta(seconds=self.stale_seconds)
+        waiting = (
+            Collection.objects.filter(status=Collection.Status.COMPLETE)
+            .filter(
+                Q(validation_state=Collection.ValidationState.PENDING)
+                | Q(validation_state=Collection.ValidationState.RUNNING, validation_updated_at__lt=stale_before)
+            )
+            .order_by('-priority', 'updated_at')
+        )
+        for collection in waiting[:10]:
+            lease: uuid.UUID = uuid.uuid4()
+            claimed: int = Collection.objects.filter(
+                pk=collection.pk, validation_state=collection.validation_state, validation_lease=collection.validation_lease
+            ).update(validation_state=Collection.ValidationState.RUNNING, validation_lease=lease, validation_updated_at=now)
+            if claimed:
+                log.info(f'claimed collection ``{collection.collection_id}`` for validation')
+                return (collection, lease)
+        return None
+
+    def validate_collection(self, pool: ProcessPoolExecutor, collection: Collection, lease: uuid.UUID) -> None:
+        """
+        Validates the collection's not-yet-checked files on the pool, largest first, recording each result as it
+          comes in, and renewing the lease's heartbeat every third of `VALIDATION_STALE_SECONDS`;
+          then records the collection's outcome.
+        A file whose listed name would leave the download-directory isn't read; it's recorded as invalid.
+        On a stop-request, cancels the files not yet started, and hands the collection back, for another worker.
+        Called by run().
+        """
+        start: float = time.monotonic()
+        files = collection.files.filter(validation_state=CollectionFile.ValidationState.PENDING).order_by('-size')
+        download_dir: pathlib.Path = get_download_dir(collection.collection_id)
+        in_flight: dict[Future, CollectionFile] = {}
+        for file in files.only('pk', 'filename', 'size'):
+            if not is_safe_filename(file.filename):
+                self.record_file_result(file, {'error': 'unsafe filename; not downloaded'})
+                continue
+            in_flight[pool.submit(warc_validator.validate_warc, str(download_dir / file.filename), file.size)] = file
+        checked_bytes: int = sum(file.size for file in in_flight.values())
+        while in_flight:
+            if self.stop_requested:
+                for future in in_flight:
+                    future.cancel()
+                Collection.objects.filter(pk=collection.pk, validation_lease=lease).update(
+                    validation_state=Collection.ValidationState.PENDING, validation_lease=None
+                )
+                return
+            (done, _) = wait(in_flight, timeout=self.stale_seconds / 3, return_when=FIRST_COMPLETED)
+            for future in done:
+                file: CollectionFile = in_flight.pop(future)
+                try:
+                    result: dict = future.result()
+                except Exception as e:  # eg, a pool process died
+                    log.exception(f'problem validating ``{file.filename}``')
+                    result = {'error': f'validation failed to run: {e!r}'}
+                self.record_file_result(file, result)
+            if not self.renew_lease(collection, lease):
+                log.warning(f'validation of ``{collection.collection_id}`` taken over by another worker; stopping')
+                for future in in_flight:
+                    future.cancel()
+                return
+        elapsed: float = time.monotonic() - start
+        log.info(
+            f'validated ``{collection.collection_id}``; ``{checked_bytes}`` bytes in ``{elapsed:.1f}s`` '
+            f'(``{checked_bytes / max(elapsed, 0.001) / 1e6:.1f}`` MB/s)'
+        )
+        self.finish_collection(collection, lease)
+        return
+
+    def record_file_result(self, file: CollectionFile, result: dict) -> None:
+        """
+        Records a file's validation-result on its row.
+        Called by validate_collection().
+        """
+        if result['error']:
+            log.warning(f'``{file.filename}`` is invalid; ``{result["error"]}``')
+            state: str = CollectionFile.ValidationState.INVALID
+        elif result.get('skipped'):
+            log.info(f'``{file.filename}`` skipped; no check for its format')
+            state = CollectionFile.ValidationState.SKIPPED
+        else:
+            log.debug(f'``{file.filename}`` is valid; result, ``{result}``')
+            state = CollectionFile.ValidationState.VALID
+        CollectionFile.objects.filter(pk=file.pk).update(validation_state=state, validation_error=result['error'])
+        return
+
+    def renew_lease(self, collection: Collection, lease: uuid.UUID) -> bool:
+        """
+        The heartbeat: returns False if another worker took the collection over.
+        Called by validate_collection().
+        """
+        return bool(
+            Collection.objects.filter(pk=collection.pk, validation_lease=lease).update(validation_updated_at=timezone.now())
+        )
+
+    def finish_collection(self, collection: Collection, lease: uuid.UUID) -> None:
+        """
+        Records the collection's validation-outcome: `VALID`, or `INVALID` with `errors` set, and the invalid files
+          (the first `NOTES_MAX_FILES` of them) added to its notes.
+        Called by validate_collection().
+        """
+        invalid: list[tuple[str, str]] = list(
+            collection.files.filter(validation_state=CollectionFile.ValidationState.INVALID)
+            .order_by('filename')
+            .values_list('filename', 'validation_error')
+        )
+        outcome: dict = {'validation_state': Collection.ValidationState.VALID, 'validation_lease': None}
+        if invalid:
+            summary: list[str] = [f'validation: {len(invalid)} of {collection.files.count()} files invalid']
+            summary.extend(f'{filename}: {error}' for (filename, error) in invalid[:NOTES_MAX_FILES])
+            if len(invalid) > NOTES_MAX_FILES:
+                summary.append(f'... and {len(invalid) - NOTES_MAX_FILES} more')
+            notes: str = Collection.objects.filter(pk=collection.pk).values_list('notes', flat=True).first() or ''
+            outcome.update(
+                {
+                    'validation_state': Collection.ValidationState.INVALID,
+                    'errors': True,
+                    'notes': '\n'.join(filter(None, [notes] + summary)),
+                }
+            )
+        if Collection.objects.filter(pk=collection.pk, validation_lease=lease).update(**outcome):
+            log.info(f'collection ``{collection.collection_id}`` validation, ``{outcome["validation_state"]}``')
+        return
+
+    ## end class ValidationWorker
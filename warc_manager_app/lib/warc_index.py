@@ -0,0 +1,284 @@
+"""
+CDXJ indexes of downloaded WARCs, for replay.
+
+- While a WARC downloads, a WarcIndexer is fed the same bytes that are written to disk; it inflates the gzip members
+    as they arrive, and notes the url, timestamp, offset, and (compressed) length of each response, revisit,
+    and resource record. So the index costs no second read of the file.
+- Each WARC's index is written beside it, as `<filename>.cdxj`; once the collection is complete, they're merged
+    into one sorted `index.cdxj` in the collection's directory, which search_index() binary-searches.
+- Lines are pywb-style: `<surt> <14-digit timestamp> <json>`, the json holding `url`, `mime`, `status`, `digest`,
+    `length`, `offset`, and `filename`. The surt is simplified (see make_surt()), but sorts the same way.
+"""
+
+import heapq
+import json
+import logging
+import os
+import pathlib
+import zlib
+from contextlib import ExitStack
+from urllib import parse
+
+log = logging.getLogger(__name__)
+
+COLLECTION_INDEX_FILENAME = 'index.cdxj'
+INDEXED_RECORD_TYPES = {'response', 'revisit', 'resource'}
+HEAD_LIMIT = 64 * 1024  # decompressed bytes kept per record, for its warc- and http-headers
+INFLATE_INPUT = 16 * 1024  # compressed bytes per inflate-call
+INFLATE_CHUNK = 1024 * 1024  # decompressed bytes per inflate-call; the rest of a record's body is inflated and dropped
+
+
+def make_surt(url: str) -> str:
+    """
+    Returns a simplified SURT (Sort-friendly URI Reordering Transform) of the url, the index's sort-key:
+      the host's labels reversed and comma-joined (less any `www`), a non-default port, `)`, then the path and query;
+      lowercased, scheme dropped. Eg, `https://www.Example.com/a?b=1` -> `com,example)/a?b=1`.
+    Called by WarcIndexer, and search_index().
+    """
+    if '://' not in url:
+        url = f'http://{url}'
+    parts = parse.urlsplit(url.strip())
+    host: str = (parts.hostname or '').strip('.')
+    if host.startswith('www.'):
+        host = host[len('www.') :]
+    surt_host: str = ','.join(reversed(host.split('.')))
+    try:
+        port: int | None = parts.port
+    except ValueError:
+        port = None
+    if port and port != {'http': 80, 'https': 443}.get(parts.scheme):
+        surt_host = f'{surt_host}:{port}'
+    query: str = f'?{parts.query}' if parts.query else ''
+    return f'{surt_host}){parts.path or "/"}{query}'.lower()
+
+
+def make_timestamp(warc_date: str) -> str:
+    """
+    Returns the 14-digit timestamp of a `WARC-Date` (eg, `2024-01-02T03:04:05Z` -> `20240102030405`).
+    Called by make_cdxj_line().
+    """
+    return ''.join(character for character in warc_date if character.isdigit())[:14]
+
+
+def parse_headers(block: bytes) -> tuple[str, dict]:
+    """
+    Returns the first line, and the lowercased-name -> value headers, of a `\\r\\n`-separated header-block.
+    Called by make_cdxj_line().
+    """
+    lines: list[bytes] = block.split(b'\r\n')
+    headers: dict = {}
+    for line in lines[1:]:
+        (name, _, value) = line.partition(b':')
+        headers[name.strip().lower().decode('latin-1')] = value.strip().decode('utf-8', 'replace')
+    return (lines[0].decode('latin-1'), headers)
+
+
+def make_cdxj_line(head: bytes, filename: str, offset: int, length: int) -> str | None:
+    """
+    Returns the CDXJ line for the record whose decompressed start is `head`, or None if it's not one to index.
+    - The http status and mime-type come from the response's http-headers; a revisit's mime is `warc/revisit`.
+    Called by WarcIndexer.finish_member().
+    """
+    (warc_block, _, http_part) = head.partition(b'\r\n\r\n')
+    (version, warc_headers) = parse_headers(warc_block)
+    if not version.startswith('WARC/') or warc_headers.get('warc-type') not in INDEXED_RECORD_TYPES:
+        return None
+    url: str = warc_headers.get('warc-target-uri', '').strip('<>')
+    if not url:
+        return None
+    fields: dict = {'url': url}
+    if warc_headers['warc-type'] == 'revisit':
+        fields['mime'] = 'warc/revisit'
+    if warc_headers.get('content-type', '').startswith('application/http') and b'\r\n\r\n' in http_part:
+        (status_line, http_headers) = parse_headers(http_part.partition(b'\r\n\r\n')[0])
+        fields.setdefault('mime', http_headers.get('content-type', '').split(';')[0].strip() or 'unk')
+        if status_line.startswith('HTTP/') and len(status_line.split()) > 1:
+            fields['status'] = status_line.split()[1]
+    elif warc_headers['warc-type'] == 'resource':
+        fields['mime'] = warc_headers.get('content-type', '').split(';')[0].strip() or 'unk'
+    if digest := warc_headers.get('warc-payload-digest'):
+        fields['digest'] = digest
+    fields.update({'length': str(length), 'offset': str(offset), 'filename': filename})
+    timestamp: str = make_timestamp(warc_headers.get('warc-date', ''))
+    return f'{make_surt(url)} {timestamp} {json.dumps(fields)}\n'
+
+
+class WarcIndexer:
+    """
+    Indexes a gzipped WARC from its bytes, fed in order as they arrive, in chunks of any size.
+    - Each gzip member is inflated as its bytes come in; the compressed bytes each takes are counted, so
+        a member's offset and length in the file are known when it ends. (WARCs are written one record per member.)
+    - Only the first `HEAD_LIMIT` decompressed bytes of a record are kept; the rest is inflated and dropped.
+    - Input that isn't gzip stops the indexing (`failure` is set); the download goes on regardless.
+    - Subclassed by warc_validator.WarcValidator, which checks each record instead of indexing it.
+    Called by download_engine.PartFile.
+    """
+
+    def __init__(self, filename: str):
+        self.filename: str = filename
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Starts over, from byte 0 of the file.
+        Called by __init__(), and by download_engine.PartFile.restart().
+        """
+        self.lines: list[str] = []
+        self.member_offset: int = 0  # where the current gzip member starts, in the file
+        self.member_length: int = 0  # compressed bytes of the current member consumed so far
+        self.member_inflated: int = 0  # decompressed bytes of the current member so far
+        self.head = bytearray()
+        self.decompressor = zlib.decompressobj(wbits=31)  # gzip
+        self.failure: str = ''  # why the bytes couldn't be read, if they couldn't
+        return
+
+    def update(self, data: bytes | memoryview) -> None:
+        """
+        Inflates the next bytes of the file, noting each record as its member ends.
+        Called by download_engine.PartFile.write(), and by download_engine.DownloadWorker.seed_hashers().
+        """
+        view = memoryview(data)
+        position: int = 0
+        while not self.failure:
+            ## fed a slice at a time: zlib copies the input left after a member ends, so a whole chunk would be
+            ##   copied once per member
+            piece: memoryview = view[position : position + INFLATE_INPUT]
+            try:
+                inflated: bytes = self.decompressor.decompress(piece, INFLATE_CHUNK)
+            except zlib.error as e:
+                self.failure = f'bad gzip-member at byte {self.member_offset}: {e}'
+                log.warning(f'stopped reading ``{self.filename}``; ``{self.failure}``')
+                return
+            self.member_inflated += len(inflated)
+            if len(self.head) < HEAD_LIMIT:
+                self.head += inflated[: HEAD_LIMIT - len(self.head)]
+            unconsumed: bytes = self.decompressor.unused_data if self.decompressor.eof else self.decompressor.unconsumed_tail
+            self.member_length += len(piece) - len(unconsumed)
+            position += len(piece) - len(unconsumed)
+            if self.decompressor.eof:
+                self.finish_member()
+            elif position == len(view) and len(inflated) < INFLATE_CHUNK:  # else, there's inflated output to collect
+                return
+        return
+
+    def finish_member(self) -> None:
+        """
+        Notes the record that just ended, then gets ready for the next member.
+        Called by update().
+        """
+        self.note_record(bytes(self.head))
+        self.member_offset += self.member_length
+        self.member_length = 0
+        self.member_inflated = 0
+        self.head = bytearray()
+        self.decompressor = zlib.decompressobj(wbits=31)
+        return
+
+    def note_record(self, head: bytes) -> None:
+        """
+        Adds the index-line of the record whose member just ended, if it's one to index.
+        Called by finish_member().
+        """
+        if line := make_cdxj_line(head, self.filename, self.member_offset, self.member_length):
+            self.lines.append(line)
+        return
+
+    def write(self, index_path: pathlib.Path, file_size: int) -> bool:
+        """
+        Writes the sorted index, if the whole `file_size`-byte file was indexed; returns True if written.
+        Called by download_engine.DownloadWorker.download_file().
+        """
+        if self.failure or self.member_offset != file_size:
+            log.warning(f'no index for ``{self.filename}``; indexed ``{self.member_offset}`` of ``{file_size}`` bytes')
+            return False
+        write_lines(index_path, sorted(self.lines))
+        return True
+
+    ## end class WarcIndexer
+
+
+def get_file_index_path(warc_path: pathlib.Path) -> pathlib.Path:
+    return warc_path.with_name(f'{warc_path.name}.cdxj')
+
+
+def write_lines(index_path: pathlib.Path, lines) -> None:
+    """
+    Writes the lines via a temporary name, so `index_path` never holds a partial index.
+    Called by WarcIndexer.write(), copy_file_index(), and merge_collection_index().
+    """
+    temp_path: pathlib.Path = index_path.with_name(f'{index_path.name}.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    temp_path.replace(index_path)
+    return
+
+
+def copy_file_index(source_warc_path: pathlib.Path, dest_warc_path: pathlib.Path) -> bool:
+    """
+    Gives a linked WARC the index of the copy it was linked from, with its own filename in each line.
+    Returns True if there was an index to copy.
+    Called by download_engine.DownloadWorker.download_file().
+    """
+    source_index_path: pathlib.Path = get_file_index_path(source_warc_path)
+    if not source_index_path.exists():
+        return False
+    lines: list[str] = []
+    with open(source_index_path, encoding='utf-8') as f:
+        for line in f:
+            (key, timestamp, fields_json) = line.rstrip('\n').split(' ', 2)
+            fields: dict = json.loads(fields_json)
+            fields['filename'] = dest_warc_path.name
+            lines.append(f'{key} {timestamp} {json.dumps(fields)}\n')
+    write_lines(get_file_index_path(dest_warc_path), lines)
+    return True
+
+
+def merge_collection_index(download_dir: pathlib.Path, filenames: list[str]) -> int:
+    """
+    Merges the WARCs' sorted `.cdxj` indexes into the collection's sorted `index.cdxj`, streaming, a line at a time.
+    WARCs without an index (eg, not gzipped, or downloaded before indexing) are left out, and logged.
+    The `filenames` are joined to `download_dir` as given; the caller keeps out any that would leave it
+      (see download_engine.is_safe_filename(), not imported here, as this module stays free of django).
+    Returns the number of WARCs merged.
+    Called by download_engine.DownloadWorker.
+    """
+    index_paths: list[pathlib.Path] = [get_file_index_path(download_dir / filename) for filename in filenames]
+    missing: list[pathlib.Path] = [path for path in index_paths if not path.exists()]
+    if missing:
+        log.warning(f'``{len(missing)}`` WARCs in ``{download_dir}`` have no index; eg, ``{missing[0].name}``')
+    index_paths = [path for path in index_paths if path not in missing]
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(path, encoding='utf-8')) for path in index_paths]
+        write_lines(download_dir / COLLECTION_INDEX_FILENAME, heapq.merge(*files))
+    log.info(f'indexed ``{len(index_paths)}`` WARCs, as ``{download_dir / COLLECTION_INDEX_FILENAME}``')
+    return len(index_paths)
+
+
+def search_index(index_path: pathlib.Path, url: str, match_type: str = 'exact', limit: int = 100) -> list[str]:
+    """
+    Returns up to `limit` lines of the sorted index for the url (`exact`), or for urls starting with it (`prefix`),
+      oldest capture first.
+    Binary-searches the file for the first candidate line, so only a few blocks are read, however big the index.
+    Called by request_collection_helper.search_collection_index().
+    """
+    surt: bytes = make_surt(url).encode('utf-8')
+    key: bytes = surt + b' ' if match_type == 'exact' else surt
+    lines: list[str] = []
+    with open(index_path, 'rb') as f:
+        (low, high) = (0, os.fstat(f.fileno()).st_size)
+        while low < high:  # the lowest position whose next line-start begins a line >= key
+            middle: int = (low + high) // 2
+            f.seek(middle - 1 if middle else 0)
+            if middle:
+                f.readline()
+            line: bytes = f.readline()
+            if line and line < key:
+                low = middle + 1
+            else:
+                high = middle
+        f.seek(low - 1 if low else 0)
+        if low:
+            f.readline()
+        while len(lines) < limit and (line := f.readline()).startswith(key):
+            lines.append(line.decode('utf-8'))
+    return lines
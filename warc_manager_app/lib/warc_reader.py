@@ -0,0 +1,137 @@
+"""
+Random access to single records of downloaded WARCs, for spot-checks.
+
+- The WARC is memory-mapped, so pulling out a record touches only the pages its gzip-member spans,
+    however big the file; nothing is read ahead of it.
+- Records are found by offset -- as listed in the WARC's `.cdxj` index (see warc_index) -- and only that record's
+    gzip-member is inflated, and only as far as its headers and the payload-preview need.
+"""
+
+import logging
+import mmap
+import pathlib
+import zlib
+
+from warc_manager_app.lib import warc_index
+
+log = logging.getLogger(__name__)
+
+INFLATE_INPUT = 64 * 1024  # compressed bytes per inflate-call
+
+
+class WarcRecordError(Exception):
+    """
+    Raised when there's no readable WARC record at the given offset.
+    """
+
+
+def split_header_lines(block: bytes) -> list[tuple[str, str]]:
+    """
+    Returns the (name, value) pairs of a `\\r\\n`-separated header-block, less its first line, in order, as written.
+    Called by WarcReader.read_record().
+    """
+    pairs: list[tuple[str, str]] = []
+    for line in block.split(b'\r\n')[1:]:
+        (name, _, value) = line.partition(b':')
+        pairs.append((name.strip().decode('latin-1'), value.strip().decode('utf-8', 'replace')))
+    return pairs
+
+
+class WarcReader:
+    """
+    Reads single records of a gzipped WARC by offset, via a memory-map of the file.
+    Usage:
+        with WarcReader(path) as reader:
+            record: dict = reader.read_record(offset)
+    Called by request_collection_helper.read_collection_record().
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path: pathlib.Path = path
+        self.f = None
+        self.mapped: mmap.mmap | None = None
+
+    def __enter__(self):
+        self.f = open(self.path, 'rb')
+        try:
+            self.mapped = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file can't be mapped
+            self.mapped = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mapped is not None:
+            self.mapped.close()
+        self.f.close()
+
+    def inflate_member(self, offset: int, wanted: int) -> tuple[bytes, int | None]:
+        """
+        Inflates the gzip-member starting at `offset`, until `wanted` bytes are out or the member ends.
+        Returns the inflated bytes, and the member's compressed length if it ended (else None).
+        Raises WarcRecordError if there's no gzip-member at the offset.
+        Called by read_record().
+        """
+        if self.mapped is None or not 0 <= offset < len(self.mapped):
+            raise WarcRecordError(f'offset ``{offset}`` is outside ``{self.path.name}``')
+        decompressor = zlib.decompressobj(wbits=31)
+        inflated = bytearray()
+        position: int = offset
+        with memoryview(self.mapped) as view:
+            while len(inflated) < wanted and not decompressor.eof:
+                with view[position : position + INFLATE_INPUT] as piece:  # released promptly, so the map can close
+                    try:
+                        inflated += decompressor.decompress(piece, wanted - len(inflated))
+                    except zlib.error as e:
+                        raise WarcRecordError(f'no gzip-member at offset ``{offset}`` of ``{self.path.name}``; ``{e!r}``')
+                    piece_length: int = len(piece)
+                unconsumed: bytes = decompressor.unused_data if decompressor.eof else decompressor.unconsumed_tail
+                position += piece_length - len(unconsumed)
+                if not piece_length:
+                    break  # the file ends mid-member
+        return (bytes(inflated), position - offset if decompressor.eof else None)
+
+    def read_record(self, offset: int, preview_bytes: int = 2048) -> dict:
+        """
+        Returns the record at `offset`: its warc-headers, its http status-line and headers (for an http record),
+          and the first `preview_bytes` of its payload.
+        - Inflates at most the headers plus the preview, whatever the record's size.
+        Raises WarcRecordError if there's no WARC record at the offset.
+        Called by request_collection_helper.read_collection_record().
+        """
+        (inflated, member_length) = self.inflate_member(offset, warc_index.HEAD_LIMIT + preview_bytes)
+        (warc_block, found, content) = inflated.partition(b'\r\n\r\n')
+        if not inflated.startswith(b'WARC/') or not found:
+            raise WarcRecordError(f'no WARC record at offset ``{offset}`` of ``{self.path.name}``')
+        (version, warc_headers) = warc_index.parse_headers(warc_block)
+        try:
+            content_length: int = int(warc_headers.get('content-length', ''))
+        except ValueError:
+            content_length = len(content)
+        content = content[:content_length]
+        record: dict = {
+            'filename': self.path.name,
+            'offset': offset,
+            'member_length': member_length,  # None if the preview ended before the member did
+            'warc_version': version,
+            'warc_headers': split_header_lines(warc_block),
+            'content_length': content_length,
+            'http_status_line': '',
+            'http_headers': [],
+        }
+        payload_length: int = content_length
+        if warc_headers.get('content-type', '').startswith('application/http') and b'\r\n\r\n' in content:
+            (http_block, _, content) = content.partition(b'\r\n\r\n')
+            record['http_status_line'] = http_block.split(b'\r\n')[0].decode('latin-1')
+            record['http_headers'] = split_header_lines(http_block)
+            payload_length -= len(http_block) + len(b'\r\n\r\n')
+        preview: bytes = content[:preview_bytes]
+        record.update(
+            {
+                'payload_length': payload_length,
+                'payload_preview': preview.decode('utf-8', 'replace'),
+                'payload_truncated': payload_length > len(preview),
+            }
+        )
+        return record
+
+    ## end class WarcReader
@@ -0,0 +1,162 @@
+"""
+Integrity checks of downloaded WARCs (and ARCs); run by the validation stage, after a collection downloads
+  (see validation_engine).
+
+Kept free of django, like warc_index, so the process-pool's workers import only what they need, under any start-method.
+"""
+
+import os
+import pathlib
+import time
+
+from warc_manager_app.lib import warc_index
+
+REQUIRED_HEADERS = ['warc-type', 'warc-record-id', 'warc-date', 'content-length']
+READ_SIZE = 8 * 1024 * 1024  # bytes per read
+
+
+def check_record(head: bytes, inflated_length: int) -> str:
+    """
+    Returns what's wrong with the WARC record whose decompressed start is `head`, or '' if nothing is:
+      it must start with a version-line, have the required headers, and its block must be `Content-Length` long,
+      followed by the closing blank line.
+    Called by WarcValidator.note_record(), and walk_warc().
+    """
+    (warc_block, found, _) = head.partition(b'\r\n\r\n')
+    if not head.startswith(b'WARC/'):
+        return 'no WARC version-line'
+    if not found:
+        return f'headers longer than {warc_index.HEAD_LIMIT} bytes, or unterminated'
+    (_, headers) = warc_index.parse_headers(warc_block)
+    missing: list[str] = [name for name in REQUIRED_HEADERS if name not in headers]
+    if missing:
+        return f'missing {", ".join(missing)}'
+    try:
+        content_length: int = int(headers['content-length'])
+    except ValueError:
+        return f'bad Content-Length, {headers["content-length"]!r}'
+    block_length: int = inflated_length - len(warc_block) - len(b'\r\n\r\n') * 2
+    if block_length != content_length:
+        return f'Content-Length is {content_length}, but the block is {block_length} bytes'
+    return ''
+
+
+class GzipValidator(warc_index.WarcIndexer):
+    """
+    Checks a gzipped file from its bytes, fed in order: each gzip-member must inflate cleanly (zlib checks
+      its crc32-and-length trailer), and the file must end where a member does. Used as is for `.arc.gz` files,
+      whose records aren't parsed.
+    Stops at the first problem, noting it in `failure`.
+    Called by validate_warc().
+    """
+
+    def reset(self) -> None:
+        super().reset()
+        self.record_count: int = 0
+        return
+
+    def note_record(self, head: bytes) -> None:
+        """
+        Counts the member that just ended.
+        Called by WarcIndexer.finish_member().
+        """
+        self.record_count += 1
+        return
+
+    def finish(self, file_size: int) -> str:
+        """
+        Returns the file's first problem, or '' if there was none.
+        Called by validate_warc().
+        """
+        if not self.failure and self.member_offset != file_size:
+            self.failure = f'ends part-way through the record at byte {self.member_offset}'
+        return self.failure
+
+    ## end class GzipValidator
+
+
+class WarcValidator(GzipValidator):
+    """
+    Checks a gzipped WARC: as GzipValidator, and each member must hold one well-formed WARC record
+      (see check_record()).
+    Called by validate_warc().
+    """
+
+    def note_record(self, head: bytes) -> None:
+        """
+        Checks the record whose member just ended.
+        Called by WarcIndexer.finish_member().
+        """
+        if problem := check_record(head, self.member_inflated):
+            self.failure = f'record at byte {self.member_offset}: {problem}'
+        else:
+            self.record_count += 1
+        return
+
+    ## end class WarcValidator
+
+
+def walk_warc(f, file_size: int) -> tuple[str, int]:
+    """
+    Checks an uncompressed WARC: each record must be well-formed (see check_record()), and followed straight away
+      by the next, or by the end of the file. Reads each record's headers and closing blank line, seeking past its block.
+    Returns the file's first problem ('' if there was none), and the count of records checked.
+    Called by validate_warc().
+    """
+    (offset, record_count) = (0, 0)
+    while offset < file_size:
+        f.seek(offset)
+        head: bytes = f.read(warc_index.HEAD_LIMIT)
+        (warc_block, found, _) = head.partition(b'\r\n\r\n')
+        if not found and offset + len(head) == file_size:
+            return (f'ends part-way through the record at byte {offset}', record_count)
+        content_length: str = warc_index.parse_headers(warc_block)[1].get('content-length', '')
+        block_length: int = int(content_length) if content_length.isdigit() else 0  # else, check_record() says why
+        record_length: int = len(warc_block) + len(b'\r\n\r\n') * 2 + block_length
+        if problem := check_record(head, record_length):
+            return (f'record at byte {offset}: {problem}', record_count)
+        if offset + record_length > file_size:
+            return (f'ends part-way through the record at byte {offset}', record_count)
+        f.seek(offset + record_length - len(b'\r\n\r\n'))
+        if f.read(len(b'\r\n\r\n')) != b'\r\n\r\n':
+            return (f'record at byte {offset}: no blank line after its {content_length}-byte block', record_count)
+        (offset, record_count) = (offset + record_length, record_count + 1)
+    return ('', record_count)
+
+
+def validate_warc(path: str, expected_size: int) -> dict:
+    """
+    Checks one downloaded file, by its format, reading a gzipped one once, sequentially:
+    - `.warc.gz`, with WarcValidator; `.arc.gz`, with GzipValidator; `.warc`, with walk_warc().
+    - Any other format (say, an uncompressed `.arc`) is `skipped`: only its size is checked.
+    Returns its `error` ('' if it's valid), `record_count`, and `seconds` taken; and `skipped`, if it wasn't checked.
+    Called by validation_engine.ValidationWorker.validate_collection(), in a pool process.
+    """
+    start: float = time.monotonic()
+    warc_path = pathlib.Path(path)
+    name: str = warc_path.name.lower()
+    try:
+        size: int = warc_path.stat().st_size
+    except FileNotFoundError:
+        return {'error': 'not on disk', 'record_count': 0, 'seconds': 0.0}
+    if size != expected_size:
+        return {'error': f'{size} bytes on disk; expected {expected_size}', 'record_count': 0, 'seconds': 0.0}
+    if name.endswith('.warc.gz'):
+        validator: GzipValidator | None = WarcValidator(warc_path.name)
+    elif name.endswith('.arc.gz'):
+        validator = GzipValidator(warc_path.name)
+    elif name.endswith('.warc'):
+        validator = None
+    else:
+        return {'error': '', 'record_count': 0, 'skipped': True, 'seconds': 0.0}
+    with open(warc_path, 'rb', buffering=0) as f:
+        if validator is None:
+            (error, record_count) = walk_warc(f, size)
+        else:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)  # more read-ahead
+            buffer = memoryview(bytearray(READ_SIZE))
+            while not validator.failure and (read_count := f.readinto(buffer)):
+                validator.update(buffer[:read_count])
+            (error, record_count) = (validator.finish(size), validator.record_count)
+    return {'error': error, 'record_count': record_count, 'seconds': round(time.monotonic() - start, 3)}
@@ -0,0 +1,322 @@
+"""
+Holds the process-wide WASAPI clients, so collection-checks reuse pooled keep-alive connections
+  instead of paying for a fresh TCP/TLS handshake on every check.
+
+- get_client() returns the shared `httpx.Client`; it's created on first use, and is thread-safe.
+- get_async_client() returns the shared `httpx.AsyncClient` for the running event-loop
+    (async connections can't be shared across loops; under an ASGI server there's one loop per process).
+- HTTP/2 is used when `WASAPI_HTTP2` is on and the optional `h2` package is installed;
+    httpx negotiates it via ALPN, so servers that only speak HTTP/1.1 still work.
+- Pool-limits and timeouts come from the `WASAPI_*` settings.
+- The clients are closed at process exit.
+
+Also holds the process-wide rate-limiter shared by all WASAPI callers, and the retry-with-backoff used for each request;
+  see AdaptiveRateLimiter and get_with_retries().
+"""
+
+import asyncio
+import atexit
+import datetime
+import email.utils
+import importlib.util
+import logging
+import random
+import threading
+import time
+import weakref
+from typing import Callable
+
+import httpx
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+_client: httpx.Client | None = None
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
+_rate_limiter: 'AdaptiveRateLimiter | None' = None
+_lock = threading.Lock()
+
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+THROTTLE_STATUS_CODES = [429, 503]  # the upstream asking us to slow down
+RATE_RECOVERY_STEPS = 50  # successes to climb from zero back to the configured rate
+THROTTLE_COOLDOWN_SECONDS = 1.0  # throttles this soon after a rate-cut are from requests already in flight
+
+
+def get_client() -> httpx.Client:
+    """
+    Returns the shared client, creating it on first use.
+    Called by request_collection_helper.CollectionDataPrepper().
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:  # another thread may have created it while this one waited
+                _client = httpx.Client(**build_client_kwargs())
+                log.debug(f'created shared wasapi client; http2, ``{use_http2()}``')
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the shared async client for the running event-loop, creating it on first use.
+    Called by request_collection_helper.AsyncCollectionDataPrepper().
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    async_client: httpx.AsyncClient | None = _async_clients.get(loop)
+    if async_client is None:  # no lock needed; only this loop's thread gets here for this loop
+        for closed_loop in [other for other in list(_async_clients.keys()) if other.is_closed()]:
+            _async_clients.pop(closed_loop, None)  # its connections went with it; its client may hold the loop alive
+        async_client = httpx.AsyncClient(**build_client_kwargs())
+        _async_clients[loop] = async_client
+        log.debug(f'created shared async wasapi client; http2, ``{use_http2()}``')
+    return async_client
+
+
+def build_client_kwargs() -> dict:
+    """
+    Returns the auth, pool-limits, timeouts, and http-version shared by both clients.
+    Called by get_client() and get_async_client().
+    """
+    limits = httpx.Limits(
+        max_connections=settings.WASAPI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.WASAPI_MAX_CONNECTIONS,
+        keepalive_expiry=settings.WASAPI_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    timeout = httpx.Timeout(
+        settings.WASAPI_READ_TIMEOUT_SECONDS,
+        connect=settings.WASAPI_CONNECT_TIMEOUT_SECONDS,
+        pool=settings.WASAPI_READ_TIMEOUT_SECONDS,  # waiting for a free connection, when checks outnumber the pool
+    )
+    return {
+        'auth': httpx.BasicAuth(username=settings.WASAPI_USR, password=settings.WASAPI_KEY),
+        'limits': limits,
+        'timeout': timeout,
+        'http2': use_http2(),
+    }
+
+
+def use_http2() -> bool:
+    """
+    Returns True if HTTP/2 is enabled and the optional `h2` package is available.
+    Called by build_client_kwargs().
+    """
+    return settings.WASAPI_HTTP2 and importlib.util.find_spec('h2') is not None
+
+
+@atexit.register
+def close_clients() -> None:
+    """
+    Closes the shared clients' pooled connections.
+    Called at process exit.
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+    for loop, async_client in list(_async_clients.items()):
+        if not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(async_client.aclose())
+    _async_clients.clear()  # clients on closed loops had their connections dropped with the loop
+    return
+
+
+## rate-limiting and retries ----------------------------------------
+
+
+class AdaptiveRateLimiter:
+    """
+    A token-bucket shared by all WASAPI callers in the process, whose rate adapts to the upstream.
+    - Allows bursts of `WASAPI_BURST` requests, then `rate` requests per second.
+    - Each throttled (429/503) response halves the rate (down to `WASAPI_MIN_REQUESTS_PER_SECOND`),
+        and a `Retry-After` holds back every caller until it passes.
+    - Each other response raises the rate a step, back toward `WASAPI_REQUESTS_PER_SECOND`.
+    - A `WASAPI_REQUESTS_PER_SECOND` of 0 turns the limiting off.
+    reserve() doesn't block; it returns the caller's wait, so sync callers sleep it and async callers await it.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock: Callable[[], float] = clock
+        self.lock = threading.Lock()
+        self.rate: float = float(settings.WASAPI_REQUESTS_PER_SECOND)
+        self.tokens: float = float(settings.WASAPI_BURST)
+        self.refilled_at: float = clock()  # may be in the future, while a `Retry-After` holds everyone back
+        self.cut_at: float | None = None
+
+    def reserve(self) -> float:
+        """
+        Takes a token, returning how many seconds to wait before using it.
+        Called by acquire() and acquire_async().
+        """
+        with self.lock:
+            ceiling: float = settings.WASAPI_REQUESTS_PER_SECOND
+            if ceiling <= 0:
+                return 0.0
+            self.rate = min(self.rate, ceiling) if self.rate > 0 else ceiling  # 0 if created while unlimited
+            now: float = self.refill()
+            self.tokens -= 1  # below zero is a reservation of a future token
+            return max(0.0, self.refilled_at - now) + max(0.0, -self.tokens) / self.rate
+
+    def acquire(self) -> None:
+        wait: float = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait: float = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def record_throttle(self, retry_after: float | None) -> None:
+        """
+        Halves the rate, and holds back all callers for `retry_after` seconds, if given,
+          up to `WASAPI_RETRY_MAX_DELAY_SECONDS`; so a far-off (or bogus) `Retry-After` can't stall every caller.
+        - A burst of throttles from requests that were already in flight only cuts the rate once.
+        Called by get_retry_delay() and download_engine.DownloadWorker.transfer().
+        """
+        with self.lock:
+            if settings.WASAPI_REQUESTS_PER_SECOND <= 0:
+                return
+            now: float = self.refill()
+            if self.cut_at is None or now - self.cut_at >= THROTTLE_COOLDOWN_SECONDS:
+                self.rate = max(settings.WASAPI_MIN_REQUESTS_PER_SECOND, self.rate / 2)
+                self.cut_at = now
+            self.tokens = min(self.tokens, 0.0)  # no burst straight after being throttled
+            if retry_after:
+                self.refilled_at = max(self.refilled_at, now + min(retry_after, settings.WASAPI_RETRY_MAX_DELAY_SECONDS))
+            log.warning(f'wasapi throttled; rate now ``{self.rate:.2f}``/s; retry-after, ``{retry_after}``')
+        return
+
+    def record_success(self) -> None:
+        """
+        Raises the rate a step, back toward the configured rate.
+        Called by get_retry_delay() and download_engine.DownloadWorker.transfer().
+        """
+        with self.lock:
+            ceiling: float = settings.WASAPI_REQUESTS_PER_SECOND
+            self.rate = min(ceiling, self.rate + ceiling / RATE_RECOVERY_STEPS) if ceiling > 0 else self.rate
+        return
+
+    def refill(self) -> float:
+        """
+        Adds the tokens earned since the last refill (none while held back), up to the burst; returns now.
+        Called with the lock held.
+        """
+        now: float = self.clock()
+        if now > self.refilled_at:
+            self.tokens = min(float(settings.WASAPI_BURST), self.tokens + (now - self.refilled_at) * self.rate)
+            self.refilled_at = now
+        return now
+
+    ## end class AdaptiveRateLimiter
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """
+    Returns the shared rate-limiter, creating it on first use.
+    Called by get_with_retries(), get_with_retries_async(), get_retry_delay(), and download_engine.DownloadWorker.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _lock:
+            if _rate_limiter is None:
+                _rate_limiter = AdaptiveRateLimiter()
+    return _rate_limiter
+
+
+def get_with_retries(client: httpx.Client, url: str) -> httpx.Response:
+    """
+    GETs the url through the rate-limiter, retrying transport-errors and retryable statuses
+      with jittered exponential backoff (or the server's `Retry-After`), up to `WASAPI_MAX_ATTEMPTS` times.
+    Returns the last response; re-raises the last transport-error.
+    Called by request_collection_helper.CollectionDataPrepper.
+    """
+    attempt: int = 0
+    while True:
+        attempt += 1
+        get_rate_limiter().acquire()
+        try:
+            response: httpx.Response = client.get(url)
+        except httpx.TransportError as e:
+            delay: float | None = get_retry_delay(attempt, None)
+            if delay is None:
+                raise
+            log.warning(f'attempt ``{attempt}`` for ``{url}`` failed, ``{e!r}``; retrying in ``{delay:.2f}``s')
+        else:
+            delay = get_retry_delay(attempt, response)
+            if delay is None:
+                return response
+            log.warning(f'attempt ``{attempt}`` for ``{url}`` got ``{response.status_code}``; retrying in ``{delay:.2f}``s')
+        time.sleep(delay)
+
+
+async def get_with_retries_async(client: httpx.AsyncClient, url: str) -> httpx.Response:
+    """
+    Async counterpart of get_with_retries().
+    Called by request_collection_helper.AsyncCollectionDataPrepper.
+    """
+    attempt: int = 0
+    while True:
+        attempt += 1
+        await get_rate_limiter().acquire_async()
+        try:
+            response: httpx.Response = await client.get(url)
+        except httpx.TransportError as e:
+            delay: float | None = get_retry_delay(attempt, None)
+            if delay is None:
+                raise
+            log.warning(f'attempt ``{attempt}`` for ``{url}`` failed, ``{e!r}``; retrying in ``{delay:.2f}``s')
+        else:
+            delay = get_retry_delay(attempt, response)
+            if delay is None:
+                return response
+            log.warning(f'attempt ``{attempt}`` for ``{url}`` got ``{response.status_code}``; retrying in ``{delay:.2f}``s')
+        await asyncio.sleep(delay)
+
+
+def get_retry_delay(attempt: int, response: httpx.Response | None, base_delay: float | None = None) -> float | None:
+    """
+    Feeds the attempt's outcome to the rate-limiter, and returns the seconds to wait before retrying,
+      or None if the response should be used as-is (or, for a transport-error -- `response` None -- re-raised).
+    Called by get_with_retries() and get_with_retries_async().
+    """
+    if response is not None and response.status_code not in RETRYABLE_STATUS_CODES:
+        get_rate_limiter().record_success()
+        return None
+    retry_after: float | None = parse_retry_after(response) if response is not None else None
+    if response is not None and response.status_code in THROTTLE_STATUS_CODES:
+        get_rate_limiter().record_throttle(retry_after)
+    if attempt >= settings.WASAPI_MAX_ATTEMPTS:
+        return None
+    base_delay = settings.WASAPI_RETRY_BASE_DELAY_SECONDS if base_delay is None else base_delay
+    return compute_backoff(attempt, base_delay, retry_after)
+
+
+def compute_backoff(attempt: int, base_delay: float, retry_after: float | None = None) -> float:
+    """
+    Returns a "full-jitter" exponential backoff -- random, up to `base_delay * 2^(attempt-1)` -- so retrying callers
+      spread out instead of returning in step; never less than the server's `Retry-After`, and never more than
+      `WASAPI_RETRY_MAX_DELAY_SECONDS`, however far off a `Retry-After` is.
+    Called by get_retry_delay() and download_engine.DownloadWorker.download_file().
+    """
+    ceiling: float = min(settings.WASAPI_RETRY_MAX_DELAY_SECONDS, base_delay * 2 ** (attempt - 1))
+    return min(max(random.uniform(0, ceiling), retry_after or 0.0), settings.WASAPI_RETRY_MAX_DELAY_SECONDS)
+
+
+def parse_retry_after(response: httpx.Response) -> float | None:
+    """
+    Returns the `Retry-After` header's wait in seconds (it may be seconds or an http-date), or None.
+    An http-date with a `-0000` zone parses without one; it's taken as UTC.
+    Called by get_retry_delay() and download_engine.DownloadWorker.
+    """
+    value: str | None = response.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at: datetime.datetime = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
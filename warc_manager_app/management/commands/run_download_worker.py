@@ -0,0 +1,36 @@
+"""
+Runs a download worker: pulls queued collections from the db and downloads their WARCs.
+Several can run at once, on one host or several; they share the files of running collections by leasing them.
+
+Usage:
+    uv run ./manage.py run_download_worker
+    uv run ./manage.py run_download_worker --once --concurrency 2
+"""
+
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from warc_manager_app.lib.download_engine import DownloadWorker
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Downloads the WARCs of queued collections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='exit when the queue is empty, instead of polling')
+        parser.add_argument('--concurrency', type=int, default=None, help='per-worker cap within DOWNLOAD_CONCURRENCY')
+
+    def handle(self, *args, **options):
+        worker = DownloadWorker(concurrency=options['concurrency'])
+
+        def request_stop(signum, frame):
+            log.info(f'received signal ``{signum}``; stopping after the running transfers')
+            worker.stop_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        worker.run(once=options['once'])
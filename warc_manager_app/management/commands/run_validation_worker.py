@@ -0,0 +1,36 @@
+"""
+Runs a validation worker: pulls downloaded collections from the db and checks their WARCs, across processes.
+Several can run at once, on one host or several; each claims a whole collection at a time.
+
+Usage:
+    uv run ./manage.py run_validation_worker
+    uv run ./manage.py run_validation_worker --once --processes 4
+"""
+
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from warc_manager_app.lib.validation_engine import ValidationWorker
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Validates the WARCs of downloaded collections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='exit when no collection is waiting, instead of polling')
+        parser.add_argument('--processes', type=int, default=None, help='overrides settings.VALIDATION_PROCESSES')
+
+    def handle(self, *args, **options):
+        worker = ValidationWorker(processes=options['processes'])
+
+        def request_stop(signum, frame):
+            log.info(f'received signal ``{signum}``; stopping after the files being checked')
+            worker.stop_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        worker.run(once=options['once'])
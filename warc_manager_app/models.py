@@ -5,20 +5,171 @@ from django.conf import settings
 
 
 class Collection(models.Model):
+    """
+    Also serves as the read-through cache for the WASAPI collection-overview,
+      and holds the progress of a running WASAPI crawl, for the check-page to poll;
+    see request_collection_helper.start_collection_check().
+    """
+
+    Status = models.TextChoices('status', 'QUERIED QUEUED_FOR_START QUEUED_FOR_REDO IN_PROGRESS PAUSED COMPLETE')
+    CrawlState = models.TextChoices('crawl_state', 'IDLE CRAWLING FAILED')
+    Priority = models.IntegerChoices('priority', 'NORMAL HIGH URGENT')
+    ValidationState = models.TextChoices('validation_state', 'PENDING RUNNING VALID INVALID')
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     collection_id = models.CharField(max_length=50, unique=True)
-    item_count = models.IntegerField()
-    size_in_bytes = models.BigIntegerField()
-    notes = models.TextField()
-    status = models.TextChoices('status', 'QUERIED QUEUED_FOR_START QUEUED_FOR_REDO IN_PROGRESS PAUSED COMPLETE')
-    all_files = models.JSONField()  # list; will likely become a separate File model
-    errors = models.BooleanField()
+    item_count = models.IntegerField(default=0)
+    size_in_bytes = models.BigIntegerField(default=0)
+    notes = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUERIED)
+    errors = models.BooleanField(default=False)
+    ## download scheduling; see download_engine.DownloadScheduler
+    priority = models.IntegerField(choices=Priority.choices, default=Priority.NORMAL)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    reserved_bytes = models.BigIntegerField(default=0)  # this download's still-unwritten share of its `DiskReservation`
+    ## WASAPI listing-crawl progress
+    crawl_state = models.CharField(max_length=10, choices=CrawlState.choices, default=CrawlState.IDLE)
+    crawl_files_expected = models.IntegerField(default=0)  # the first page's `count`
+    crawl_files_listed = models.IntegerField(default=0)
+    crawl_bytes_listed = models.BigIntegerField(default=0)
+    crawl_updated_at = models.DateTimeField(null=True, blank=True)  # set per page; a stale value means the crawl died
+    crawl_lease = models.UUIDField(null=True, blank=True)  # the running crawl's token; one crawl per collection
+    ## download progress, for status pages: running counters, added to in batches by the download workers,
+    ##   and set exactly when a download is claimed or finishes; see download_engine.DownloadProgress
+    files_downloaded = models.IntegerField(default=0)
+    bytes_downloaded = models.BigIntegerField(default=0)  # includes the bytes of partly-downloaded files
+    download_rate = models.FloatField(default=0)  # bytes per second; a rolling average, across all the workers
+    progress_mark_bytes = models.BigIntegerField(default=0)  # `bytes_downloaded` at the start of the rate-window
+    progress_mark_time = models.FloatField(default=0)  # unix-time of the start of the rate-window
+    progress_updated_at = models.DateTimeField(null=True, blank=True)
+    ## post-download validation, `PENDING` again whenever a download completes; see validation_engine.ValidationWorker
+    validation_state = models.CharField(max_length=10, choices=ValidationState.choices, default=ValidationState.PENDING)
+    validation_updated_at = models.DateTimeField(null=True, blank=True)  # the running validation's heartbeat
+    validation_lease = models.UUIDField(null=True, blank=True)  # the running validation's token
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = (
+            models.Index(fields=['updated_at', 'id'], name='collection_updated_idx'),  # recent-collections keyset
+            models.Index(fields=['status', 'updated_at'], name='collection_status_updated_idx'),
+            models.Index(fields=['status', 'validation_state'], name='collection_validation_idx'),
+        )
+
     def __str__(self):
         return self.collection_id
 
+    def bytes_remaining(self) -> int:
+        """
+        Returns the bytes not yet transferred, summed in sql over the collection's not-yet-complete files.
+        """
+        remaining = self.files.exclude(download_state=CollectionFile.DownloadState.COMPLETE).aggregate(
+            remaining=models.Sum(models.F('size') - models.F('bytes_transferred'))
+        )['remaining']
+        return remaining or 0
+
+    def bytes_to_transfer(self) -> int:
+        """
+        Returns the part of bytes_remaining() that would actually be fetched: a file whose content is already
+          downloaded, in any collection, is linked rather than transferred (unless `DOWNLOAD_DEDUP` is off);
+          see CollectionFile.stored_copies().
+        """
+        if not settings.DOWNLOAD_DEDUP:
+            return self.bytes_remaining()
+        stored = CollectionFile.objects.filter(
+            download_state=CollectionFile.DownloadState.COMPLETE, size=models.OuterRef('size')
+        )
+        remaining = (
+            self.files.exclude(download_state=CollectionFile.DownloadState.COMPLETE)
+            .exclude(
+                (~models.Q(sha1='') & models.Exists(stored.filter(sha1=models.OuterRef('sha1'))))
+                | (models.Q(sha1='') & ~models.Q(md5='') & models.Exists(stored.filter(md5=models.OuterRef('md5'))))
+            )
+            .aggregate(remaining=models.Sum(models.F('size') - models.F('bytes_transferred')))['remaining']
+        )
+        return remaining or 0
+
+
+class CollectionFile(models.Model):
+    """
+    One WARC of a collection, as listed by WASAPI; replaces the old `Collection.all_files` json-list.
+    Filled in batches straight from WASAPI pages; see request_collection_helper.store_pages().
+    """
+
+    DownloadState = models.TextChoices('download_state', 'PENDING COMPLETE FAILED')
+    ValidationState = models.TextChoices('validation_state', 'PENDING VALID INVALID SKIPPED')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name='files')
+    filename = models.CharField(max_length=255, db_index=True)
+    size = models.BigIntegerField(db_index=True)
+    md5 = models.CharField(max_length=32, blank=True, default='', db_index=True)
+    sha1 = models.CharField(max_length=40, blank=True, default='', db_index=True)
+    crawl_time = models.CharField(max_length=32, blank=True, default='')  # WASAPI-formatted, so it sorts as text
+    locations = models.JSONField(default=list)
+    download_state = models.CharField(max_length=10, choices=DownloadState.choices, default=DownloadState.PENDING)
+    bytes_transferred = models.BigIntegerField(default=0)
+    failure = models.TextField(blank=True, default='')  # why the last attempt failed, for the collection's notes
+    ## the download worker holding the file, until its lease expires; see download_engine.DownloadWorker.lease_file()
+    leased_by = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    ## post-download validation; see validation_engine.ValidationWorker
+    validation_state = models.CharField(max_length=10, choices=ValidationState.choices, default=ValidationState.PENDING)
+    validation_error = models.TextField(blank=True, default='')  # the file's first problem, for the collection's notes
+
+    class Meta:
+        constraints = (models.UniqueConstraint(fields=['collection', 'filename'], name='unique_collection_filename'),)
+        indexes = (
+            models.Index(fields=['collection', 'download_state'], name='collfile_coll_state_idx'),
+            models.Index(fields=['collection', 'crawl_time'], name='collfile_coll_crawltime_idx'),
+        )
+
+    def __str__(self):
+        return self.filename
+
+    def stored_copies(self) -> models.QuerySet:
+        """
+        Returns the downloaded (`COMPLETE`) files, in any collection, with this file's content:
+          the same size, and sha1 -- or, lacking one, md5. The WASAPI checksums key the content-addressed lookup.
+        """
+        if self.sha1:
+            match: dict = {'sha1': self.sha1}
+        elif self.md5:
+            match = {'md5': self.md5}
+        else:
+            return CollectionFile.objects.none()
+        return CollectionFile.objects.filter(download_state=CollectionFile.DownloadState.COMPLETE, size=self.size, **match)
+
+
+class DiskReservation(models.Model):
+    """
+    The bytes that running downloads have yet to write under a download-root; one row per root.
+    Workers reserve a collection's bytes here before starting it, with one conditional update,
+      so concurrent workers can't admit collections that together don't fit; see download_engine.reserve_disk_space().
+    """
+
+    root = models.CharField(max_length=255, unique=True)
+    reserved_bytes = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return self.root
+
+
+class TransferSlot(models.Model):
+    """
+    One of the `DOWNLOAD_CONCURRENCY` transfer-slots shared by every download worker.
+    A worker leases a slot, with one conditional update (as it leases a file), before starting a transfer,
+      so the workers together run at most that many; a crashed worker's slots expire, as its file-leases do.
+      See download_engine.DownloadWorker.take_transfer_slot().
+    """
+
+    number = models.IntegerField(unique=True)
+    leased_by = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'slot {self.number}'
+
 
 class UserProfile(models.Model):
     """
@@ -1,10 +1,42 @@
+import asyncio
+import datetime
+import errno
+import gzip
+import hashlib
+import json
 import logging
+import pathlib
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib import parse
 
+import httpx
 from django.conf import settings as project_settings
+from django.contrib.auth.models import User
 
 # from django.test import TestCase                  # TestCase requires db
 from django.test import SimpleTestCase as TestCase  # SimpleTestCase does not require db
+from django.test import TestCase as DbTestCase  # for tests that need the db
 from django.test.utils import override_settings
+from django.utils import timezone
+
+from warc_manager_app.lib import (
+    download_engine,
+    ingest_helper,
+    request_collection_helper,
+    validation_engine,
+    warc_index,
+    warc_reader,
+    warc_validator,
+    wasapi_client,
+)
+from warc_manager_app.lib.request_collection_helper import AsyncCollectionDataPrepper, CollectionDataPrepper
+from warc_manager_app.models import Collection, CollectionFile, DiskReservation, TransferSlot, UserProfile
 
 
 log = logging.getLogger(__name__)
@@ -39,3 +71,1639 @@ class ErrorCheckTest(TestCase):
         log.debug(f'debug, ``{project_settings.DEBUG}``')
         response = self.client.get('/error_check/')
         self.assertEqual(404, response.status_code)
+
+
+def make_fake_crawl_time(file_number: int) -> str:
+    """
+    Returns a WASAPI-style `crawl-time` for the given fake file; later files have later crawl-times.
+    """
+    crawl_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(hours=file_number)
+    return crawl_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def make_fake_wasapi_transport(
+    file_count: int, page_size: int, predictable: bool = True, failing_pages: dict[int, int] | None = None
+) -> httpx.MockTransport:
+    """
+    Returns a transport that serves WASAPI-style pages of `page_size` files.
+    - When `predictable` is False, the `next` links carry an opaque cursor instead of a `page` param.
+    - Honors the `crawl-time-after` param.
+    - `failing_pages` maps a page-number to how many times it's refused (503) before being served.
+    - Records each requested url in `transport.requested_urls`.
+    """
+    requested_urls: list[str] = []
+    failures_left: dict[int, int] = dict(failing_pages or {})
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested_urls.append(str(request.url))
+        query: dict = dict(parse.parse_qsl(request.url.query.decode()))
+        if predictable:
+            page_number = int(query.get('page', '1'))
+        else:
+            page_number = int(query.get('cursor', 'p1')[1:])
+        if failures_left.get(page_number):
+            failures_left[page_number] -= 1
+            return httpx.Response(503)
+        crawl_time_after: str = query.get('crawl-time-after', '')
+        matching: list[int] = [i for i in range(file_count) if make_fake_crawl_time(i) > crawl_time_after]
+        start: int = (page_number - 1) * page_size
+        files: list = [
+            {'filename': f'file_{i}.warc.gz', 'size': 10, 'crawl-time': make_fake_crawl_time(i)}
+            for i in matching[start : start + page_size]
+        ]
+        next_url = None
+        if start + page_size < len(matching):
+            next_param = f'page={page_number + 1}' if predictable else f'cursor=p{page_number + 1}'
+            next_url = f'{request.url.copy_remove_param("page").copy_remove_param("cursor")}&{next_param}'
+        body: bytes = json.dumps({'count': len(matching), 'next': next_url, 'previous': None, 'files': files}).encode()
+        return httpx.Response(200, stream=httpx.ByteStream(body))  # a stream, so `resp.elapsed` gets set on read
+
+    transport = httpx.MockTransport(handler)
+    transport.requested_urls = requested_urls
+    return transport
+
+
+@override_settings(WASAPI_REQUESTS_PER_SECOND=0)
+class CollectionDataPrepperTest(TestCase):
+    """
+    Checks WASAPI page-fetching.
+    """
+
+    def prep_files(self, transport: httpx.MockTransport) -> list:
+        prepper = CollectionDataPrepper('123', client=httpx.Client(transport=transport), keep_files=True)
+        initial_data: dict = prepper.grab_initial_collection_data()
+        prepper.get_rest_of_files(initial_data)
+        return prepper.all_files
+
+    def test_predicted_pages_keep_order(self):
+        """
+        Checks that concurrently-fetched pages come back complete and in page order.
+        """
+        files: list = self.prep_files(make_fake_wasapi_transport(file_count=95, page_size=10))
+        self.assertEqual([f'file_{i}.warc.gz' for i in range(95)], [file['filename'] for file in files])
+
+    def test_unpredictable_pages_follow_next_links(self):
+        """
+        Checks fallback to following `next` links when the page-urls can't be predicted.
+        """
+        transport: httpx.MockTransport = make_fake_wasapi_transport(file_count=25, page_size=10, predictable=False)
+        prepper = CollectionDataPrepper('123', client=httpx.Client(transport=transport), keep_files=True)
+        initial_data: dict = prepper.grab_initial_collection_data()
+        self.assertIsNone(prepper.predict_page_urls(initial_data))
+        prepper.get_rest_of_files(initial_data)
+        self.assertEqual(25, len(prepper.all_files))
+
+    def test_overview_without_keeping_files(self):
+        """
+        Checks that the overview totals are folded in as pages arrive, without keeping the file-records.
+        """
+        prepper = CollectionDataPrepper('123', client=httpx.Client(transport=make_fake_wasapi_transport(1000, 10)))
+        prepper.get_rest_of_files(prepper.grab_initial_collection_data())
+        self.assertEqual([], prepper.all_files)
+        self.assertEqual({'total_size': '0.00 GB', 'item_count': 1000}, prepper.build_overview_dict())
+        self.assertEqual(10_000, prepper.total_size_in_bytes)
+
+
+class WasapiClientTest(TestCase):
+    """
+    Checks the process-wide WASAPI clients.
+    """
+
+    def setUp(self):
+        self.addCleanup(wasapi_client.close_clients)
+
+    def test_preppers_share_one_client(self):
+        """
+        Checks that preppers reuse the one lazily-created client, and that closing it lets a new one be created.
+        """
+        first = CollectionDataPrepper('123')
+        second = CollectionDataPrepper('456')
+        self.assertIs(first.client, second.client)
+        wasapi_client.close_clients()
+        self.assertTrue(first.client.is_closed)
+        self.assertIsNot(first.client, CollectionDataPrepper('123').client)
+
+    def test_async_client_is_per_event_loop(self):
+        """
+        Checks that the async client is shared within an event-loop, but not across loops.
+        """
+
+        async def get_clients() -> tuple:
+            return (wasapi_client.get_async_client(), AsyncCollectionDataPrepper('123').client)
+
+        (first_loop_client, first_loop_prepper_client) = asyncio.run(get_clients())
+        self.assertIs(first_loop_client, first_loop_prepper_client)
+        (second_loop_client, _) = asyncio.run(get_clients())
+        self.assertIsNot(first_loop_client, second_loop_client)
+
+    @override_settings(WASAPI_RETRY_MAX_DELAY_SECONDS=30)
+    def test_backoff_is_capped_even_past_retry_after(self):
+        """
+        Checks that a far-off `Retry-After` is honored only up to the maximum delay.
+        """
+        self.assertLessEqual(wasapi_client.compute_backoff(20, base_delay=0.5), 30)
+        self.assertEqual(10, wasapi_client.compute_backoff(1, base_delay=0.001, retry_after=10))
+        self.assertEqual(30, wasapi_client.compute_backoff(1, base_delay=0.5, retry_after=86400))
+
+    def test_retry_after_date_without_zone_is_utc(self):
+        """
+        Checks that a `Retry-After` http-date with a `-0000` zone (parsed without tzinfo) is read as UTC.
+        """
+        retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=60)
+        for zone in ('GMT', '-0000'):
+            value: str = retry_at.strftime(f'%a, %d %b %Y %H:%M:%S {zone}')
+            wait: float | None = wasapi_client.parse_retry_after(httpx.Response(503, headers={'Retry-After': value}))
+            self.assertAlmostEqual(60, wait, delta=2)
+
+
+@override_settings(WASAPI_REQUESTS_PER_SECOND=10, WASAPI_BURST=2, WASAPI_MIN_REQUESTS_PER_SECOND=1)
+class RateLimiterTest(TestCase):
+    """
+    Checks the shared WASAPI rate-limiter, and the retries that feed it.
+    """
+
+    def setUp(self):
+        self.now = 0.0
+        self.limiter = wasapi_client.AdaptiveRateLimiter(clock=lambda: self.now)
+        patcher = mock.patch.object(wasapi_client, '_rate_limiter', self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bucket_allows_burst_then_paces(self):
+        """
+        Checks that the burst goes straight through, then callers are spaced at the rate, and refill over time.
+        """
+        self.assertEqual([0.0, 0.0, 0.1, 0.2], [round(self.limiter.reserve(), 3) for _ in range(4)])
+        self.now = 1.0
+        self.assertEqual(0.0, self.limiter.reserve())
+
+    def test_throttle_halves_rate_and_honors_retry_after(self):
+        """
+        Checks that a throttle holds everyone back for the `Retry-After`, at half the rate, and successes restore it;
+          a burst of throttles only cuts the rate once.
+        """
+        self.limiter.record_throttle(retry_after=3)
+        self.limiter.record_throttle(retry_after=3)
+        self.assertEqual(5, self.limiter.rate)
+        self.assertEqual([3.2, 3.4], [round(self.limiter.reserve(), 3) for _ in range(2)])
+        for _ in range(wasapi_client.RATE_RECOVERY_STEPS):
+            self.limiter.record_success()
+        self.assertEqual(10, self.limiter.rate)
+
+    @override_settings(WASAPI_RETRY_MAX_DELAY_SECONDS=30)
+    def test_retry_after_hold_is_capped(self):
+        """
+        Checks that a far-off `Retry-After` holds callers back no longer than `WASAPI_RETRY_MAX_DELAY_SECONDS`.
+        """
+        self.limiter.record_throttle(retry_after=86400)
+        self.assertEqual(30.2, round(self.limiter.reserve(), 3))
+
+    def test_retries_throttled_request(self):
+        """
+        Checks that a 429 is retried after its `Retry-After`, returning the eventual page and slowing the limiter.
+        """
+        responses = [httpx.Response(429, headers={'Retry-After': '2'}), httpx.Response(200, json={'count': 0})]
+        client = httpx.Client(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+        with mock.patch.object(wasapi_client.time, 'sleep') as mock_sleep:
+            response: httpx.Response = wasapi_client.get_with_retries(client, 'https://wasapi.example/webdata')
+        self.assertEqual(200, response.status_code)
+        self.assertLessEqual(2, mock_sleep.call_args_list[-1].args[0])
+        self.assertAlmostEqual(5.2, self.limiter.rate)  # halved, then one success-step back up
+
+    @override_settings(WASAPI_MAX_ATTEMPTS=2)
+    def test_gives_up_after_max_attempts(self):
+        """
+        Checks that a persistently-failing request returns its last response once the attempts run out.
+        """
+        client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+        with mock.patch.object(wasapi_client.time, 'sleep') as mock_sleep:
+            response: httpx.Response = wasapi_client.get_with_retries(client, 'https://wasapi.example/webdata')
+        self.assertEqual(500, response.status_code)
+        self.assertEqual(1, mock_sleep.call_count)
+
+
+@override_settings(WASAPI_REQUESTS_PER_SECOND=0, WASAPI_RETRY_BASE_DELAY_SECONDS=0)
+class CollectionCheckTest(DbTestCase):
+    """
+    Checks the collection-check: the `Collection` record as a read-through cache for the overview,
+      and the listing-crawl that runs on after the first page.
+    """
+
+    def setUp(self):
+        self.transport = make_fake_wasapi_transport(file_count=30, page_size=10)
+        for prepper_name, prepper_class, client_class in (
+            ('CollectionDataPrepper', CollectionDataPrepper, httpx.Client),
+            ('AsyncCollectionDataPrepper', AsyncCollectionDataPrepper, httpx.AsyncClient),
+        ):
+            patcher = mock.patch.object(
+                request_collection_helper,
+                prepper_name,
+                side_effect=lambda coll_id, prepper_class=prepper_class, client_class=client_class, **kwargs: prepper_class(
+                    coll_id, client=client_class(transport=self.transport), **kwargs
+                ),
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        ## runs the rest of the crawl inline, instead of in a background thread
+        thread_patcher = mock.patch.object(
+            request_collection_helper, 'launch_crawl_thread', side_effect=request_collection_helper.finish_collection_crawl
+        )
+        self.mock_launch_crawl_thread = thread_patcher.start()
+        self.addCleanup(thread_patcher.stop)
+
+    def check(self, collection_id: str, force_refresh: bool = False) -> dict:
+        """
+        Runs a check, then (as the progress-poll would) returns the finished check-result.
+        """
+        check_result: dict = request_collection_helper.start_collection_check(collection_id, force_refresh)
+        if check_result['state'] == 'crawling':
+            check_result = request_collection_helper.get_crawl_progress(collection_id)
+        return check_result
+
+    def test_repeat_check_uses_cache(self):
+        """
+        Checks that a second check within the TTL doesn't crawl WASAPI.
+        """
+        first: dict = self.check('123')
+        second: dict = self.check('123')
+        self.assertEqual('ready', second['state'])
+        self.assertEqual(first, second)
+        self.assertEqual(3, len(self.transport.requested_urls))
+        self.assertEqual(30, Collection.objects.get(collection_id='123').item_count)
+
+    def test_stale_or_forced_check_recrawls(self):
+        """
+        Checks that a stale record, or a forced refresh, triggers a new crawl.
+        """
+        self.check('123')
+        self.check('123', force_refresh=True)
+        self.assertEqual(6, len(self.transport.requested_urls))
+        stale_time = timezone.now() - datetime.timedelta(seconds=project_settings.COLLECTION_OVERVIEW_CACHE_TTL_SECONDS + 1)
+        Collection.objects.filter(collection_id='123').update(updated_at=stale_time)
+        self.check('123')
+        self.assertLess(6, len(self.transport.requested_urls))
+
+    def test_refused_page_is_retried_without_restarting(self):
+        """
+        Checks that a page refused mid-crawl is retried on its own, and the crawl completes with every file.
+        """
+        self.transport = make_fake_wasapi_transport(file_count=30, page_size=10, failing_pages={2: 2})
+        check_result: dict = self.check('123')
+        self.assertEqual('ready', check_result['state'])
+        self.assertEqual(30, CollectionFile.objects.filter(collection__collection_id='123').count())
+        self.assertEqual(5, len(self.transport.requested_urls))  # pages 1 and 3 once; page 2 three times
+
+    @override_settings(WASAPI_INCREMENTAL_OVERLAP_SECONDS=3600)
+    def test_stale_check_fetches_only_newer_files(self):
+        """
+        Checks that a stale record is refreshed from its crawl-time watermark, merging only the new files.
+        """
+        self.check('123')
+        stale_time = timezone.now() - datetime.timedelta(seconds=project_settings.COLLECTION_OVERVIEW_CACHE_TTL_SECONDS + 1)
+        Collection.objects.filter(collection_id='123').update(updated_at=stale_time)
+        self.transport = make_fake_wasapi_transport(file_count=35, page_size=10)  # 5 files added upstream
+        check_result: dict = self.check('123')
+        self.assertEqual(35, check_result['overview']['item_count'])
+        self.assertEqual(1, len(self.transport.requested_urls))
+        self.assertIn('crawl-time-after', self.transport.requested_urls[0])
+        collection = Collection.objects.get(collection_id='123')
+        self.assertEqual(350, collection.size_in_bytes)
+        stored_filenames: list[str] = list(collection.files.order_by('crawl_time').values_list('filename', flat=True))
+        self.assertEqual([f'file_{i}.warc.gz' for i in range(35)], stored_filenames)
+
+    def test_refused_incremental_check_is_not_taken_for_no_new_files(self):
+        """
+        Checks that a stale record whose incremental first page WASAPI refuses is marked failed, not refreshed.
+        """
+        self.check('123')
+        stale_time = timezone.now() - datetime.timedelta(seconds=project_settings.COLLECTION_OVERVIEW_CACHE_TTL_SECONDS + 1)
+        Collection.objects.filter(collection_id='123').update(updated_at=stale_time)
+        self.transport = httpx.MockTransport(lambda request: httpx.Response(503, stream=httpx.ByteStream(b'')))
+        self.assertEqual({'state': 'failed'}, request_collection_helper.start_collection_check('123'))
+        collection = Collection.objects.get(collection_id='123')
+        self.assertEqual((Collection.CrawlState.FAILED, stale_time), (collection.crawl_state, collection.updated_at))
+        self.assertEqual(30, collection.item_count)
+
+    def test_check_returns_after_first_page(self):
+        """
+        Checks that a check returns the first page's progress while the crawl runs on,
+          that a repeat check joins the running crawl, and that a crawl which stops recording pages is reported failed.
+        """
+        self.mock_launch_crawl_thread.side_effect = None  # the "background" crawl never gets going
+        check_result: dict = request_collection_helper.start_collection_check('123')
+        self.assertEqual(
+            {'state': 'crawling', 'progress': {'files_listed': 10, 'files_expected': 30, 'size_listed': '0.00 GB'}},
+            check_result,
+        )
+        self.assertEqual(1, len(self.transport.requested_urls))
+        self.assertEqual('crawling', request_collection_helper.start_collection_check('123')['state'])
+        self.assertEqual(1, len(self.transport.requested_urls))
+        stale_time = timezone.now() - datetime.timedelta(seconds=project_settings.WASAPI_CRAWL_STALE_SECONDS + 1)
+        Collection.objects.filter(collection_id='123').update(crawl_updated_at=stale_time)
+        self.assertEqual({'state': 'failed'}, request_collection_helper.get_crawl_progress('123'))
+
+    def test_concurrent_check_joins_in_flight_crawl(self):
+        """
+        Checks that a check arriving while another holds the crawl-lease joins that crawl, without calling WASAPI.
+        """
+        wasapi_transport: httpx.MockTransport = make_fake_wasapi_transport(file_count=30, page_size=10)
+        joined_results: list[dict] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if not joined_results:  # a second check, while the first waits on its first page
+                joined_results.append(request_collection_helper.start_collection_check('123'))
+            return wasapi_transport.handle_request(request)
+
+        self.transport = httpx.MockTransport(handler)
+        self.assertEqual(30, self.check('123')['overview']['item_count'])
+        self.assertEqual('crawling', joined_results[0]['state'])
+        self.assertEqual(3, len(wasapi_transport.requested_urls))
+        self.assertEqual(1, Collection.objects.filter(collection_id='123').count())
+
+    def test_stale_crawl_is_taken_over(self):
+        """
+        Checks that a stalled crawl's lease is taken over by the next check, and that the stalled crawl can't record more.
+        """
+        self.mock_launch_crawl_thread.side_effect = None  # the first crawl stalls after its first page
+        request_collection_helper.start_collection_check('123')
+        stalled_lease = Collection.objects.get(collection_id='123').crawl_lease
+        stale_time = timezone.now() - datetime.timedelta(seconds=project_settings.WASAPI_CRAWL_STALE_SECONDS + 1)
+        Collection.objects.filter(collection_id='123').update(crawl_updated_at=stale_time)
+        self.mock_launch_crawl_thread.side_effect = request_collection_helper.finish_collection_crawl
+        self.assertEqual(30, self.check('123')['overview']['item_count'])
+        collection = Collection.objects.get(collection_id='123')
+        with self.assertRaises(request_collection_helper.CrawlLeaseLost):
+            request_collection_helper.record_crawl_progress(collection, stalled_lease, 10, 100)
+
+    def test_check_of_unknown_collection_leaves_no_record(self):
+        """
+        Checks that the record created to hold the crawl-lease is removed when WASAPI lists nothing.
+        """
+        self.transport = make_fake_wasapi_transport(file_count=0, page_size=10)
+        self.assertEqual({'state': 'not_found'}, request_collection_helper.start_collection_check('123'))
+        self.assertFalse(Collection.objects.filter(collection_id='123').exists())
+
+    def test_check_view_polls_until_form_is_ready(self):
+        """
+        Checks that the check-view returns a polling progress-fragment, and the poll returns the confirmation form.
+        """
+        self.client.force_login(User.objects.create_user(username='tester'))
+        response = self.client.post('/hlpr_check_coll_id/', {'collection_id': '123'})
+        content: str = response.content.decode()
+        self.assertIn('Listing files: 10 of 30', content)
+        self.assertIn('hx-get="/hlpr_crawl_progress/?collection_id=123"', content)
+        response = self.client.get('/hlpr_crawl_progress/', {'collection_id': '123'})
+        self.assertIn('really_start_download', response.content.decode())
+
+    @override_settings(BATCH_CHECK_WORKERS=3)
+    def test_batch_check_fetches_first_pages_concurrently(self):
+        """
+        Checks that a batch-check fetches its collections' first pages at once, skips downloaded collections,
+          and returns a table that polls while the crawls run on.
+        """
+        self.mock_launch_crawl_thread.side_effect = None  # the crawls run on "in the background"
+        wasapi_transport: httpx.MockTransport = make_fake_wasapi_transport(file_count=30, page_size=10)
+        all_first_pages_requested = threading.Barrier(3, timeout=5)  # only passes if the 3 requests are in flight together
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            all_first_pages_requested.wait()
+            return wasapi_transport.handle_request(request)
+
+        self.transport = httpx.MockTransport(handler)
+        Collection.objects.create(collection_id='999', status=Collection.Status.COMPLETE)
+        collection_ids: list[str] = request_collection_helper.parse_collection_ids('123, 456\n789 999,123')
+        self.assertEqual(['123', '456', '789', '999'], collection_ids)
+        rows: list[dict] = request_collection_helper.start_batch_check(collection_ids)
+        self.assertEqual(['crawling', 'crawling', 'crawling', 'completed'], [row['state'] for row in rows])
+        content: str = request_collection_helper.render_batch_results(rows).content.decode()
+        self.assertIn('hx-get="/hlpr_batch_progress/?collection_ids=123%2C456%2C789%2C999"', content)
+        self.assertIn('10 of 30', content)
+
+    def test_batch_check_releases_claimed_crawls_when_planning_fails(self):
+        """
+        Checks that a batch-check that fails part-way through planning releases the crawls it already claimed.
+        """
+        self.check('123')
+        stale_time = timezone.now() - datetime.timedelta(seconds=project_settings.COLLECTION_OVERVIEW_CACHE_TTL_SECONDS + 1)
+        Collection.objects.filter(collection_id='123').update(updated_at=stale_time)
+        real_check_status = request_collection_helper.check_collection_status
+
+        def check_status(collection_id: str) -> dict:
+            if collection_id == '456':
+                raise RuntimeError('db went away')
+            return real_check_status(collection_id)
+
+        failing_check = mock.patch.object(request_collection_helper, 'check_collection_status', side_effect=check_status)
+        with failing_check, self.assertRaises(RuntimeError), self.assertLogs(request_collection_helper.log, level='ERROR'):
+            request_collection_helper.start_batch_check(['123', '456'])
+        collection = Collection.objects.get(collection_id='123')
+        self.assertEqual((Collection.CrawlState.FAILED, None), (collection.crawl_state, collection.crawl_lease))
+        self.assertEqual(stale_time, collection.updated_at)
+
+    def test_crawls_run_at_most_crawl_workers_at_once(self):
+        """
+        Checks that background crawls beyond the `WASAPI_CRAWL_WORKERS` slots wait for one to free up.
+        """
+        (running, most_running) = ([], [0])
+        lock = threading.Lock()
+
+        def crawl(*args) -> None:
+            with lock:
+                running.append(args[0])
+                most_running[0] = max(most_running[0], len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(args[0])
+
+        slots = mock.patch.object(request_collection_helper, 'CRAWL_SLOTS', threading.BoundedSemaphore(2))
+        crawls = mock.patch.object(request_collection_helper, 'finish_collection_crawl', side_effect=crawl)
+        with slots, crawls, ThreadPoolExecutor(max_workers=5) as executor:
+            list(executor.map(lambda i: request_collection_helper.run_crawl_thread(i, None, {}, None), range(5)))
+        self.assertEqual(2, most_running[0])
+
+    @override_settings(WASAPI_CRAWL_STALE_SECONDS=0.3)
+    def test_queued_crawl_keeps_its_lease_while_waiting(self):
+        """
+        Checks that a crawl queued behind `WASAPI_CRAWL_WORKERS` running crawls, for several stale-windows, still shows
+          as crawling when it gets its slot, and its lease can't be taken over.
+        """
+        self.check('123')
+        collection = Collection.objects.get(collection_id='123')
+        lease: uuid.UUID = request_collection_helper.claim_crawl(collection)
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()  # the one slot, held by a running crawl ...
+        threading.Timer(1.0, slots.release).start()  # ... that finishes after three stale-windows
+        with mock.patch.object(request_collection_helper, 'CRAWL_SLOTS', slots):
+            request_collection_helper.wait_for_crawl_slot(collection, lease)
+        self.assertEqual('crawling', request_collection_helper.get_crawl_progress('123')['state'])
+        self.assertIsNone(request_collection_helper.claim_crawl(collection))
+        self.assertEqual(lease, Collection.objects.get(collection_id='123').crawl_lease)
+        Collection.objects.filter(pk=collection.pk).update(crawl_lease=uuid.uuid4())  # taken over by a forced re-check
+        slot_still_taken = mock.patch.object(request_collection_helper, 'CRAWL_SLOTS', slots)  # by the first wait
+        with slot_still_taken, self.assertRaises(request_collection_helper.CrawlLeaseLost):
+            request_collection_helper.wait_for_crawl_slot(collection, lease)
+
+    def test_batch_view_returns_one_table(self):
+        """
+        Checks that the batch view returns one table, whose poll returns the finished counts from the records.
+        """
+        self.client.force_login(User.objects.create_user(username='tester'))
+        response = self.client.post('/hlpr_check_coll_ids_batch/', {'collection_ids': '123\n456'})
+        self.assertEqual(2, response.content.decode().count('10 of 30'))
+        response = self.client.get('/hlpr_batch_progress/', {'collection_ids': '123,456'})
+        content: str = response.content.decode()
+        self.assertEqual(2, content.count('<td>30</td>'))
+        self.assertNotIn('hx-get', content)  # the (inline) crawls have finished, so the table stops polling
+        self.assertEqual(6, len(self.transport.requested_urls))
+        with self.assertNumQueries(1):
+            rows: list[dict] = request_collection_helper.get_batch_progress(['123', '456', '789'])
+        self.assertEqual(['ready', 'ready', 'not_found'], [row['state'] for row in rows])
+        with override_settings(BATCH_CHECK_MAX_COLLECTIONS=1):
+            response = self.client.post('/hlpr_check_coll_ids_batch/', {'collection_ids': '123 456'})
+        self.assertIn('at most 1 collections', response.content.decode())
+
+    async def test_async_check_stores_files_then_uses_cache(self):
+        """
+        Checks that the async check's crawl stores every file, and that a repeat check is served from the cache.
+        """
+        first: dict = await request_collection_helper.start_collection_check_async('123')
+        self.assertEqual('crawling', first['state'])
+        second: dict = await request_collection_helper.start_collection_check_async('123')
+        self.assertEqual(
+            {'state': 'ready', 'overview': {'total_size': '0.00 GB', 'item_count': 30, 'transfer_size': '0.00 GB'}}, second
+        )
+        self.assertEqual(3, len(self.transport.requested_urls))
+        collection: Collection = await Collection.objects.aget(collection_id='123')
+        self.assertEqual(300, collection.size_in_bytes)
+        self.assertEqual(30, await collection.files.acount())
+
+    def test_async_view_requires_login(self):
+        """
+        Checks that the async view requires login, then returns the progress-fragment.
+        """
+        response = self.client.post('/hlpr_check_coll_id_async/', {'collection_id': '123'})
+        self.assertEqual(302, response.status_code)
+        self.client.force_login(User.objects.create_user(username='tester'))
+        response = self.client.post('/hlpr_check_coll_id_async/', {'collection_id': '123'})
+        self.assertEqual(200, response.status_code)
+        self.assertIn('Listing files: 10 of 30', response.content.decode())
+
+
+def make_fake_warc_transport(contents: dict[str, bytes]) -> httpx.MockTransport:
+    """
+    Returns a transport that serves the given WARC bytes, keyed by filename, at `https://warcs.example.org/<filename>`.
+    """
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        filename: str = request.url.path.rsplit('/', 1)[-1]
+        if filename not in contents:
+            return httpx.Response(404)
+        return httpx.Response(200, stream=httpx.ByteStream(contents[filename]))
+
+    return httpx.MockTransport(handler)
+
+
+def make_fake_warc_records(contents: dict[str, bytes]) -> list[dict]:
+    """
+    Returns WASAPI-style file-records for the given WARC bytes.
+    """
+    return [
+        {
+            'filename': filename,
+            'size': len(content),
+            'checksums': {'md5': hashlib.md5(content).hexdigest(), 'sha1': hashlib.sha1(content).hexdigest()},
+            'locations': [f'https://warcs.example.org/{filename}'],
+        }
+        for (filename, content) in contents.items()
+    ]
+
+
+def create_fake_collection(collection_id: str, records: list[dict], **kwargs) -> Collection:
+    """
+    Creates a collection, with a `CollectionFile` row for each WASAPI-style record.
+    """
+    collection = Collection.objects.create(collection_id=collection_id, item_count=len(records), **kwargs)
+    CollectionFile.objects.bulk_create([ingest_helper.build_collection_file(collection, r) for r in records])
+    return collection
+
+
+@override_settings(RECENT_COLLECTIONS_PAGE_SIZE=10)
+class RecentCollectionsTest(DbTestCase):
+    """
+    Checks the keyset-paginated recent-collections listing.
+    """
+
+    def setUp(self):
+        base_time: datetime.datetime = timezone.now()
+        for i in range(25):
+            collection = Collection.objects.create(collection_id=str(i), size_in_bytes=i * 1024**3)
+            Collection.objects.filter(pk=collection.pk).update(updated_at=base_time - datetime.timedelta(minutes=i))
+
+    def test_pages_walk_newest_first(self):
+        """
+        Checks that following the cursors lists every collection once, newest first, one query per page.
+        """
+        seen: list[str] = []
+        cursor: str | None = None
+        while True:
+            with self.assertNumQueries(1):
+                page: dict = request_collection_helper.get_recent_collections(before=cursor)
+            seen.extend(item['collection_id'] for item in page['items'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual([str(i) for i in range(25)], seen)
+        self.assertEqual('24.00 GB', page['items'][-1]['total_size'])
+
+    def test_status_filter(self):
+        """
+        Checks that the status-filter limits the listing.
+        """
+        Collection.objects.filter(collection_id__in=['3', '7']).update(status=Collection.Status.COMPLETE)
+        page: dict = request_collection_helper.get_recent_collections(status=Collection.Status.COMPLETE)
+        self.assertEqual(['3', '7'], [item['collection_id'] for item in page['items']])
+        self.assertIsNone(page['next_cursor'])
+
+    def test_malformed_cursor_gives_first_page(self):
+        """
+        Checks that a garbled `before`-cursor shows the first page, rather than erroring.
+        """
+        self.client.force_login(User.objects.create_user(username='tester'))
+        with self.assertLogs(request_collection_helper.log, level='WARNING'):
+            response = self.client.get('/request_collection/', {'before': 'garbage'})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('0', response.context['recent_items'][0]['collection_id'])
+
+
+class CollectionFileIngesterTest(DbTestCase):
+    """
+    Checks batched upserts of WASAPI file-records.
+    """
+
+    def test_reingest_updates_without_duplicating(self):
+        """
+        Checks that re-ingesting a collection updates rows in place, leaving download-progress alone.
+        """
+        collection = Collection.objects.create(collection_id='123')
+        records: list[dict] = [{'filename': f'file_{i}.warc.gz', 'size': 10} for i in range(25)]
+        ingester = ingest_helper.CollectionFileIngester(collection, batch_size=10)
+        ingester.add_page(records[:15])
+        ingester.add_page(records[15:])
+        self.assertEqual(25, ingester.finish()['rows_written'])
+        collection.files.filter(filename='file_0.warc.gz').update(download_state=CollectionFile.DownloadState.COMPLETE)
+        ## re-ingest, with a checksum now listed ------------------------
+        records[0]['checksums'] = {'sha1': 'a' * 40}
+        ingester = ingest_helper.CollectionFileIngester(collection, batch_size=10)
+        ingester.add_page(records)
+        stats: dict = ingester.finish()
+        self.assertEqual(25, stats['rows_written'])
+        self.assertGreater(stats['rows_per_second'], 0)
+        self.assertEqual(25, collection.files.count())
+        first_file: CollectionFile = collection.files.get(filename='file_0.warc.gz')
+        self.assertEqual(('a' * 40, CollectionFile.DownloadState.COMPLETE), (first_file.sha1, first_file.download_state))
+
+
+class DownloadWorkerTest(DbTestCase):
+    """
+    Checks the queue-and-worker download flow.
+    """
+
+    def setUp(self):
+        self.contents: dict[str, bytes] = {f'file_{i}.warc.gz': bytes([i]) * (1000 + i) for i in range(5)}
+        self.download_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.download_root.cleanup)
+        settings_override = override_settings(
+            WARC_DOWNLOAD_ROOT=self.download_root.name, DOWNLOAD_BUFFER_SIZE=256, DOWNLOAD_FREE_SPACE_MARGIN_BYTES=0
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_enqueue_then_download(self):
+        """
+        Checks that a queued collection is claimed, downloaded to disk, and marked complete.
+        """
+        create_fake_collection('123', make_fake_warc_records(self.contents))
+        self.assertTrue(request_collection_helper.start_download('123', User.objects.create_user(username='tester')))
+        self.assertEqual({'exists': 'in_progress'}, request_collection_helper.check_collection_status('123'))
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=make_fake_warc_transport(self.contents)))
+        worker.run(once=True)
+        collection = Collection.objects.get(collection_id='123')
+        self.assertEqual(Collection.Status.COMPLETE, collection.status)
+        for filename, content in self.contents.items():
+            self.assertEqual(content, (pathlib.Path(self.download_root.name) / '123' / filename).read_bytes())
+        self.assertEqual(
+            (5, sum(map(len, self.contents.values()))), (collection.files_downloaded, collection.bytes_downloaded)
+        )
+
+    def test_failed_file_pauses_collection(self):
+        """
+        Checks that a failed file leaves the collection paused, with the failure noted.
+        """
+        records: list[dict] = make_fake_warc_records(self.contents)
+        records[0]['locations'] = ['https://warcs.example.org/missing.warc.gz']
+        create_fake_collection('123', records, status=Collection.Status.QUEUED_FOR_START)
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=make_fake_warc_transport(self.contents)))
+        worker.run(once=True)
+        collection = Collection.objects.get(collection_id='123')
+        self.assertEqual(Collection.Status.PAUSED, collection.status)
+        self.assertTrue(collection.errors)
+        self.assertIn('file_0.warc.gz', collection.notes)
+
+    def test_filename_outside_download_dir_is_refused(self):
+        """
+        Checks that a listed filename with directory parts is marked failed, and nothing is written outside the collection.
+        """
+        records: list[dict] = make_fake_warc_records(self.contents)
+        records[0]['filename'] = '../escaped.warc.gz'  # still served, from file_0's location
+        create_fake_collection('123', records, status=Collection.Status.QUEUED_FOR_START)
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=make_fake_warc_transport(self.contents)))
+        worker.run(once=True)
+        escaped: CollectionFile = CollectionFile.objects.get(filename='../escaped.warc.gz')
+        self.assertEqual(CollectionFile.DownloadState.FAILED, escaped.download_state)
+        self.assertIn('unsafe filename', escaped.failure)
+        self.assertEqual([], list(pathlib.Path(self.download_root.name).glob('escaped.warc.gz*')))
+        self.assertEqual(4, CollectionFile.objects.filter(download_state=CollectionFile.DownloadState.COMPLETE).count())
+        self.assertEqual(
+            (False, False, True),
+            tuple(download_engine.is_safe_filename(name) for name in ('/etc/passwd', '..', 'ARCHIVEIT-1-x.warc.gz')),
+        )
+
+    def test_checksum_mismatch_marks_file_failed(self):
+        """
+        Checks that a file whose bytes don't match its WASAPI checksum is marked failed on its row.
+        """
+        records: list[dict] = make_fake_warc_records(self.contents)
+        records[2]['checksums']['sha1'] = '0' * 40
+        create_fake_collection('123', records, status=Collection.Status.QUEUED_FOR_START)
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=make_fake_warc_transport(self.contents)))
+        worker.run(once=True)
+        collection = Collection.objects.get(collection_id='123')
+        download_states: list[str] = list(collection.files.order_by('filename').values_list('download_state', flat=True))
+        self.assertEqual(['COMPLETE', 'COMPLETE', 'FAILED', 'COMPLETE', 'COMPLETE'], download_states)
+        self.assertEqual(len(self.contents['file_2.warc.gz']), collection.bytes_remaining())
+        self.assertIn('ChecksumMismatchError', collection.notes)
+        self.assertFalse((pathlib.Path(self.download_root.name) / '123' / 'file_2.warc.gz').exists())
+
+    def test_scheduler_serves_priority_then_takes_turns(self):
+        """
+        Checks that an urgent collection's file goes first, then turns alternate between users' collections,
+          so a big collection queued first doesn't hold the only transfer-slot.
+        """
+        contents: dict[str, bytes] = {**self.contents, 'b_0.warc.gz': b'b' * 100, 'b_1.warc.gz': b'bb' * 100}
+        contents['urgent.warc.gz'] = b'u' * 100
+        (first_user, second_user) = (User.objects.create_user(username='first'), User.objects.create_user(username='second'))
+        queued = {'status': Collection.Status.QUEUED_FOR_START}
+        big_records: list[dict] = make_fake_warc_records(
+            {f'file_{i}.warc.gz': self.contents[f'file_{i}.warc.gz'] for i in range(4)}
+        )
+        create_fake_collection('big', big_records, requested_by=first_user, **queued)
+        other_records: list[dict] = make_fake_warc_records({name: contents[name] for name in ['b_0.warc.gz', 'b_1.warc.gz']})
+        create_fake_collection('other', other_records, requested_by=second_user, **queued)
+        urgent_records: list[dict] = make_fake_warc_records({'urgent.warc.gz': contents['urgent.warc.gz']})
+        create_fake_collection(
+            'urgent', urgent_records, requested_by=second_user, priority=Collection.Priority.URGENT, **queued
+        )
+        warc_transport: httpx.MockTransport = make_fake_warc_transport(contents)
+        requested_filenames: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested_filenames.append(request.url.path.rsplit('/', 1)[-1])
+            return warc_transport.handle_request(request)
+
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=httpx.MockTransport(handler)), concurrency=1)
+        worker.run(once=True)
+        expected: list[str] = ['urgent', 'file_0', 'b_0', 'file_1', 'b_1', 'file_2', 'file_3']
+        self.assertEqual([f'{name}.warc.gz' for name in expected], requested_filenames)
+        self.assertEqual(3, Collection.objects.filter(status=Collection.Status.COMPLETE).count())
+
+    def test_collection_waits_for_disk_space(self):
+        """
+        Checks that a collection that doesn't fit beside a running one stays queued until that one finishes,
+          and that the reservations are all released at the end.
+        """
+        collection_bytes: int = sum(len(content) for content in self.contents.values())
+        for collection_id in ('first', 'second'):
+            create_fake_collection(
+                collection_id, make_fake_warc_records(self.contents), status=Collection.Status.QUEUED_FOR_START
+            )
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=make_fake_warc_transport(self.contents)))
+        statuses_after_claims: list[dict] = []
+        claim_queued_collections = worker.claim_queued_collections
+
+        def claim_and_record():
+            claim_queued_collections()
+            statuses_after_claims.append(dict(Collection.objects.values_list('collection_id', 'status')))
+
+        free_bytes_patch = mock.patch.object(download_engine, 'get_free_bytes', return_value=int(collection_bytes * 1.5))
+        with free_bytes_patch, mock.patch.object(worker, 'claim_queued_collections', claim_and_record):
+            worker.run(once=True)
+        in_progress: str = Collection.Status.IN_PROGRESS
+        self.assertEqual({'first': in_progress, 'second': Collection.Status.QUEUED_FOR_START}, statuses_after_claims[0])
+        self.assertIn({'first': Collection.Status.COMPLETE, 'second': in_progress}, statuses_after_claims)
+        self.assertEqual(2, Collection.objects.filter(status=Collection.Status.COMPLETE, reserved_bytes=0).count())
+        self.assertEqual([0], list(DiskReservation.objects.values_list('reserved_bytes', flat=True)))
+
+    def test_already_downloaded_content_is_linked(self):
+        """
+        Checks that a second collection sharing WARCs with a downloaded one fetches only its own,
+          and that the confirmation form counts only those as to-transfer.
+        """
+        shared: dict[str, bytes] = {name: self.contents[name] for name in ['file_0.warc.gz', 'file_1.warc.gz']}
+        own: dict[str, bytes] = {'own.warc.gz': b'own' * 100}
+        queued = {'status': Collection.Status.QUEUED_FOR_START}
+        create_fake_collection('first', make_fake_warc_records(self.contents), **queued)
+        second_records: list[dict] = make_fake_warc_records({**shared, **own})
+        second: Collection = create_fake_collection('second', second_records, size_in_bytes=2301)
+        warc_transport: httpx.MockTransport = make_fake_warc_transport({**self.contents, **own})
+        requested_filenames: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested_filenames.append(request.url.path.rsplit('/', 1)[-1])
+            return warc_transport.handle_request(request)
+
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=httpx.MockTransport(handler)))
+        worker.run(once=True)
+        self.assertEqual(sorted(self.contents), sorted(requested_filenames))
+        self.assertEqual(300, second.bytes_to_transfer())
+        with mock.patch.object(request_collection_helper, 'format_size_gb', str):
+            overview: dict = request_collection_helper.make_collection_overview_dict(second)
+        form_html: str = request_collection_helper.render_download_confirmation_form(overview, 'second', 'token')
+        self.assertIn('Total size of all items: 2301,', form_html)
+        self.assertIn('Size to transfer: 300', form_html)
+        Collection.objects.filter(pk=second.pk).update(status=Collection.Status.QUEUED_FOR_START)
+        requested_filenames.clear()
+        worker.run(once=True)
+        self.assertEqual(['own.warc.gz'], requested_filenames)
+        self.assertEqual(Collection.Status.COMPLETE, Collection.objects.get(pk=second.pk).status)
+        root = pathlib.Path(self.download_root.name)
+        for filename in shared:
+            self.assertTrue((root / 'second' / filename).samefile(root / 'first' / filename))
+
+    def test_collection_index_leaves_out_unsafe_filenames(self):
+        """
+        Checks that a listed name climbing out of the collection's directory doesn't pull another collection's
+          index-lines into the merged index.
+        """
+        collection = create_fake_collection('456', make_fake_warc_records({'a.warc.gz': b'a', '../123/a.warc.gz': b'b'}))
+        root = pathlib.Path(self.download_root.name)
+        for collection_id in ('123', '456'):
+            (root / collection_id).mkdir()
+            index_line: str = f'com,example)/ 20240101000000 {{"from": "{collection_id}"}}\n'
+            (root / collection_id / 'a.warc.gz.cdxj').write_text(index_line)
+        download_engine.DownloadWorker().start_index_merge(collection)
+        index_lines: list[str] = (root / '456' / 'index.cdxj').read_text().splitlines()
+        self.assertEqual(['456'], [json.loads(line.split(' ', 2)[2])['from'] for line in index_lines])
+
+    def test_collection_index_is_built_while_downloading(self):
+        """
+        Checks that a downloaded collection gets one sorted index of its WARCs' records, which the app can query.
+        """
+        contents: dict[str, bytes] = {
+            'a.warc.gz': make_fake_gzipped_warc([('https://example.com/', '2024-01-01T00:00:00Z')]),
+            'b.warc.gz': make_fake_gzipped_warc([('https://example.com/', '2023-01-01T00:00:00Z')]),
+        }
+        create_fake_collection('123', make_fake_warc_records(contents), status=Collection.Status.QUEUED_FOR_START)
+        self.client.force_login(User.objects.create_user(username='tester'))
+        query: dict = {'collection_id': '123', 'url': 'http://www.example.com/'}
+        self.assertEqual(404, self.client.get('/collection_index/', query).status_code)
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=make_fake_warc_transport(contents)))
+        worker.run(once=True)
+        index_lines: list[str] = (pathlib.Path(self.download_root.name) / '123' / 'index.cdxj').read_text().splitlines()
+        self.assertEqual(sorted(index_lines), index_lines)
+        self.assertEqual(4, len(index_lines))  # a response and a revisit per WARC
+        response = self.client.get('/collection_index/', query)
+        self.assertEqual(200, response.status_code)
+        found: list[list[str]] = [line.split(' ', 2) for line in response.content.decode().splitlines()]
+        self.assertEqual(
+            ['20230101000000', '20240101000000', '20240601000000', '20240601000000'], [line[1] for line in found]
+        )
+        self.assertEqual(['b.warc.gz', 'a.warc.gz'], [json.loads(line[2])['filename'] for line in found[:2]])
+        self.assertEqual(400, self.client.get('/collection_index/', {'collection_id': '123'}).status_code)
+
+    def test_download_requires_permission(self):
+        """
+        Checks that only users whose profile allows it can queue a download, at the priority they chose.
+        """
+        create_fake_collection('123', make_fake_warc_records(self.contents))
+        user = User.objects.create_user(username='tester')
+        self.client.force_login(user)
+        form_data = {'collection_id': '123', 'action': 'really_start_download', 'priority': Collection.Priority.URGENT}
+        response = self.client.post('/hlpr_initiate_download/', form_data)
+        self.assertIn('not authorized', response.content.decode())
+        self.assertEqual(Collection.Status.QUERIED, Collection.objects.get(collection_id='123').status)
+        UserProfile.objects.filter(user=user).update(can_initiate_downloads=True)
+        response = self.client.post('/hlpr_initiate_download/', form_data)
+        self.assertIn('Download queued', response.content.decode())
+        collection = Collection.objects.get(collection_id='123')
+        self.assertEqual(
+            (Collection.Status.QUEUED_FOR_START, Collection.Priority.URGENT), (collection.status, collection.priority)
+        )
+        self.assertEqual(user, collection.requested_by)
+
+    def test_download_waits_for_a_running_check(self):
+        """
+        Checks that a collection whose file-list is being re-crawled can't be queued, and that the alert says why.
+        """
+        create_fake_collection('123', make_fake_warc_records(self.contents))
+        Collection.objects.filter(collection_id='123').update(
+            crawl_state=Collection.CrawlState.CRAWLING, crawl_updated_at=timezone.now()
+        )
+        user = User.objects.create_user(username='tester')
+        self.client.force_login(user)
+        UserProfile.objects.filter(user=user).update(can_initiate_downloads=True)
+        response = self.client.post('/hlpr_initiate_download/', {'collection_id': '123', 'action': 'really_start_download'})
+        self.assertIn('still being checked', response.content.decode())
+        self.assertEqual(Collection.Status.QUERIED, Collection.objects.get(collection_id='123').status)
+        Collection.objects.filter(collection_id='123').update(crawl_state=Collection.CrawlState.IDLE)
+        response = self.client.post('/hlpr_initiate_download/', {'collection_id': '123', 'action': 'really_start_download'})
+        self.assertIn('Download queued', response.content.decode())
+
+
+class DownloadProgressTest(DbTestCase):
+    """
+    Checks the running download-progress counters, and reading them back.
+    """
+
+    @override_settings(DOWNLOAD_RATE_WINDOW_SECONDS=5)
+    def test_tallies_are_added_in_one_update_per_collection(self):
+        """
+        Checks that a flush adds each running collection's tallies to its counters, and samples the rate,
+          leaving out linked bytes, and finished collections.
+        """
+        running = Collection.objects.create(
+            collection_id='123', item_count=4, size_in_bytes=10_000, status=Collection.Status.IN_PROGRESS
+        )
+        Collection.objects.filter(pk=running.pk).update(progress_mark_time=time.time() - 10)
+        finished = Collection.objects.create(collection_id='456', status=Collection.Status.COMPLETE)
+        progress = download_engine.DownloadProgress()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: progress.add(running.pk, 100), range(15)))
+        progress.add(running.pk, 0, file_count=1)
+        progress.add(running.pk, 2000, fetched=False)
+        progress.add(finished.pk, 700, file_count=1)
+        ## the running collection's update and rate-sample, the finished one's no-op, and the transaction's savepoint
+        with self.assertNumQueries(5):
+            progress.flush()
+        running.refresh_from_db()
+        self.assertEqual((1, 3500), (running.files_downloaded, running.bytes_downloaded))
+        self.assertAlmostEqual(150, running.download_rate, delta=5)  # 1500 bytes fetched in the 10-second window
+        self.assertEqual(3500, running.progress_mark_bytes)
+        self.assertEqual((0, 0), Collection.objects.values_list('files_downloaded', 'bytes_downloaded').get(pk=finished.pk))
+        with self.assertNumQueries(0):
+            progress.flush()
+
+    def test_failed_flush_keeps_its_tallies(self):
+        """
+        Checks that tallies whose flush hit a database error are added to the next flush, not lost.
+        """
+        running = Collection.objects.create(collection_id='123', status=Collection.Status.IN_PROGRESS)
+        progress = download_engine.DownloadProgress()
+        progress.add(running.pk, 500, file_count=1)
+        deadlock = download_engine.DatabaseError('deadlock')
+        logged_error = self.assertLogs(download_engine.log, level='ERROR')
+        with mock.patch.object(progress, 'roll_rate_window', side_effect=deadlock), logged_error:
+            progress.flush()
+        running.refresh_from_db()
+        self.assertEqual((0, 0), (running.files_downloaded, running.bytes_downloaded))  # rolled back
+        progress.add(running.pk, 250)
+        progress.flush()
+        running.refresh_from_db()
+        self.assertEqual((1, 750), (running.files_downloaded, running.bytes_downloaded))
+
+    def test_progress_of_many_collections_is_one_query(self):
+        """
+        Checks that the progress of every running collection, with its ETA, comes from one query.
+        """
+        progress_columns: dict = {
+            'item_count': 10,
+            'size_in_bytes': 10 * 1024**3,
+            'files_downloaded': 3,
+            'bytes_downloaded': 3 * 1024**3,
+            'download_rate': 1024**2,
+            'progress_updated_at': timezone.now(),
+        }
+        Collection.objects.bulk_create(
+            Collection(collection_id=str(i), status=Collection.Status.IN_PROGRESS, **progress_columns) for i in range(100)
+        )
+        Collection.objects.create(collection_id='queued', status=Collection.Status.QUEUED_FOR_START)
+        Collection.objects.filter(collection_id='7').update(progress_updated_at=timezone.now() - datetime.timedelta(hours=1))
+        with self.assertNumQueries(1):
+            progress: list[dict] = request_collection_helper.get_download_progress()
+        self.assertEqual(100, len(progress))
+        by_id: dict = {row['collection_id']: row for row in progress}
+        eta_keys: list[str] = ['files_downloaded', 'item_count', 'downloaded_size', 'total_size', 'eta_seconds', 'eta']
+        self.assertEqual((3, 10, '3.00 GB', '10.00 GB', 7 * 1024, '1h 59m'), tuple(by_id['0'][key] for key in eta_keys))
+        self.assertEqual((None, ''), (by_id['7']['eta_seconds'], by_id['7']['eta']))  # a stale rate gives no ETA
+        self.client.force_login(User.objects.create_user(username='tester'))
+        response: dict = self.client.get('/download_progress/', {'collection_ids': '0, queued'}).json()
+        self.assertEqual(['0', 'queued'], sorted(row['collection_id'] for row in response['collections']))
+
+
+class BandwidthLimiterTest(TestCase):
+    """
+    Checks the worker's shared cap on transfer bytes-per-second.
+    """
+
+    def test_bucket_allows_a_second_of_bytes_then_paces(self):
+        """
+        Checks that a second's worth of bytes goes straight through, then further bytes wait to be earned.
+        """
+        now = [0.0]
+        limiter = download_engine.BandwidthLimiter(1000, clock=lambda: now[0])
+        self.assertEqual(0.0, limiter.reserve(1000))
+        self.assertEqual(0.5, limiter.reserve(500))
+        now[0] = 2.0
+        self.assertEqual(0.0, limiter.reserve(500))
+        self.assertEqual(0.0, download_engine.BandwidthLimiter(0).reserve(10**12))  # no cap
+
+
+class FlakyWarcServer:
+    """
+    A local http server for a single WARC that honors `Range` requests, but drops the connection
+      after sending `drop_after` bytes of any response.
+    Records the starting byte of each request in `range_starts`.
+    """
+
+    def __init__(self, content: bytes, drop_after: int):
+        self.content = content
+        self.drop_after = drop_after
+        self.range_starts: list[int] = []
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.make_handler())
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/flaky.warc.gz'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                start: int = int(self.headers.get('Range', 'bytes=0-')[len('bytes=') :].split('-')[0])
+                server.range_starts.append(start)
+                remaining: bytes = server.content[start:]
+                self.send_response(206 if start else 200)
+                self.send_header('Content-Length', str(len(remaining)))
+                if start:
+                    self.send_header('Content-Range', f'bytes {start}-{len(server.content) - 1}/{len(server.content)}')
+                self.end_headers()
+                self.wfile.write(remaining[: server.drop_after])
+                self.close_connection = True  # drops the connection, mid-body if the body was cut short
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class FailingWriteFile:
+    """
+    Wraps an open file; its `fail_on_write`th write writes half the bytes, then raises OSError, as a filling disk can.
+    """
+
+    def __init__(self, f, fail_on_write: int):
+        self.f = f
+        self.writes_left: int = fail_on_write
+
+    def write(self, data) -> int:
+        self.writes_left -= 1
+        if self.writes_left == 0:
+            self.f.write(data[: len(data) // 2])
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        return self.f.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+@override_settings(DOWNLOAD_RETRY_DELAY_SECONDS=0, DOWNLOAD_BUFFER_SIZE=512)
+class ResumableDownloadTest(TestCase):
+    """
+    Checks that interrupted transfers resume from their `.part` files via `Range` requests.
+    """
+
+    def setUp(self):
+        self.content: bytes = bytes(range(256)) * 40  # 10,240 bytes
+        self.download_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.download_dir.cleanup)
+        self.server = FlakyWarcServer(self.content, drop_after=3000)
+        self.addCleanup(self.server.close)
+        self.file = CollectionFile(  # unsaved; download_file() doesn't touch the db
+            filename='flaky.warc.gz',
+            size=len(self.content),
+            md5=hashlib.md5(self.content).hexdigest(),
+            sha1=hashlib.sha1(self.content).hexdigest(),
+            locations=[self.server.url],
+        )
+
+    def test_dropped_connections_resume(self):
+        """
+        Checks that each retry picks up where the dropped connection left off, and the checksums still verify.
+        """
+        worker = download_engine.DownloadWorker(client=httpx.Client())
+        result: str | None = worker.download_file(self.file, pathlib.Path(self.download_dir.name))
+        self.assertIsNone(result)
+        self.assertEqual([0, 3000, 6000, 9000], self.server.range_starts)
+        self.assertEqual(self.content, (pathlib.Path(self.download_dir.name) / 'flaky.warc.gz').read_bytes())
+        self.assertFalse((pathlib.Path(self.download_dir.name) / 'flaky.warc.gz.part').exists())
+
+    def test_part_file_from_earlier_worker_resumes(self):
+        """
+        Checks that a `.part` file left by an earlier worker is resumed rather than restarted.
+        """
+        (pathlib.Path(self.download_dir.name) / 'flaky.warc.gz.part').write_bytes(self.content[:8000])
+        worker = download_engine.DownloadWorker(client=httpx.Client())
+        result: str | None = worker.download_file(self.file, pathlib.Path(self.download_dir.name))
+        self.assertIsNone(result)
+        self.assertEqual([8000], self.server.range_starts)
+        self.assertEqual(self.content, (pathlib.Path(self.download_dir.name) / 'flaky.warc.gz').read_bytes())
+
+    def test_preallocated_part_file_resumes_from_checkpoint(self):
+        """
+        Checks that a full-length (preallocated) `.part` file resumes from its synced checkpoint, not its length.
+        """
+        part_path = pathlib.Path(self.download_dir.name) / 'flaky.warc.gz.part'
+        part_path.write_bytes(self.content[:8000] + bytes(len(self.content) - 8000))
+        (pathlib.Path(self.download_dir.name) / 'flaky.warc.gz.part.synced').write_text('8000')
+        worker = download_engine.DownloadWorker(client=httpx.Client())
+        result: str | None = worker.download_file(self.file, pathlib.Path(self.download_dir.name))
+        self.assertIsNone(result)
+        self.assertEqual([8000], self.server.range_starts)
+        self.assertEqual(self.content, (pathlib.Path(self.download_dir.name) / 'flaky.warc.gz').read_bytes())
+        self.assertFalse((pathlib.Path(self.download_dir.name) / 'flaky.warc.gz.part.synced').exists())
+
+    def test_failed_write_is_not_misplaced(self):
+        """
+        Checks that a write failing part-way, eg on a full disk, leaves the `.part` file checkpointed at correct bytes,
+          so the next download resumes into an intact file.
+        """
+        part_path = pathlib.Path(self.download_dir.name) / 'flaky.warc.gz.part'
+        enter_part = download_engine.PartFile.__enter__
+
+        def enter_with_a_failing_write(part):
+            enter_part(part)
+            part.f = FailingWriteFile(part.f, fail_on_write=2)
+            return part
+
+        def serve_small_chunks(request: httpx.Request) -> httpx.Response:  # so they're coalesced in the buffer
+            start: int = int(request.headers.get('Range', 'bytes=0-')[len('bytes=') :].split('-')[0])
+            chunks: list[bytes] = [self.content[i : i + 100] for i in range(start, len(self.content), 100)]
+            return httpx.Response(206 if start else 200, content=iter(chunks))
+
+        worker = download_engine.DownloadWorker(client=httpx.Client(transport=httpx.MockTransport(serve_small_chunks)))
+        with mock.patch.object(download_engine.PartFile, '__enter__', enter_with_a_failing_write):
+            result: str | None = worker.download_file(self.file, pathlib.Path(self.download_dir.name))
+        self.assertIn('OSError', result)
+        offset: int = download_engine.PartFile(part_path, len(self.content)).offset
+        self.assertTrue(offset)
+        self.assertEqual(self.content[:offset], part_path.read_bytes()[:offset])
+        result = worker.download_file(self.file, pathlib.Path(self.download_dir.name))
+        self.assertIsNone(result)
+        self.assertEqual(self.content, (pathlib.Path(self.download_dir.name) / 'flaky.warc.gz').read_bytes())
+
+    @override_settings(DOWNLOAD_MAX_ATTEMPTS=2)
+    def test_gives_up_after_max_attempts(self):
+        """
+        Checks that the `.part` file is kept for a later resume when the attempts run out, checkpointed at what arrived.
+        """
+        worker = download_engine.DownloadWorker(client=httpx.Client())
+        result: str | None = worker.download_file(self.file, pathlib.Path(self.download_dir.name))
+        self.assertIn('flaky.warc.gz', result)
+        part_path = pathlib.Path(self.download_dir.name) / 'flaky.warc.gz.part'
+        self.assertEqual(6000, download_engine.PartFile(part_path, len(self.content)).offset)
+        self.assertEqual(self.content[:6000], part_path.read_bytes()[:6000])
+
+
+class WarcFileServer:
+    """
+    A local http server for several WARCs, at `{url_root}/{filename}`; records each requested filename in `requested`.
+    """
+
+    def __init__(self, contents: dict[str, bytes]):
+        self.contents = contents
+        self.requested: list[str] = []
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.make_handler())
+        self.url_root = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                filename: str = self.path.lstrip('/')
+                server.requested.append(filename)
+                content: bytes = server.contents[filename]
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class MultiWorkerDownloadTest(DbTestCase):
+    """
+    Checks that several download workers share a collection's files through leases on their rows.
+    """
+
+    def setUp(self):
+        self.contents: dict[str, bytes] = {f'file_{i}.warc.gz': bytes([i]) * (1000 + i) for i in range(5)}
+        self.server = WarcFileServer(self.contents)
+        self.addCleanup(self.server.close)
+        records: list[dict] = make_fake_warc_records(self.contents)
+        for record in records:
+            record['locations'] = [f'{self.server.url_root}/{record["filename"]}']
+        create_fake_collection('123', records, status=Collection.Status.QUEUED_FOR_START)
+        self.download_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.download_root.cleanup)
+        settings_override = override_settings(WARC_DOWNLOAD_ROOT=self.download_root.name, DOWNLOAD_FREE_SPACE_MARGIN_BYTES=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_worker(self, name: str) -> download_engine.DownloadWorker:
+        return download_engine.DownloadWorker(client=httpx.Client(), concurrency=2, name=name)
+
+    def test_workers_lease_separate_files(self):
+        """
+        Checks that two workers filling their transfer-slots at once get different files, and each file is fetched once.
+        """
+        workers: list[download_engine.DownloadWorker] = [self.make_worker('a'), self.make_worker('b')]
+        in_flight: dict[str, dict] = {'a': {}, 'b': {}}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for worker in workers:
+                worker.claim_queued_collections()
+                worker.refresh_scheduler()
+                worker.fill_transfer_slots(executor, in_flight[worker.name])
+            leased: dict[str, set] = {name: {file.filename for (_, file) in i.values()} for (name, i) in in_flight.items()}
+            self.assertEqual((2, 2), (len(leased['a']), len(leased['b'])))
+            self.assertFalse(leased['a'] & leased['b'])
+            self.assertEqual(
+                leased['b'], set(CollectionFile.objects.filter(leased_by='b').values_list('filename', flat=True))
+            )
+            for worker in workers:
+                for future, transfer in in_flight[worker.name].items():
+                    worker.record_transfer(transfer, future.result())
+        workers[0].run(once=True)  # the file left over
+        self.assertEqual(Collection.Status.COMPLETE, Collection.objects.get(collection_id='123').status)
+        self.assertEqual(sorted(self.contents), sorted(self.server.requested))
+        self.assertFalse(CollectionFile.objects.exclude(leased_by='').exists())
+
+    @override_settings(DOWNLOAD_CONCURRENCY=3, DOWNLOAD_MAX_BYTES_PER_SECOND=3000)
+    def test_caps_are_shared_across_workers(self):
+        """
+        Checks that workers together run at most `DOWNLOAD_CONCURRENCY` transfers, and split the bandwidth-cap
+          by their shares of them.
+        """
+        workers: list[download_engine.DownloadWorker] = [self.make_worker('a'), self.make_worker('b')]
+        in_flight: dict[str, dict] = {'a': {}, 'b': {}}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for worker in workers:
+                worker.claim_queued_collections()
+                worker.refresh_scheduler()
+                worker.fill_transfer_slots(executor, in_flight[worker.name])
+            self.assertEqual((2, 1), (len(in_flight['a']), len(in_flight['b'])))
+            workers[0].renew_leases(list(in_flight['a'].values()))  # the heartbeat that gives up any excess share
+            self.assertEqual((2000, 1000), tuple(worker.bandwidth.bytes_per_second for worker in workers))
+            for future, transfer in list(in_flight['a'].items()):
+                workers[0].record_transfer(transfer, future.result())
+                del in_flight['a'][future]
+            workers[1].fill_transfer_slots(executor, in_flight['b'])  # a's freed slot, taken up to b's own limit
+            self.assertEqual(2, len(in_flight['b']))
+            for future, transfer in in_flight['b'].items():
+                workers[1].record_transfer(transfer, future.result())
+        self.assertFalse(TransferSlot.objects.exclude(leased_by='').exists())
+
+    def test_crashed_workers_files_are_picked_up(self):
+        """
+        Checks that files leased by a worker that then died are left alone until the lease expires, then taken over.
+        """
+        crashed = self.make_worker('crashed')
+        crashed.claim_queued_collections()
+        crashed.refresh_scheduler()
+        for _ in range(2):
+            (_, file) = crashed.scheduler.next_file()
+            self.assertTrue(crashed.lease_file(file))
+        survivor = self.make_worker('survivor')
+        survivor.run(once=True)
+        self.assertEqual(3, len(self.server.requested))
+        self.assertEqual(Collection.Status.IN_PROGRESS, Collection.objects.get(collection_id='123').status)
+        CollectionFile.objects.filter(leased_by='crashed').update(lease_expires_at=timezone.now())  # the lease runs out
+        survivor.run(once=True)
+        self.assertEqual(Collection.Status.COMPLETE, Collection.objects.get(collection_id='123').status)
+        self.assertEqual(sorted(self.contents), sorted(self.server.requested))
+        for filename, content in self.contents.items():
+            self.assertEqual(content, (pathlib.Path(self.download_root.name) / '123' / filename).read_bytes())
+
+    def test_heartbeat_renews_only_held_leases(self):
+        """
+        Checks that renewing pushes back the worker's own leases, and leaves one taken over by another worker alone.
+        """
+        worker = self.make_worker('a')
+        worker.claim_queued_collections()
+        worker.refresh_scheduler()
+        transfers: list[tuple] = [worker.scheduler.next_file() for _ in range(2)]
+        for _, file in transfers:
+            worker.lease_file(file)
+        soon: datetime.datetime = timezone.now() + datetime.timedelta(seconds=1)
+        CollectionFile.objects.filter(leased_by='a').update(lease_expires_at=soon)
+        CollectionFile.objects.filter(pk=transfers[1][1].pk).update(leased_by='b')
+        self.assertEqual({transfers[1][1].pk}, worker.renew_leases(transfers))
+        self.assertGreater(CollectionFile.objects.get(pk=transfers[0][1].pk).lease_expires_at, soon)
+        self.assertEqual(soon, CollectionFile.objects.get(pk=transfers[1][1].pk).lease_expires_at)
+
+    @override_settings(DOWNLOAD_BUFFER_SIZE=256)
+    def test_transfer_stops_when_its_lease_is_lost(self):
+        """
+        Checks that a transfer whose lease is taken over mid-file stops writing, and leaves the `.part` file alone.
+        """
+        content: bytes = bytes(range(200)) * 3
+        worker = download_engine.DownloadWorker(client=httpx.Client(), name='a')
+        file = CollectionFile.objects.get(filename='file_0.warc.gz')
+        file.size, file.md5, file.sha1 = (len(content), '', '')
+        self.assertTrue(worker.lease_file(file))
+        abort: threading.Event = worker.transfer_aborts.setdefault(file.pk, threading.Event())
+
+        def stream_with_takeover():
+            yield content[:300]
+            CollectionFile.objects.filter(pk=file.pk).update(leased_by='b')  # another worker takes the lease over
+            self.assertEqual({file.pk}, worker.renew_leases([(file.collection, file)]))
+            yield content[300:]
+
+        worker.client = httpx.Client(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=stream_with_takeover()))
+        )
+        download_dir = pathlib.Path(self.download_root.name) / '123'
+        download_dir.mkdir()
+        failure: str | None = worker.download_file(file, download_dir, None, abort)
+        self.assertIn('lost to another worker', failure)
+        self.assertFalse((download_dir / 'file_0.warc.gz').exists())
+        written: bytes = (download_dir / 'file_0.warc.gz.part').read_bytes()
+        self.assertEqual(content[:300], written[:300])
+        self.assertEqual(bytes(300), written[300:])  # preallocated, and never written
+        self.assertEqual('0', (download_dir / 'file_0.warc.gz.part.synced').read_text())  # the checkpoint, untouched
+
+
+def make_fake_gzipped_warc(captures: list[tuple[str, str]]) -> bytes:
+    """
+    Returns a gzipped WARC, one gzip-member per record: a `warcinfo`, then a `request` and a `response`
+      for each (url, warc-date) capture, then a `revisit` of the first.
+    """
+
+    def make_record(warc_type: str, headers: dict, block: bytes) -> bytes:
+        header_lines: str = ''.join(f'{name}: {value}\r\n' for (name, value) in headers.items())
+        header_lines += f'WARC-Record-ID: <urn:sha1:{hashlib.sha1(header_lines.encode() + block).hexdigest()}>\r\n'
+        record: bytes = f'WARC/1.0\r\nWARC-Type: {warc_type}\r\n{header_lines}Content-Length: {len(block)}\r\n\r\n'.encode()
+        return gzip.compress(record + block + b'\r\n\r\n')
+
+    members: list[bytes] = [make_record('warcinfo', {'WARC-Date': '2024-01-01T00:00:00Z'}, b'software: test\r\n')]
+    for i, (url, warc_date) in enumerate(captures):
+        http_headers: dict = {'WARC-Target-URI': url, 'WARC-Date': warc_date, 'Content-Type': 'application/http'}
+        members.append(make_record('request', http_headers, f'GET / HTTP/1.1\r\nHost: x{i}\r\n\r\n'.encode()))
+        body: bytes = f'<html>capture {i}</html>'.encode() * 50
+        http_response: bytes = b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n\r\n' + body
+        members.append(make_record('response', {**http_headers, 'WARC-Payload-Digest': f'sha1:D{i}'}, http_response))
+    (url, warc_date) = captures[0]
+    members.append(make_record('revisit', {'WARC-Target-URI': url, 'WARC-Date': '2024-06-01T00:00:00Z'}, b''))
+    return b''.join(members)
+
+
+class WarcIndexTest(TestCase):
+    """
+    Checks the CDXJ indexing of WARCs as they download, and index lookups.
+    """
+
+    def setUp(self):
+        self.captures: list[tuple[str, str]] = [
+            ('https://www.example.com/b', '2024-03-04T05:06:07Z'),
+            ('http://example.com/a?x=1', '2024-02-03T04:05:06Z'),
+            ('https://other.example.org:8443/', '2023-12-31T23:59:59Z'),
+        ]
+        self.content: bytes = make_fake_gzipped_warc(self.captures)
+
+    def test_records_are_indexed_from_any_chunking(self):
+        """
+        Checks that the responses and the revisit are indexed with their gzip-member's offset and length,
+          however the bytes arrive.
+        """
+        indexers: list[warc_index.WarcIndexer] = []
+        for chunk_size in [len(self.content), 7, 1]:
+            indexer = warc_index.WarcIndexer('test.warc.gz')
+            for start in range(0, len(self.content), chunk_size):
+                indexer.update(memoryview(self.content)[start : start + chunk_size])
+            self.assertEqual(len(self.content), indexer.member_offset)
+            indexers.append(indexer)
+        self.assertEqual(indexers[0].lines, indexers[1].lines)
+        self.assertEqual(indexers[0].lines, indexers[2].lines)
+        lines: list[str] = sorted(indexers[0].lines)
+        self.assertEqual(
+            ['com,example)/a?x=1 20240203040506', 'com,example)/b 20240304050607', 'com,example)/b 20240601000000'],
+            [' '.join(line.split(' ', 2)[:2]) for line in lines[:3]],
+        )
+        self.assertTrue(lines[3].startswith('org,example,other:8443)/ 20231231235959 '))
+        fields: dict = json.loads(lines[1].split(' ', 2)[2])
+        self.assertEqual(
+            ('https://www.example.com/b', '200', 'text/html'), (fields['url'], fields['status'], fields['mime'])
+        )
+        record: bytes = gzip.decompress(self.content[int(fields['offset']) : int(fields['offset']) + int(fields['length'])])
+        self.assertTrue(record.startswith(b'WARC/1.0\r\nWARC-Type: response\r\nWARC-Target-URI: https://www.example.com/b'))
+        self.assertEqual('warc/revisit', json.loads(lines[2].split(' ', 2)[2])['mime'])
+
+    @override_settings(DOWNLOAD_RETRY_DELAY_SECONDS=0, DOWNLOAD_BUFFER_SIZE=100)
+    def test_resumed_download_is_indexed(self):
+        """
+        Checks that a download resumed from an earlier worker's `.part` file, over dropped connections,
+          still gets the whole index.
+        """
+        server = FlakyWarcServer(self.content, drop_after=500)
+        self.addCleanup(server.close)
+        download_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(download_dir.cleanup)
+        (pathlib.Path(download_dir.name) / 'flaky.warc.gz.part').write_bytes(self.content[:300])
+        file = CollectionFile(filename='flaky.warc.gz', size=len(self.content), locations=[server.url])
+        worker = download_engine.DownloadWorker(client=httpx.Client())
+        self.assertIsNone(worker.download_file(file, pathlib.Path(download_dir.name)))
+        self.assertGreater(len(server.range_starts), 2)
+        indexer = warc_index.WarcIndexer('flaky.warc.gz')
+        indexer.update(self.content)
+        index_path = pathlib.Path(download_dir.name) / 'flaky.warc.gz.cdxj'
+        self.assertEqual(sorted(indexer.lines), index_path.read_text().splitlines(keepends=True))
+
+    def test_search_finds_exact_and_prefix_matches(self):
+        """
+        Checks that the binary search finds every match, and only matches, wherever they fall in the index.
+        """
+        lines: list[str] = sorted(
+            f'{warc_index.make_surt(f"https://example.com/{i % 50}")} 2024010100{i:04d} {{"offset": "{i}"}}\n'
+            for i in range(500)
+        )
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        index_path = pathlib.Path(index_dir.name) / 'index.cdxj'
+        index_path.write_text(''.join(lines))
+        for path_number in [0, 1, 7, 49]:
+            found: list[str] = warc_index.search_index(index_path, f'http://www.example.com/{path_number}')
+            self.assertEqual([line for line in lines if line.startswith(f'com,example)/{path_number} ')], found)
+            self.assertEqual(10, len(found))
+        self.assertEqual(110, len(warc_index.search_index(index_path, 'example.com/1', match_type='prefix', limit=200)))
+        self.assertEqual(3, len(warc_index.search_index(index_path, 'example.com/', match_type='prefix', limit=3)))
+        self.assertEqual([], warc_index.search_index(index_path, 'example.com/50'))
+        self.assertEqual([], warc_index.search_index(index_path, 'example.org/1'))
+
+
+class WarcReaderTest(DbTestCase):
+    """
+    Checks reading single records of downloaded WARCs by offset.
+    """
+
+    def setUp(self):
+        self.content: bytes = make_fake_gzipped_warc([('https://example.com/a', '2024-01-01T00:00:00Z')])
+        self.download_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.download_root.cleanup)
+        settings_override = override_settings(WARC_DOWNLOAD_ROOT=self.download_root.name, WARC_RECORD_PREVIEW_BYTES=100)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.warc_path = pathlib.Path(self.download_root.name) / '123' / 'a.warc.gz'
+        self.warc_path.parent.mkdir()
+        self.warc_path.write_bytes(self.content)
+        indexer = warc_index.WarcIndexer('a.warc.gz')
+        indexer.update(self.content)
+        self.index_fields: list[dict] = [json.loads(line.split(' ', 2)[2]) for line in sorted(indexer.lines)]
+
+    def test_records_are_read_at_their_indexed_offsets(self):
+        """
+        Checks that each indexed offset yields its record, with only a preview of the payload,
+          and that an offset inside a record is refused.
+        """
+        with warc_reader.WarcReader(self.warc_path) as reader:
+            response: dict = reader.read_record(int(self.index_fields[0]['offset']), preview_bytes=100)
+            revisit: dict = reader.read_record(int(self.index_fields[1]['offset']), preview_bytes=100)
+            with self.assertRaises(warc_reader.WarcRecordError):
+                reader.read_record(int(self.index_fields[0]['offset']) + 1)
+            with self.assertRaises(warc_reader.WarcRecordError):
+                reader.read_record(len(self.content))
+        self.assertIn(('WARC-Target-URI', 'https://example.com/a'), response['warc_headers'])
+        self.assertEqual('HTTP/1.1 200 OK', response['http_status_line'])
+        self.assertEqual(('<html>capture 0</html>' * 5)[:100], response['payload_preview'])
+        self.assertEqual((1100, True), (response['payload_length'], response['payload_truncated']))
+        self.assertEqual(int(self.index_fields[0]['length']), response['member_length'])
+        self.assertIn(('WARC-Type', 'revisit'), revisit['warc_headers'])
+        self.assertEqual((0, False), (revisit['payload_length'], revisit['payload_truncated']))
+
+    def test_record_view_shows_headers_and_preview(self):
+        """
+        Checks that the view shows a record of one of the collection's files, and only of the collection's files.
+        """
+        create_fake_collection('123', make_fake_warc_records({'a.warc.gz': self.content}))
+        self.client.force_login(User.objects.create_user(username='tester'))
+        query: dict = {'collection_id': '123', 'filename': 'a.warc.gz', 'offset': self.index_fields[0]['offset']}
+        html: str = self.client.get('/warc_record/', query).content.decode()
+        self.assertIn('https://example.com/a', html)
+        self.assertIn('&lt;html&gt;capture 0&lt;/html&gt;', html)
+        record: dict = self.client.get('/warc_record/', {**query, 'format': 'json'}).json()
+        self.assertEqual('HTTP/1.1 200 OK', record['http_status_line'])
+        self.assertEqual(400, self.client.get('/warc_record/', {**query, 'offset': '5'}).status_code)
+        self.assertEqual(404, self.client.get('/warc_record/', {**query, 'filename': '../123/a.warc.gz'}).status_code)
+
+    def test_record_view_refuses_a_listed_name_outside_the_collection(self):
+        """
+        Checks that a file-row whose listed name climbs out of its collection's directory can't show another's WARC.
+        """
+        create_fake_collection('123', make_fake_warc_records({'a.warc.gz': self.content}))
+        create_fake_collection('456', make_fake_warc_records({'../123/a.warc.gz': self.content}))
+        (pathlib.Path(self.download_root.name) / '456').mkdir()
+        self.client.force_login(User.objects.create_user(username='tester'))
+        query: dict = {'collection_id': '456', 'filename': '../123/a.warc.gz', 'offset': self.index_fields[0]['offset']}
+        self.assertEqual(404, self.client.get('/warc_record/', query).status_code)
+
+
+class ValidationWorkerTest(DbTestCase):
+    """
+    Checks the validation of downloaded collections' WARCs, across processes.
+    """
+
+    def setUp(self):
+        self.download_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.download_root.cleanup)
+        settings_override = override_settings(WARC_DOWNLOAD_ROOT=self.download_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_invalid_files_are_found_and_summarized(self):
+        """
+        Checks that each file is checked, whatever's wrong with it, and that the invalid ones are noted on the collection.
+        """
+        good: bytes = make_fake_gzipped_warc([('https://example.com/a', '2024-01-01T00:00:00Z')])
+        corrupted = bytearray(good)
+        corrupted[len(good) // 2] ^= 0xFF
+        bad_length: bytes = gzip.compress(
+            b'WARC/1.0\r\nWARC-Type: resource\r\nWARC-Record-ID: <urn:x:1>\r\nWARC-Date: 2024-01-01T00:00:00Z\r\n'
+            b'Content-Length: 10\r\n\r\nabc\r\n\r\n'
+        )
+        contents: dict[str, bytes] = {
+            'good.warc.gz': good,
+            'corrupted.warc.gz': bytes(corrupted),
+            'truncated.warc.gz': good[:-20],
+            'bad-length.warc.gz': bad_length,
+            'missing.warc.gz': good,
+        }
+        collection = create_fake_collection('123', make_fake_warc_records(contents), status=Collection.Status.COMPLETE)
+        download_dir = pathlib.Path(self.download_root.name) / '123'
+        download_dir.mkdir()
+        for filename, content in contents.items():
+            if filename != 'missing.warc.gz':
+                (download_dir / filename).write_bytes(content)
+        (download_dir / 'truncated.warc.gz').write_bytes(good)  # the right size, but ...
+        with open(download_dir / 'truncated.warc.gz', 'r+b') as f:
+            f.truncate(len(good) - 20)
+            f.truncate(len(good))  # ... zero-filled at the end, as after a crash mid-write
+        CollectionFile.objects.filter(filename='truncated.warc.gz').update(size=len(good))
+        validation_engine.ValidationWorker(processes=2).run(once=True)
+        states: dict = dict(collection.files.values_list('filename', 'validation_state'))
+        self.assertEqual(
+            {
+                'good.warc.gz': CollectionFile.ValidationState.VALID,
+                'corrupted.warc.gz': CollectionFile.ValidationState.INVALID,
+                'truncated.warc.gz': CollectionFile.ValidationState.INVALID,
+                'bad-length.warc.gz': CollectionFile.ValidationState.INVALID,
+                'missing.warc.gz': CollectionFile.ValidationState.INVALID,
+            },
+            states,
+        )
+        errors: dict = dict(collection.files.values_list('filename', 'validation_error'))
+        self.assertIn('Content-Length is 10, but the block is 3 bytes', errors['bad-length.warc.gz'])
+        self.assertEqual('not on disk', errors['missing.warc.gz'])
+        collection.refresh_from_db()
+        self.assertEqual(Collection.ValidationState.INVALID, collection.validation_state)
+        self.assertTrue(collection.errors)
+        self.assertIn('validation: 4 of 5 files invalid', collection.notes)
+        self.assertIn('corrupted.warc.gz: ', collection.notes)
+        self.assertNotIn('good.warc.gz', collection.notes)
+
+    def test_unsafe_filenames_are_invalid_and_not_read(self):
+        """
+        Checks that a listed name climbing out of the collection's directory is marked invalid, without reading
+          whatever WARC it points at.
+        """
+        good: bytes = make_fake_gzipped_warc([('https://example.com/a', '2024-01-01T00:00:00Z')])
+        contents: dict[str, bytes] = {'good.warc.gz': good, '../123/good.warc.gz': good}
+        collection = create_fake_collection('456', make_fake_warc_records(contents), status=Collection.Status.COMPLETE)
+        for collection_id in ('123', '456'):
+            (pathlib.Path(self.download_root.name) / collection_id).mkdir()
+            (pathlib.Path(self.download_root.name) / collection_id / 'good.warc.gz').write_bytes(good)
+        validation_engine.ValidationWorker(processes=1).run(once=True)
+        states: dict = dict(collection.files.values_list('filename', 'validation_state'))
+        self.assertEqual(
+            {
+                'good.warc.gz': CollectionFile.ValidationState.VALID,
+                '../123/good.warc.gz': CollectionFile.ValidationState.INVALID,
+            },
+            states,
+        )
+        self.assertIn('unsafe filename', collection.files.get(filename='../123/good.warc.gz').validation_error)
+        collection.refresh_from_db()
+        self.assertEqual(Collection.ValidationState.INVALID, collection.validation_state)
+
+    def test_each_format_gets_its_own_check(self):
+        """
+        Checks that `.arc.gz` files get a gzip-check, uncompressed `.warc` files a record-walk, and other formats
+          are skipped, rather than all being read as gzipped WARCs.
+        """
+        arc_records: list[bytes] = [
+            f'http://example.com/{i} 0.0.0.0 20240101000000 text/html 4\nabcd\n'.encode() for i in range(3)
+        ]
+        arc_gz: bytes = b''.join(gzip.compress(record) for record in arc_records)
+        warc: bytes = gzip.decompress(make_fake_gzipped_warc([('https://example.com/a', '2024-01-01T00:00:00Z')]))
+        contents: dict[str, bytes] = {
+            'good.arc.gz': arc_gz,
+            'corrupted.arc.gz': arc_gz[:-30] + bytes(30),
+            'good.warc': warc,
+            'truncated.warc': warc[:-10],  # part-way through the last record's headers
+            'uncompressed.arc': b'not checked',
+        }
+        collection = create_fake_collection('123', make_fake_warc_records(contents), status=Collection.Status.COMPLETE)
+        download_dir = pathlib.Path(self.download_root.name) / '123'
+        download_dir.mkdir()
+        for filename, content in contents.items():
+            (download_dir / filename).write_bytes(content)
+        validation_engine.ValidationWorker(processes=1).run(once=True)
+        states: dict = dict(collection.files.values_list('filename', 'validation_state'))
+        self.assertEqual(
+            {
+                'good.arc.gz': CollectionFile.ValidationState.VALID,
+                'corrupted.arc.gz': CollectionFile.ValidationState.INVALID,
+                'good.warc': CollectionFile.ValidationState.VALID,
+                'truncated.warc': CollectionFile.ValidationState.INVALID,
+                'uncompressed.arc': CollectionFile.ValidationState.SKIPPED,
+            },
+            states,
+        )
+        result: dict = warc_validator.validate_warc(str(download_dir / 'good.arc.gz'), len(arc_gz))
+        self.assertEqual(('', 3), (result['error'], result['record_count']))  # one per gzip-member
+        self.assertIn('ends part-way through the record', collection.files.get(filename='truncated.warc').validation_error)
+
+    def test_stale_validations_are_taken_over(self):
+        """
+        Checks that a collection is claimed once, and claimed again only after its worker's heartbeat goes stale.
+        """
+        collection = create_fake_collection('123', [], status=Collection.Status.COMPLETE)
+        create_fake_collection('456', [], status=Collection.Status.QUEUED_FOR_START)
+        worker = validation_engine.ValidationWorker(processes=1)
+        (claimed, lease) = worker.claim_collection()
+        self.assertEqual(collection.pk, claimed.pk)
+        self.assertIsNone(worker.claim_collection())
+        stale = timezone.now() - datetime.timedelta(seconds=worker.stale_seconds + 1)
+        Collection.objects.filter(pk=collection.pk).update(validation_updated_at=stale)
+        (claimed, new_lease) = worker.claim_collection()
+        self.assertNotEqual(lease, new_lease)
+        self.assertFalse(worker.renew_lease(collection, lease))
+        self.assertTrue(worker.renew_lease(collection, new_lease))
@@ -4,14 +4,16 @@ import logging
 from urllib import parse
 
 import trio
+from asgiref.sync import sync_to_async
 from django.conf import settings as project_settings
 from django.contrib import auth
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.http import HttpRequest, HttpResponse, HttpResponseNotFound, HttpResponseRedirect
 from django.shortcuts import render
 from django.urls import reverse
 
-from warc_manager_app.lib import request_collection_helper, version_helper
+from warc_manager_app.lib import request_collection_helper, version_helper, warc_reader
 from warc_manager_app.lib.shib_handler import shib_decorator
 from warc_manager_app.lib.version_helper import GatherCommitAndBranchData
 
@@ -150,9 +152,15 @@ def request_collection(request: HttpRequest) -> HttpResponse:
         context = {'is_logged_in': 'no'}
     if request.method == 'GET':
         log.debug('handling GET request')
-        recents: list = request_collection_helper.get_recent_collections()
-        # context = {'recent_items': recents}
-        context['recent_items'] = recents
+        status_filter: str = request.GET.get('status', '')
+        recents: dict = request_collection_helper.get_recent_collections(request.GET.get('before'), status_filter)
+        context['recent_items'] = recents['items']
+        context['next_cursor'] = recents['next_cursor']
+        context['status_filter'] = status_filter
+        check_coll_id_url_name: str = (
+            'hlpr_check_coll_id_async_url' if project_settings.ASYNC_HTMX_HELPERS else 'hlpr_check_coll_id_url'
+        )
+        context['check_coll_id_url'] = reverse(check_coll_id_url_name)
         return render(request, 'request_collection.html', context)
     else:
         ## htmx POSTs are handled by the helper functions below
@@ -167,10 +175,14 @@ def hlpr_check_coll_id(request: HttpRequest) -> HttpResponse:
     - If collection-id is missing, an alert is returned.
     - If the collection is in-progress or completed, an alert is returned.
     - If the collection is not in-progress or completed, the download-confirmation form is returned.
+    - The collection overview comes from the `Collection` cache when fresh; staff may force a re-crawl.
+    - A crawl returns after its first page, with a progress fragment that polls hlpr_crawl_progress()
+        until the rest of the listing is in, and the form replaces it.
     """
     log.debug('starting hlpr_check_coll_id()')
     ## check collection id ------------------------------------------
     collection_id: str = request.POST.get('collection_id', '').strip()
+    force_refresh: bool = request.POST.get('force_refresh') == 'yes' and request.user.is_staff
     if not collection_id:
         log.debug('no collection_id')
         return request_collection_helper.render_alert('Collection ID is required.', include_info_link=False)
@@ -183,23 +195,86 @@ def hlpr_check_coll_id(request: HttpRequest) -> HttpResponse:
         if resp:  # in-progress or completed
             return resp
         else:
-            ## get collection overview data --------------------------
-            collection_overview_api_data: dict | None = request_collection_helper.get_collection_data(collection_id)
-            log.debug(f'api_data: {collection_overview_api_data}')
-            if collection_overview_api_data:
-                log.debug('collection data found, so rending download confirmation form')
-                csrf_token = request.COOKIES.get('csrftoken')
-                ## return download confirmation form ----------------
-                html_content: str = request_collection_helper.render_download_confirmation_form(
-                    collection_overview_api_data, collection_id, csrf_token
-                )
-                return HttpResponse(html_content)
-            else:
-                log.debug('no collection data found, so rendering no-data-found alert')
-                resp: HttpResponse = request_collection_helper.render_alert(
-                    message='No collection data found.', include_info_link=False
-                )
-                return resp
+            ## start (or join) the listing-crawl; returns after at most one page
+            check_result: dict = request_collection_helper.start_collection_check(collection_id, force_refresh)
+            csrf_token = request.COOKIES.get('csrftoken')
+            return request_collection_helper.render_check_result(check_result, collection_id, csrf_token)
+
+
+async def hlpr_check_coll_id_async(request: HttpRequest) -> HttpResponse:
+    """
+    Async counterpart of hlpr_check_coll_id(), for when the project is served by `config.asgi`.
+    - The first page is fetched through `httpx.AsyncClient`, so it waits on the event-loop instead of holding a worker.
+    - `login_required` isn't async-aware in django 4.2, so the session-user is checked here.
+    """
+    log.debug('starting hlpr_check_coll_id_async()')
+    (is_authenticated, is_staff) = await sync_to_async(lambda: (request.user.is_authenticated, request.user.is_staff))()
+    if not is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    ## check collection id ------------------------------------------
+    collection_id: str = request.POST.get('collection_id', '').strip()
+    force_refresh: bool = request.POST.get('force_refresh') == 'yes' and is_staff
+    if not collection_id:
+        log.debug('no collection_id')
+        return request_collection_helper.render_alert('Collection ID is required.', include_info_link=False)
+    ## check for in-progress or completed ---------------------------
+    status: dict = await sync_to_async(request_collection_helper.check_collection_status)(collection_id)
+    log.debug(f'status: {status}')
+    resp: HttpResponse | None = request_collection_helper.handle_status(status)
+    if resp:  # in-progress or completed
+        return resp
+    ## start (or join) the listing-crawl; returns after at most one page
+    check_result: dict = await request_collection_helper.start_collection_check_async(collection_id, force_refresh)
+    csrf_token = request.COOKIES.get('csrftoken')
+    return request_collection_helper.render_check_result(check_result, collection_id, csrf_token)
+
+
+@login_required
+def hlpr_crawl_progress(request: HttpRequest) -> HttpResponse:
+    """
+    Handles the crawl-progress fragment's htmx GET poll.
+    - While the listing-crawl runs, returns the progress fragment again (with the latest counts), which re-polls.
+    - When it finishes, returns the download-confirmation form; if it failed, an alert.
+    """
+    log.debug('starting hlpr_crawl_progress()')
+    collection_id: str = request.GET.get('collection_id', '').strip()
+    check_result: dict = request_collection_helper.get_crawl_progress(collection_id)
+    csrf_token = request.COOKIES.get('csrftoken')
+    return request_collection_helper.render_check_result(check_result, collection_id, csrf_token)
+
+
+@login_required
+def hlpr_check_coll_ids_batch(request: HttpRequest) -> HttpResponse:
+    """
+    Handles request_collection() htmx batch-check POST of several collection-ids (comma/space/newline-separated).
+    - If no collection-ids are given, or more than `BATCH_CHECK_MAX_COLLECTIONS`, an alert is returned.
+    - The collections' first pages are fetched concurrently; returns one table of their counts and sizes,
+        which polls hlpr_batch_progress() while any listing-crawl runs on.
+    """
+    log.debug('starting hlpr_check_coll_ids_batch()')
+    collection_ids: list[str] = request_collection_helper.parse_collection_ids(request.POST.get('collection_ids', ''))
+    force_refresh: bool = request.POST.get('force_refresh') == 'yes' and request.user.is_staff
+    if not collection_ids:
+        log.debug('no collection_ids')
+        return request_collection_helper.render_alert('At least one collection ID is required.', include_info_link=False)
+    elif len(collection_ids) > project_settings.BATCH_CHECK_MAX_COLLECTIONS:
+        message = f'Please check at most {project_settings.BATCH_CHECK_MAX_COLLECTIONS} collections at a time.'
+        return request_collection_helper.render_alert(message, include_info_link=False)
+    rows: list[dict] = request_collection_helper.start_batch_check(collection_ids, force_refresh)
+    return request_collection_helper.render_batch_results(rows)
+
+
+@login_required
+def hlpr_batch_progress(request: HttpRequest) -> HttpResponse:
+    """
+    Handles the batch-results table's htmx GET poll; returns the table again, with the latest counts.
+    """
+    log.debug('starting hlpr_batch_progress()')
+    collection_ids: list[str] = request_collection_helper.parse_collection_ids(request.GET.get('collection_ids', ''))
+    rows: list[dict] = request_collection_helper.get_batch_progress(
+        collection_ids[: project_settings.BATCH_CHECK_MAX_COLLECTIONS]
+    )
+    return request_collection_helper.render_batch_results(rows)
 
 
 @login_required
@@ -207,16 +282,90 @@ def hlpr_initiate_download(request: HttpRequest) -> HttpResponse:
     """
     Handles request_collection() htmx confirm-download POST.
     - If the confirm-download is received, the job will be enqueued and an alert will be returned.
+    - Only users whose profile allows it (`UserProfile.can_initiate_downloads`) can start downloads.
+    - A collection whose file-list is still being crawled can't be queued; the alert says so.
+    - The download itself is run by the separate `run_download_worker` process, at the chosen priority.
     """
     log.debug('starting hlpr_initiate_download()')
     collection_id = request.POST.get('collection_id', '').strip()
     if request.POST.get('action') == 'really_start_download':
-        request_collection_helper.start_download(collection_id)
-        return request_collection_helper.render_alert('Download started')
+        if not request_collection_helper.can_initiate_downloads(request.user):
+            return request_collection_helper.render_alert('You are not authorized to start downloads.')
+        priority: int = request_collection_helper.parse_priority(request.POST.get('priority'))
+        if request_collection_helper.start_download(collection_id, request.user, priority):
+            return request_collection_helper.render_alert('Download queued')
+        elif request_collection_helper.is_crawl_marked_running(collection_id):
+            return request_collection_helper.render_alert(
+                'Collection is still being checked; please wait for the check to finish, then start the download.'
+            )
+        else:
+            return request_collection_helper.render_alert('Collection could not be queued; please check it again.')
     else:
         return HttpResponse(status=405)  # Method Not Allowed
 
 
+@login_required
+def download_progress(request: HttpRequest) -> HttpResponse:
+    """
+    Returns, as json, the download-progress of the running collections, or of those in the optional
+      comma/space-separated `collection_ids` param: files and bytes downloaded, of how many, the rate, and an ETA.
+    - Read from counters kept on the collections' rows, in one query, for status pages to poll.
+    """
+    log.debug('starting download_progress()')
+    collection_ids: list[str] = request_collection_helper.parse_collection_ids(request.GET.get('collection_ids', ''))
+    progress: list[dict] = request_collection_helper.get_download_progress(collection_ids)
+    return HttpResponse(json.dumps({'collections': progress}, indent=2), content_type='application/json; charset=utf-8')
+
+
+@login_required
+def collection_index(request: HttpRequest) -> HttpResponse:
+    """
+    Looks up a url in a downloaded collection's CDXJ index; returns the matching index-lines, as plain text.
+    - Params: `collection_id`, `url`, optional `matchType` (`exact`, the default, or `prefix`), optional `limit`.
+    - Returns 404 if the collection is unknown, or its index isn't built yet.
+    """
+    log.debug('starting collection_index()')
+    collection_id: str = request.GET.get('collection_id', '').strip()
+    url: str = request.GET.get('url', '').strip()
+    match_type: str = request.GET.get('matchType', 'exact')
+    if not collection_id or not url or match_type not in ('exact', 'prefix'):
+        return HttpResponse('`collection_id` and `url` are required; `matchType` is `exact` or `prefix`.', status=400)
+    try:
+        limit: int = min(int(request.GET.get('limit', '100')), project_settings.COLLECTION_INDEX_MAX_LINES)
+    except ValueError:
+        return HttpResponse('`limit` must be a number.', status=400)
+    lines: list[str] | None = request_collection_helper.search_collection_index(collection_id, url, match_type, limit)
+    if lines is None:
+        return HttpResponseNotFound('No index found for that collection.')
+    return HttpResponse(''.join(lines), content_type='text/plain; charset=utf-8')
+
+
+@login_required
+def warc_record(request: HttpRequest) -> HttpResponse:
+    """
+    Shows one record of a downloaded WARC -- its headers, and the start of its payload -- for spot-checks.
+    - Params: `collection_id`, `filename`, and `offset` (as listed by collection_index()); `format=json` for json.
+    - Only the record's own gzip-member is read, so it's quick however big the WARC.
+    """
+    log.debug('starting warc_record()')
+    collection_id: str = request.GET.get('collection_id', '').strip()
+    filename: str = request.GET.get('filename', '').strip()
+    try:
+        offset: int = int(request.GET.get('offset', ''))
+    except ValueError:
+        return HttpResponse('`collection_id`, `filename`, and a numeric `offset` are required.', status=400)
+    try:
+        record: dict | None = request_collection_helper.read_collection_record(collection_id, filename, offset)
+    except warc_reader.WarcRecordError as e:
+        return HttpResponse(str(e), status=400)
+    if record is None:
+        return HttpResponseNotFound('No such downloaded file in that collection.')
+    if request.GET.get('format', '') == 'json':
+        return HttpResponse(json.dumps(record, indent=2), content_type='application/json; charset=utf-8')
+    context = {'collection_id': collection_id, 'record': record, 'username': request.user.first_name}
+    return render(request, 'warc_record.html', context)
+
+
 # -------------------------------------------------------------------
 # support urls
 # -------------------------------------------------------------------